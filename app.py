@@ -1,17 +1,64 @@
 import streamlit as st
 import os
-import json
+import time
+import argparse
 import pandas as pd
-from src.agent import ShoppingAgent
+from src.batch_runner import SearchCache
+from src.llm_analyzer import ask_clarifying_questions
+from src.pipeline import build_requirements
+from src.service.local_jobs import LocalJobRunner
+from src.utils import json_codec, profiling
+from src.utils.pools import get_browser_pool, get_llm_pool
+
+# streamlit run app.py -- --profile search  (-- 之后的参数留给本脚本)
+_parser = argparse.ArgumentParser()
+profiling.add_arguments(_parser)
+profiling.apply_arguments(_parser.parse_known_args()[0])
 
 st.set_page_config(page_title="AI 购物助手", page_icon="🛒", layout="wide")
 
 st.title("🛒 AI 智能购物助手")
 st.markdown("---")
 
-# 初始化 Agent
-if 'agent' not in st.session_state:
-    st.session_state.agent = ShoppingAgent()
+PAGE_SIZE = 50
+DISPLAY_COLUMNS = ['title', 'price', 'shop', 'platform', 'smart_score']
+POLL_SECONDS = 1.0
+STAGE_LABELS = {
+    None: "🔍 正在全网搜索...",
+    "search": "🧠 正在进行 AI 智能初筛...",
+    "filter": "🕵️ 正在采集商品详情...",
+    "details": "📊 正在生成最终购买建议...",
+    "analyze": "🎉 购买决策报告已生成！",
+}
+
+# 进程级共享资源：浏览器/LLM 并发池与后台任务表 (所有会话、所有 rerun 共用)
+@st.cache_resource
+def get_pools():
+    return get_browser_pool(), get_llm_pool()
+
+@st.cache_resource
+def get_job_runner():
+    get_pools()
+    return LocalJobRunner(search_cache=SearchCache())
+
+# 数据缓存：以文件路径 + 修改时间为键，页面重跑时不再重复读盘/解析
+@st.cache_data(show_spinner=False, ttl=3600)
+def clarifying_questions(keyword):
+    return ask_clarifying_questions(keyword)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_report(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_products(path, mtime):
+    return pd.DataFrame(json_codec.load(path))
+
+def _mtime(path):
+    return os.path.getmtime(path) if path and os.path.exists(path) else None
+
+runner = get_job_runner()
 
 # 侧边栏配置
 with st.sidebar:
@@ -30,85 +77,87 @@ with st.sidebar:
     )
     max_pages = st.number_input("抓取页数", min_value=1, max_value=20, value=1)
     top_n = st.number_input("筛选数量", min_value=1, max_value=10, value=3)
-    
+
     if st.button("🧹 清理旧数据"):
-        st.session_state.agent.clean_data()
+        runner.clear()
+        load_report.clear()
+        load_products.clear()
+        st.session_state.pop("job_key", None)
         st.success("数据已清理")
 
 # 主界面
 keyword = st.text_input("🔍 请输入你想购买的商品", placeholder="例如: 跑步鞋, 机械键盘")
 
 if keyword:
-    # 智能追问
-    if 'questions' not in st.session_state or st.session_state.last_keyword != keyword:
-        with st.spinner("🤔 正在思考需要了解哪些细节..."):
-            st.session_state.questions = st.session_state.agent.ask_clarifying_questions(keyword)
-            st.session_state.last_keyword = keyword
-    
+    # 智能追问 (相同关键词直接复用缓存的问题)
+    with st.spinner("🤔 正在思考需要了解哪些细节..."):
+        questions = clarifying_questions(keyword)
+
     answers = {}
-    if st.session_state.questions:
+    if questions:
         st.info("👉 为了更精准地为您推荐，请回答以下几个问题（可选）：")
-        for q in st.session_state.questions:
+        for q in questions:
             answers[q] = st.text_input(f"❓ {q}")
 
-    if st.button("🚀 开始搜索"):
-        detailed_requirements = keyword
-        for q, a in answers.items():
-            if a:
-                detailed_requirements += f" {a}"
-        
-        st.write(f"📝 您的最终需求：{detailed_requirements}")
-        
-        # 1. 搜索
-        with st.status("🔍 正在全网搜索...", expanded=True) as status:
-            st.write("正在清理环境...")
-            st.session_state.agent.clean_data()
-            
-            st.write(f"正在 {platform_choice} 平台上搜索 '{keyword}'...")
-            products = st.session_state.agent.search(keyword, max_pages, platform_choice)
-            
-            if not products:
-                status.update(label="❌ 搜索未找到结果", state="error")
-                st.error("未找到相关商品，请尝试更换关键词或平台。")
-            else:
-                status.update(label=f"✅ 搜索完成，共找到 {len(products)} 个商品", state="complete")
-                
-                # 显示搜索结果概览
-                df = pd.DataFrame(products)
-                if not df.empty:
-                    st.dataframe(df[['title', 'price', 'shop', 'platform', 'smart_score']], use_container_width=True)
-
-                # 2. 筛选
-                with st.spinner("🧠 正在进行 AI 智能初筛..."):
-                    top_candidates = st.session_state.agent.filter_products(detailed_requirements, top_n)
-                
-                if not top_candidates:
-                    st.error("❌ 初筛未选中任何商品。")
-                else:
-                    st.success(f"✅ AI 已筛选出 {len(top_candidates)} 个最佳候选商品")
-                    
-                    # 3. 详情采集
-                    with st.spinner("🕵️ 正在采集商品详情..."):
-                        st.session_state.agent.get_details()
-                    
-                    # 4. 分析报告
-                    with st.spinner("📊 正在生成最终购买建议..."):
-                        report_path = st.session_state.agent.analyze_products()
-                    
-                    st.balloons()
-                    st.success("🎉 购买决策报告已生成！")
-                    
-                    # 读取并显示 HTML 报告
-                    if os.path.exists("data/final_report.html"):
-                        with open("data/final_report.html", "r", encoding="utf-8") as f:
-                            html_content = f.read()
-                        st.components.v1.html(html_content, height=800, scrolling=True)
-                        
-                        with open("data/final_report.html", "rb") as f:
-                            st.download_button(
-                                label="📥 下载完整报告",
-                                data=f,
-                                file_name="shopping_report.html",
-                                mime="text/html"
-                            )
+    col_search, col_refresh = st.columns([1, 1])
+    start = col_search.button("🚀 开始搜索")
+    refresh = col_refresh.button("🔄 重新抓取", help="忽略已缓存的结果重新运行")
+    if start or refresh:
+        spec = {
+            "keyword": keyword,
+            "requirements": build_requirements(keyword, answers),
+            "platform_choice": platform_choice,
+            "max_pages": int(max_pages),
+            "top_n": int(top_n),
+        }
+        # 相同参数的任务已完成或正在运行时直接复用，不会重新抓取
+        job = runner.submit(spec, force=refresh)
+        st.session_state.job_key = job.key
+
+job = runner.get(st.session_state.get("job_key"))
+
+if job:
+    st.write(f"📝 您的最终需求：{job.spec['requirements']}")
+    if not job.done:
+        st.progress(job.progress, text=f"{STAGE_LABELS.get(job.stage, '')} ({job.elapsed:.0f}s)")
+        if st.button("⏹️ 取消任务"):
+            job.cancel()
+    elif job.status == "done":
+        st.success(f"{STAGE_LABELS['analyze']} (用时 {job.elapsed:.0f}s)")
+        if job.result.get("profile_dir"):
+            st.caption(f"🔬 剖析结果: {job.result['profile_dir']}")
+    elif job.status == "parked":
+        st.warning(f"⏸️ 需要人工处理: {job.error}")
+    elif job.status == "cancelled":
+        st.info("⏹️ 任务已取消")
+    else:
+        st.error(f"❌ {job.error}")
+
+    # 搜索结果概览 (分页展示，每次只向前端推送一页数据)
+    products_path = job.workspace.search_results_path
+    products_mtime = _mtime(products_path) if job.stage else None
+    if products_mtime:
+        df = load_products(products_path, products_mtime)
+        st.markdown("### 📋 搜索结果概览")
+        total_pages = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
+        page = st.number_input(f"页码 (共 {total_pages} 页, {len(df)} 个商品)", min_value=1, max_value=total_pages, value=1)
+        page_df = df.iloc[(page - 1) * PAGE_SIZE: page * PAGE_SIZE]
+        st.dataframe(page_df[[c for c in DISPLAY_COLUMNS if c in page_df.columns]], use_container_width=True)
+
+    # 购买决策报告 (商品对比表在报告内部做虚拟滚动)
+    report_path = job.result.get("report_path") if job.status == "done" else None
+    report_mtime = _mtime(report_path)
+    if report_mtime:
+        report_html = load_report(report_path, report_mtime)
+        st.components.v1.html(report_html, height=800, scrolling=True)
+        st.download_button(
+            label="📥 下载完整报告",
+            data=report_html.encode("utf-8"),
+            file_name="shopping_report.html",
+            mime="text/html"
+        )
 
+    # 后台任务运行中：定时刷新进度 (页面其余部分来自缓存，刷新开销很小)
+    if not job.done:
+        time.sleep(POLL_SECONDS)
+        st.rerun()
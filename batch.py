@@ -0,0 +1,25 @@
+import sys
+import argparse
+from src.batch_runner import run_batch
+from src.utils import profiling
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Shopping Agent 批量运行 (JSONL 任务描述 -> JSONL 结果)")
+    parser.add_argument("input", help='任务文件，每行一个 JSON，如 {"id": "k1", "keyword": "机械键盘", "platforms": ["jd"], "max_pages": 1, "top_n": 3, "answers": ["预算500"]}')
+    parser.add_argument("-o", "--output", default="data/batch_results.jsonl", help="结果文件 (重跑时跳过其中已完成的任务)")
+    parser.add_argument("-c", "--concurrency", type=int, default=None, help="同时运行的任务数 (默认读取 batch.concurrency)")
+    parser.add_argument("--max-browsers", type=int, default=None, help="全局浏览器并发上限 (默认读取 pools.max_browsers)")
+    parser.add_argument("--max-llm", type=int, default=None, help="全局 LLM 并发上限 (默认读取 pools.max_llm_calls)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.apply_arguments(args)
+
+    summary = run_batch(args.input, args.output, concurrency=args.concurrency,
+                        max_browsers=args.max_browsers, max_llm_calls=args.max_llm)
+    # 有失败或挂起的任务时返回非零退出码，便于脚本判断
+    sys.exit(0 if summary["failed"] == 0 and summary["parked"] == 0 else 1)
+
+if __name__ == "__main__":
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    main()
@@ -0,0 +1,102 @@
+"""
+启动耗时测量: 用 python -X importtime 在独立子进程中导入各入口模块，统计总耗时与最慢的模块
+
+用法:
+    python benchmarks/import_time.py              # 测量各入口
+    python benchmarks/import_time.py --top 20     # 显示更多慢模块
+    python benchmarks/import_time.py --scrapers   # 额外测量每个爬虫插件的首次加载耗时
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口 -> 启动时导入的模块 (app.py 依赖 streamlit，这里测量它导入的 src.agent)
+ENTRY_POINTS = {
+    "main.py": "main",
+    "app.py (src.agent)": "src.agent",
+    "serve.py": "src.service.server",
+    "batch.py": "src.batch_runner",
+}
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 输出: "import time: self [us] | cumulative | imported package"
+    :return: (顶层模块累计耗时之和 us, [(cumulative_us, 模块名)])
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _self_us, cumulative, name = line.split(":", 1)[1].split("|")
+            cumulative = int(cumulative.strip())
+        except ValueError:
+            continue
+        # 模块名前多出的缩进表示被嵌套导入；只有顶层模块的累计耗时相加才等于总耗时
+        if not name[1:].startswith(" "):
+            total += cumulative
+        modules.append((cumulative, name.strip()))
+    return total, modules
+
+def measure_module(module):
+    proc = _run(f"import {module}")
+    total, modules = parse_importtime(proc.stderr)
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return total, modules, error
+
+def measure_scrapers():
+    """每个爬虫在独立进程中加载，记录 registry 导入耗时 (缺少依赖时记录错误)"""
+    from src.scrapers import registry
+
+    results = []
+    for name in registry.SCRAPERS:
+        code = (
+            "from src.scrapers import registry\n"
+            f"spec = registry.get_spec({name!r})\n"
+            "spec.load()\n"
+            "print(spec.load_seconds)\n"
+        )
+        proc = _run(code)
+        if proc.returncode == 0:
+            results.append((name, float(proc.stdout.strip().splitlines()[-1]), None))
+        else:
+            results.append((name, None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="测量各入口的模块导入耗时")
+    parser.add_argument("--top", type=int, default=10, help="每个入口显示最慢的 N 个模块")
+    parser.add_argument("--scrapers", action="store_true", help="同时测量每个爬虫插件的加载耗时")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    for label, module in ENTRY_POINTS.items():
+        total, modules, error = measure_module(module)
+        print(f"\n⏱️ {label}: {total / 1000:.1f} ms")
+        if error:
+            print(f"   ⚠️ 导入失败: {error}")
+        for cumulative, name in sorted(modules, reverse=True)[:args.top]:
+            print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.scrapers:
+        print("\n🧩 爬虫插件首次加载耗时:")
+        for name, seconds, error in measure_scrapers():
+            if error:
+                print(f"   {name:<12} ⚠️ {error}")
+            else:
+                print(f"   {name:<12} {seconds * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+LLM 阶段基准: 在本地模拟服务 (src/testing/llm_stub.py) 上运行初筛、分析与 Markdown 提取，无需真实 API Key
+
+用法:
+    python benchmarks/llm_stages.py                                  # 默认 100 个合成商品
+    python benchmarks/llm_stages.py --products 20,100,500            # 比较商品数量 (Prompt 大小) 的影响
+    python benchmarks/llm_stages.py --latency 0.3 --token-rate 40    # 模拟真实服务的延迟与输出速率
+    python benchmarks/llm_stages.py --error-rate 0.1                 # 错误注入 (观察重试与兜底逻辑)
+
+报告每个阶段的调用次数、错误数、Token 用量、LLM 耗时与阶段总耗时。
+OpenAI 客户端会自动重试失败的请求 (默认 2 次)，注入的错误大多被重试吸收，只体现为额外的延迟：
+"错误" 列是重试后仍失败、到达调用方的次数；"请求"/"注入错误" 列来自模拟服务自身的统计 (含重试)。
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import urllib.request
+from urllib.parse import urlsplit, urlunsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from src.testing.llm_stub import StubLLMServer
+from src.testing.synthetic import make_products, make_detail, make_search_markdown
+from src.utils import json_codec
+from src.utils.events import EVENTS
+
+STAGES = ["filter", "analyze", "extract"]
+
+def server_stats(server, base_url):
+    """模拟服务按阶段统计的请求数与注入错误数 (含客户端重试)；无法获取时返回空 dict"""
+    if server is not None:
+        return server.stats
+    parts = urlsplit(base_url)
+    try:
+        with urllib.request.urlopen(urlunsplit((parts.scheme, parts.netloc, "/stats", "", "")), timeout=5) as response:
+            return json_codec.loads(response.read())
+    except Exception:
+        return {}
+
+class StageStats:
+    """订阅 llm_end 事件，按阶段累计调用次数与 Token 用量"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def on_event(self, event, data):
+        if event != "llm_end":
+            return
+        row = self.rows.setdefault(data.get("stage"), {"calls": 0, "errors": 0, "prompt_tokens": 0,
+                                                        "completion_tokens": 0, "llm_seconds": 0.0})
+        row["calls"] += 1
+        row["errors"] += 1 if data.get("error") else 0
+        row["prompt_tokens"] += data.get("prompt_tokens") or 0
+        row["completion_tokens"] += data.get("completion_tokens") or 0
+        row["llm_seconds"] += data.get("seconds") or 0
+
+def run_stages(n_products, top_n, repeat, verbose=False, stats_fn=dict):
+    from src.llm_analyzer import filter_products, analyze_products, extract_info_from_markdown
+    from src.storage.workspace import Workspace
+
+    stats = StageStats()
+    walls = {stage: 0.0 for stage in STAGES}
+    products = make_products(n_products, seed=n_products)
+    markdown = make_search_markdown(products[:60])
+    rng = random.Random(0)
+
+    before = stats_fn()
+    unsubscribe = EVENTS.subscribe(stats.on_event)
+    try:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w", encoding="utf-8") as devnull, \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+            for _ in range(repeat):
+                workspace = Workspace(root=tmp)
+
+                start = time.perf_counter()
+                candidates = filter_products("高性价比 预算 500 以内", top_n=top_n, products=[dict(p) for p in products],
+                                             workspace=workspace)
+                walls["filter"] += time.perf_counter() - start
+
+                workspace.detail_store().append_many([make_detail(rng, p) for p in candidates])
+                start = time.perf_counter()
+                analyze_products(all_products=products, workspace=workspace)
+                walls["analyze"] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                extract_info_from_markdown(markdown)
+                walls["extract"] += time.perf_counter() - start
+                workspace.remove()
+    finally:
+        unsubscribe()
+    after = stats_fn()
+
+    results = []
+    for stage in STAGES:
+        row = stats.rows.get(stage, {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_seconds": 0.0})
+        server_row, server_before = after.get(stage, {}), before.get(stage, {})
+        results.append({
+            "products": n_products, "stage": stage, **row,
+            "server_requests": server_row.get("calls", 0) - server_before.get("calls", 0),
+            "injected_errors": server_row.get("errors", 0) - server_before.get("errors", 0),
+            "wall_seconds": walls[stage],
+        })
+    return results
+
+def format_results(results):
+    lines = [f"{'商品数':>6} {'阶段':<8} {'调用':>5} {'错误':>5} {'请求':>5} {'注入错误':>8} {'prompt':>9} {'completion':>11} "
+             f"{'LLM s':>8} {'总耗时 s':>9}"]
+    for r in results:
+        lines.append(
+            f"{r['products']:>6} {r['stage']:<8} {r['calls']:>5} {r['errors']:>5} {r['server_requests']:>5} "
+            f"{r['injected_errors']:>8} {r['prompt_tokens']:>9} "
+            f"{r['completion_tokens']:>11} {r['llm_seconds']:>8.2f} {r['wall_seconds']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地 LLM 模拟服务上测量各阶段的调用、Token 与耗时")
+    parser.add_argument("--products", default="100", help="合成商品数量，逗号分隔可比较多组")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟服务的固定延迟 (秒)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="模拟服务的输出速率 (tokens/s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误注入概率")
+    parser.add_argument("--replay", help="回放录制的回复 (JSONL)")
+    parser.add_argument("--base-url", help="使用已运行的模拟服务，不在进程内启动")
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    parser.add_argument("--verbose", action="store_true", help="显示各阶段的原始输出")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server = StubLLMServer(latency=args.latency, token_rate=args.token_rate,
+                               error_rate=args.error_rate, replay_path=args.replay).start()
+        base_url = server.base_url
+    # 客户端在第一次调用时按环境变量创建
+    os.environ["LLM_API_KEY"] = "stub"
+    os.environ["LLM_BASE_URL"] = base_url
+    print(f"🤖 LLM 模拟服务: {base_url}")
+
+    results = []
+    try:
+        for n in [int(x) for x in args.products.split(",") if x.strip()]:
+            print(f"⏱️ {n} 个商品 x {args.repeat} 轮 ...")
+            results.extend(run_stages(n, args.top_n, args.repeat, args.verbose,
+                                      stats_fn=lambda: server_stats(server, base_url)))
+    finally:
+        if server:
+            server.stop()
+
+    print()
+    print(format_results(results))
+    if args.json:
+        json_codec.dump(results, args.json)
+        print(f"💾 结果已保存: {args.json}")
+
+if __name__ == "__main__":
+    main()
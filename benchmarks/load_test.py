@@ -0,0 +1,283 @@
+"""
+并发会话压测: 模拟 N 个 Streamlit 会话同时通过 ShoppingAgent 跑完整流程，找出单机能支撑的会话数
+
+数据来源 (都不访问真实站点，也不需要 API Key):
+    --source synthetic   合成数据爬虫 (src/testing/synthetic.py)，按 --page-seconds 模拟每页抓取耗时，不启动浏览器；
+                         详情阶段按 --detail-seconds 模拟每个商品的采集耗时，并占用浏览器池槽位
+    --source replay      真实爬虫 + 录制回放 (src/scrapers/recording.py)，需要 playwright 与已录制的数据
+LLM 使用本地模拟服务 (src/testing/llm_stub.py)，可用 --llm-latency / --token-rate 模拟真实服务的速度
+
+用法:
+    python benchmarks/load_test.py --sessions 1,2,4,8,16
+    python benchmarks/load_test.py --sessions 2,4,8 --llm-latency 1.5 --token-rate 40 --max-llm 4
+    python benchmarks/load_test.py --source replay --platform 2 --sessions 1,2,4 --max-browsers 2
+
+报告每个并发级别下各阶段耗时的 p50/p90/p99、吞吐量 (会话/分钟)、峰值内存与每会话内存，并给出吞吐量饱和点。
+"""
+import os
+import sys
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from src.config_loader import CONFIG
+from src.testing.llm_stub import StubLLMServer
+from src.utils import json_codec
+
+STAGES = ["clarify", "search", "filter", "details", "analyze", "total"]
+# 吞吐量提升不足该比例时视为饱和
+SATURATION_GAIN = 0.10
+SYNTHETIC_CHOICE = "synthetic"
+KEYWORDS = ["机械键盘", "跑步鞋", "蓝牙耳机", "空气炸锅", "显示器", "双肩包", "电动牙刷", "保温杯"]
+
+def rss_mb():
+    """当前进程 (含浏览器等子进程) 的常驻内存 (MB)；无法获取时返回 None"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class MemorySampler:
+    """后台线程定时读取 RSS，记录压测期间的峰值"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while True:
+            value = rss_mb()
+            if value is not None:
+                self.peak = max(self.peak or 0, value)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+def percentile(values, p):
+    """最近秩百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def _isolate(tmp):
+    """运行目录、商品目录写到临时目录，压测不污染本机数据；关闭终端看板与汇总表"""
+    CONFIG.setdefault("storage", {}).update(runs_dir=os.path.join(tmp, "runs"), catalog_path=os.path.join(tmp, "catalog.db"))
+    CONFIG.setdefault("ui", {})["live_dashboard"] = False
+    CONFIG.setdefault("tracing", {})["print_summary"] = False
+
+def _use_synthetic(page_seconds, per_page, detail_seconds):
+    from src.scrapers import registry
+    from src.testing.synthetic import SyntheticScraper, SyntheticDetailScraper
+
+    SyntheticScraper.page_seconds = page_seconds
+    SyntheticScraper.per_page = per_page
+    SyntheticDetailScraper.detail_seconds = detail_seconds
+    if "synthetic" not in registry.SCRAPERS:
+        registry.register("synthetic", "src.testing.synthetic", "SyntheticScraper", "合成数据", is_async=True,
+                          start_message="🧪 正在生成合成商品...")
+    # 淘宝详情采集由合成爬虫代替 (压测进程内有效)
+    registry.register("taobao", "src.testing.synthetic", "SyntheticDetailScraper", "合成详情", capabilities=("details",))
+    registry.PLATFORM_SCRAPERS[SYNTHETIC_CHOICE] = ["synthetic"]
+    return SYNTHETIC_CHOICE
+
+def _replay_keyword(platform_choice):
+    """回放时关键词与页数必须与录制时一致"""
+    from src.scrapers import registry, recording
+
+    spec = registry.scrapers_for_choice(platform_choice)[0]
+    meta = recording.load_meta("jd" if spec.name == "jd_crawl4ai" else spec.name)
+    if not meta.get("keyword"):
+        raise SystemExit(f"❌ 没有 {spec.name} 的录制数据，请先以 SHOPPING_AGENT_RECORDING=record 运行一次")
+    return meta["keyword"], meta.get("max_pages") or 1
+
+def run_session(index, keyword, platform_choice, max_pages, top_n):
+    """一个会话: 与 app.py 相同的调用顺序 (追问 -> 搜索 -> 初筛 -> 详情 -> 报告)，返回各阶段耗时"""
+    from src.agent import ShoppingAgent
+    from src.utils.interaction import non_interactive
+
+    timings = {}
+    start = time.perf_counter()
+    error = None
+    agent = ShoppingAgent()
+
+    def timed(stage, fn):
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[stage] = time.perf_counter() - t0
+
+    try:
+        with non_interactive():
+            questions = timed("clarify", lambda: agent.ask_clarifying_questions(keyword))
+            requirements = f"{keyword} {' '.join(q[:4] for q in questions or [])}"
+            if timed("search", lambda: agent.search(keyword, max_pages, platform_choice)):
+                if timed("filter", lambda: agent.filter_products(requirements, top_n=top_n)):
+                    timed("details", agent.get_details)
+                    timed("analyze", agent.analyze_products)
+                else:
+                    error = "初筛未选中任何商品"
+            else:
+                error = "未找到相关商品"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        agent.save_trace(print_summary=False)
+        agent.workspace.remove()
+    timings["total"] = time.perf_counter() - start
+    return {"session": index, "timings": timings, "error": error}
+
+def run_level(sessions, rounds, keywords, platform_choice, max_pages, top_n, verbose=False):
+    """sessions 个会话同时运行，每个会话连续跑 rounds 次"""
+    baseline = rss_mb()
+
+    def worker(index):
+        return [run_session(index, keywords[(index + r) % len(keywords)], platform_choice, max_pages, top_n)
+                for r in range(rounds)]
+
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, \
+            (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)), \
+            MemorySampler() as memory, ThreadPoolExecutor(max_workers=sessions) as executor:
+        results = [r for batch in executor.map(worker, range(sessions)) for r in batch]
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if not r["error"]]
+    row = {
+        "sessions": sessions,
+        "runs": len(results),
+        "ok": len(ok),
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+        "wall_seconds": wall,
+        "throughput_per_min": len(ok) / wall * 60 if wall else 0,
+        "peak_rss_mb": memory.peak,
+        "mb_per_session": (memory.peak - baseline) / sessions if memory.peak and baseline else None,
+        "stages": {},
+    }
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in ok if stage in r["timings"]]
+        row["stages"][stage] = {f"p{p}": percentile(values, p) for p in (50, 90, 99)}
+    return row
+
+def find_saturation(rows):
+    """吞吐量随会话数增加而提升不足 SATURATION_GAIN 的第一个级别 (之前的级别即可支撑的并发上限)"""
+    for previous, row in zip(rows, rows[1:]):
+        if row["throughput_per_min"] < previous["throughput_per_min"] * (1 + SATURATION_GAIN):
+            return previous["sessions"], row["sessions"]
+    return None
+
+def _seconds(value):
+    return f"{value:.2f}" if value is not None else "-"
+
+def format_results(rows):
+    lines = [f"{'会话':>4} {'成功':>7} {'会话/分':>8} {'峰值MB':>8} {'MB/会话':>8}  " +
+             " ".join(f"{stage + ' p50/p90/p99':>22}" for stage in STAGES)]
+    for row in rows:
+        stages = " ".join(
+            f"{'/'.join(_seconds(row['stages'][s][p]) for p in ('p50', 'p90', 'p99')):>22}" for s in STAGES
+        )
+        peak = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] else "-"
+        per_session = f"{row['mb_per_session']:.1f}" if row["mb_per_session"] is not None else "-"
+        lines.append(f"{row['sessions']:>4} {row['ok']:>3}/{row['runs']:<3} {row['throughput_per_min']:>8.1f} "
+                     f"{peak:>8} {per_session:>8}  {stages}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟多个会话并发运行完整流程，测量各阶段延迟、内存与吞吐量饱和点")
+    parser.add_argument("--sessions", default="1,2,4,8", help="并发会话数，逗号分隔，按顺序逐级加压")
+    parser.add_argument("--rounds", type=int, default=1, help="每个会话连续运行的次数")
+    parser.add_argument("--source", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--platform", default="2", help="--source replay 时的平台选项 (需已录制)")
+    parser.add_argument("--max-pages", type=int, default=2, help="合成数据的页数")
+    parser.add_argument("--per-page", type=int, default=40, help="合成数据每页商品数")
+    parser.add_argument("--page-seconds", type=float, default=0.5, help="合成数据每页的模拟抓取耗时")
+    parser.add_argument("--detail-seconds", type=float, default=1.0, help="合成数据每个商品的模拟详情采集耗时")
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="LLM 模拟服务每次调用的固定延迟")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="LLM 模拟服务的输出速率 (tokens/s)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--max-browsers", type=int, default=None, help="浏览器并发上限 (默认读取 pools.max_browsers)")
+    parser.add_argument("--max-llm", type=int, default=None, help="LLM 并发上限 (默认读取 pools.max_llm_calls)")
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    parser.add_argument("--verbose", action="store_true", help="显示各会话的输出")
+    args = parser.parse_args()
+
+    from src.utils.pools import configure_pools
+
+    tmp = tempfile.mkdtemp(prefix="load-test-")
+    _isolate(tmp)
+    configure_pools(max_browsers=args.max_browsers, max_llm_calls=args.max_llm)
+
+    if args.source == "replay":
+        os.environ["SHOPPING_AGENT_RECORDING"] = "replay"
+        platform_choice = args.platform
+        keyword, max_pages = _replay_keyword(platform_choice)
+        keywords = [keyword]
+    else:
+        platform_choice = _use_synthetic(args.page_seconds, args.per_page, args.detail_seconds)
+        keywords, max_pages = KEYWORDS, args.max_pages
+
+    server = StubLLMServer(latency=args.llm_latency, token_rate=args.token_rate, error_rate=args.llm_error_rate).start()
+    os.environ["LLM_API_KEY"] = "stub"
+    os.environ["LLM_BASE_URL"] = server.base_url
+    print(f"🤖 LLM 模拟服务: {server.base_url} | 数据来源: {args.source}")
+
+    rows = []
+    try:
+        for sessions in [int(x) for x in args.sessions.split(",") if x.strip()]:
+            print(f"⏱️ {sessions} 个并发会话 x {args.rounds} 轮 ...")
+            rows.append(run_level(sessions, args.rounds, keywords, platform_choice, max_pages, args.top_n, args.verbose))
+            for error in rows[-1]["errors"]:
+                print(f"   ⚠️ {error}")
+    finally:
+        server.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print()
+    print(format_results(rows))
+    saturation = find_saturation(rows)
+    if saturation:
+        print(f"\n📈 吞吐量在 {saturation[0]} 个会话后趋于饱和 ({saturation[1]} 个会话时提升不足 {SATURATION_GAIN:.0%})")
+    else:
+        print("\n📈 在测试范围内吞吐量仍随会话数增加，可继续加压")
+    print(f"🤖 LLM 调用统计: {server.stats}")
+
+    if args.json:
+        json_codec.dump({"args": vars(args), "results": rows, "saturation": saturation, "llm": server.stats}, args.json)
+        print(f"💾 结果已保存: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+SmartScorer 规模基准与回归检查: 用合成商品 (src/testing/synthetic.py) 测量解析、统计、打分、排序各环节的吞吐量
+
+用法:
+    python benchmarks/scorer_scaling.py                              # 100 ~ 100 万个商品
+    python benchmarks/scorer_scaling.py --sizes 100,10000            # 只测指定规模
+    python benchmarks/scorer_scaling.py --save-baseline              # 记录当前机器的基线
+    python benchmarks/scorer_scaling.py --check --tolerance 0.2      # 吞吐量低于基线 20% 以上时以非零状态退出
+
+每次运行都会先核对各打分实现 (SCORERS) 与参考实现的得分和排序是否一致，不一致同样以非零状态退出。
+"""
+import os
+import gc
+import sys
+import math
+import timeit
+import argparse
+import platform as platform_module
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.analysis.scorer import SmartScorer, parse_price, parse_sales
+from src.testing.synthetic import make_products
+from src.utils import json_codec
+
+DEFAULT_SIZES = "100,1000,10000,100000,1000000"
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "scorer_scaling.json")
+PHASES = ["parse", "stats", "score", "rank"]
+
+# ---- 参考实现 ----
+# 按 SmartScorer 最初的公式逐项计算，不做任何优化；用于核对改写后的实现得分是否一致
+def reference_scores(products):
+    prices = [parse_price(p.get('price', '0')) for p in products]
+    sales = [parse_sales(p.get('deal_count', '0')) for p in products]
+    valid_prices = [p for p in prices if p > 0]
+    if valid_prices:
+        avg_price = sum(valid_prices) / len(valid_prices)
+        variance = sum((x - avg_price) ** 2 for x in valid_prices) / len(valid_prices)
+        std_price = math.sqrt(variance) if variance > 0 else 1.0
+        avg_sales = sum(sales) / len(sales)
+    else:
+        avg_price, std_price, avg_sales = 0, 1, 0
+
+    scores = []
+    for product, price, sale in zip(products, prices, sales):
+        z_score = (price - avg_price * 0.8) / std_price if std_price > 0 else 0
+        price_score = 20 if price < avg_price * 0.2 else math.exp(-(z_score ** 2) / 2) * 100
+        sales_score = min(sale / avg_sales, 3.0) * 33 if avg_sales > 0 else 0
+        shop_name = product.get('shop', '')
+        shop_score = 50
+        if '自营' in shop_name:
+            shop_score += 50
+        elif '旗舰' in shop_name:
+            shop_score += 30
+        elif '专营' in shop_name:
+            shop_score += 10
+        relevance_score = 100 if len(product.get('title', '')) > 10 else 50
+        scores.append(round(0.30 * price_score + 0.30 * sales_score + 0.25 * shop_score + 0.15 * relevance_score, 2))
+    return scores
+
+def smart_scorer_scores(products):
+    ranked = SmartScorer([dict(p) for p in products]).rank_products()
+    by_id = {p["id"]: p["smart_score"] for p in ranked}
+    return [by_id[p["id"]] for p in products]
+
+# 名称 -> 函数(products) -> 与 products 一一对应的得分；新增的打分实现在这里登记即可参与一致性检查
+SCORERS = {
+    "SmartScorer": smart_scorer_scores,
+}
+
+def check_parity(n=5000, seed=7):
+    """
+    各实现与参考实现逐个商品比较得分 (保留两位小数后应完全相同)，并比较排序
+    合成数据包含异常价格/销量，覆盖解析失败的分支
+    :return: 问题描述列表，空列表表示一致
+    """
+    products = make_products(n, seed=seed, invalid_rate=0.05)
+    expected = reference_scores(products)
+    expected_order = _order(products, expected)
+    problems = []
+    for name, scorer in SCORERS.items():
+        scores = scorer(products)
+        mismatched = [i for i, (a, b) in enumerate(zip(scores, expected)) if abs(a - b) > 1e-9]
+        if len(scores) != len(expected) or mismatched:
+            first = mismatched[0] if mismatched else None
+            detail = f"第一个差异: {products[first]} -> {scores[first]} != {expected[first]}" if first is not None else "数量不一致"
+            problems.append(f"{name}: {len(mismatched)} 个商品得分不一致 ({detail})")
+        elif _order(products, scores) != expected_order:
+            problems.append(f"{name}: 排序与参考实现不一致")
+    return problems
+
+def _order(products, scores):
+    # 与 rank_products 一致: 按得分降序的稳定排序
+    return [products[i]["id"] for i in sorted(range(len(products)), key=lambda i: scores[i], reverse=True)]
+
+# ---- 吞吐量 ----
+def _best_rate(fn, n, repeat):
+    """autorange 决定每轮调用次数 (至少约 0.2 秒)，取 repeat 轮中最快的一轮，返回 商品数/秒"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return n / best if best > 0 else float("inf")
+
+def measure(n, repeat, seed=0):
+    products = make_products(n, seed=seed)
+    scorer = SmartScorer(products)
+    # 百万级商品时每轮已是秒级，一轮即可
+    repeat = repeat if n <= 100000 else 1
+
+    def parse():
+        for p in products:
+            parse_price(p.get('price', '0'))
+            parse_sales(p.get('deal_count', '0'))
+
+    def score():
+        for p in products:
+            scorer.calculate_score(p)
+
+    phases = {
+        "parse": parse,
+        "stats": scorer._calculate_global_stats,
+        "score": score,
+        "rank": scorer.rank_products,
+    }
+    row = {"products": n}
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for phase in PHASES:
+            row[phase] = _best_rate(phases[phase], n, repeat)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return row
+
+def format_results(rows, regressions=()):
+    flagged = {(r["products"], r["phase"]) for r in regressions}
+    lines = [f"{'商品数':>9} " + " ".join(f"{phase + ' /s':>14}" for phase in PHASES)]
+    for row in rows:
+        cells = []
+        for phase in PHASES:
+            mark = "⚠️" if (row["products"], phase) in flagged else ""
+            cells.append(f"{mark}{row[phase]:>14,.0f}")
+        lines.append(f"{row['products']:>9} " + " ".join(cells))
+    return "\n".join(lines)
+
+def compare(rows, baseline, tolerance):
+    """与基线逐项比较，吞吐量低于 基线 * (1 - tolerance) 的记为回归 (基线中没有的规模跳过)"""
+    base_rows = {r["products"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for row in rows:
+        base = base_rows.get(row["products"])
+        if not base:
+            continue
+        for phase in PHASES:
+            if phase in base and row[phase] < base[phase] * (1 - tolerance):
+                regressions.append({"products": row["products"], "phase": phase,
+                                    "current": row[phase], "baseline": base[phase]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartScorer 规模基准与回归检查")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="商品数量，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每个环节取最快一轮的轮数")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--check", action="store_true", help="与基线比较，出现回归时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的吞吐量下降比例")
+    parser.add_argument("--skip-parity", action="store_true", help="跳过得分一致性检查")
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    failed = False
+    if not args.skip_parity:
+        problems = check_parity()
+        if problems:
+            failed = True
+            for problem in problems:
+                print(f"❌ {problem}")
+        else:
+            print(f"✅ 得分一致: {', '.join(SCORERS)} 与参考实现相同")
+
+    rows = []
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        print(f"⏱️ {n:,} 个商品 ...")
+        rows.append(measure(n, args.repeat))
+
+    regressions = []
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"❌ 未找到基线: {args.baseline} (先运行 --save-baseline)")
+            sys.exit(2)
+        regressions = compare(rows, json_codec.load(args.baseline), args.tolerance)
+
+    print()
+    print(format_results(rows, regressions))
+
+    result = {
+        "python": platform_module.python_version(),
+        "machine": f"{platform_module.system()} {platform_module.machine()}",
+        "results": rows,
+    }
+    if args.json:
+        json_codec.dump(result, args.json)
+        print(f"💾 结果已保存: {args.json}")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        json_codec.dump(result, args.baseline)
+        print(f"📌 基线已更新: {args.baseline}")
+
+    if regressions:
+        failed = True
+        print()
+        for r in regressions:
+            print(f"❌ 回归: {r['products']:,} 个商品 {r['phase']} {r['current']:,.0f}/s < 基线 {r['baseline']:,.0f}/s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+离线爬虫基准: 基于录制数据 (src/scrapers/recording.py) 测量解析/拦截性能，无需联网
+
+先录制一次 (需要真实站点):
+    SHOPPING_AGENT_RECORDING=record python main.py
+
+然后离线运行:
+    python benchmarks/scraper_replay.py                 # 拦截回调/解析函数直接回放录制的响应 (不启动浏览器)
+    python benchmarks/scraper_replay.py --browser       # 完整爬虫 + route_from_har 回放 (需要 playwright)
+    python benchmarks/scraper_replay.py --with-llm      # 额外回放京东 Markdown 的 LLM 提取 (需要 LLM 服务或本地模拟服务)
+
+每个目标在独立子进程中运行，报告 pages/s、items/s、回调 CPU 时间与峰值 RSS。
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.utils import json_codec
+
+RESULT_MARKER = "BENCH_RESULT "
+
+# 离线回放目标: 名称 -> 说明
+CALLBACK_TARGETS = {
+    "taobao:search": "淘宝搜索拦截 (_handle_search_response)",
+    "taobao:detail": "淘宝详情拦截 (_handle_detail_response)",
+    "vip:search": "唯品会商品列表接口拦截 (_handle_response)",
+}
+LLM_TARGETS = {
+    "jd:markdown": "京东 Markdown 商品提取 (extract_info_from_markdown)",
+}
+# 浏览器回放目标: registry 中的爬虫名称 -> 录制目录
+BROWSER_TARGETS = {
+    "taobao": "taobao",
+    "vip": "vip",
+    "jd_crawl4ai": "jd",
+    "zhihu": "zhihu",
+    "xhs": "xhs",
+    "bilibili": "bilibili",
+    "douyin": "douyin",
+}
+
+def peak_rss_mb():
+    """本进程的峰值常驻内存 (MB)；无法获取时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 1024 / 1024, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+# ---- 子进程中执行 ----
+def _replay_callbacks(target, repeat):
+    from src.scrapers import recording
+
+    platform, kind = target.split(":")
+    if target == "jd:markdown":
+        from src.llm_analyzer import extract_info_from_markdown
+        pages = []
+        page = 1
+        while (markdown := recording.load_markdown("jd", page)) is not None:
+            pages.append(markdown)
+            page += 1
+        calls = [lambda md=md: extract_info_from_markdown(md) for md in pages]
+
+        def count(results):
+            return sum(len(r or []) for r in results)
+    elif platform == "vip":
+        from src.scrapers.vip import VipScraper
+        scraper = VipScraper()
+        scraper.capture_templates = False
+        calls = [lambda r=r: scraper._handle_response(r) for r in recording.iter_payloads(platform, kind)]
+
+        def count(results):
+            return len(scraper.results)
+    else:
+        from src.scrapers.taobao import TaobaoScraper
+        responses = list(recording.iter_payloads(platform, kind))
+        scraper = TaobaoScraper()
+        scraper.capture_templates = False
+        if kind == "search":
+            calls = [lambda r=r: scraper._handle_search_response(r) for r in responses]
+
+            def count(results):
+                return len(scraper.global_products)
+        else:
+            calls = [lambda r=r: scraper._handle_detail_response(r) for r in responses]
+
+            def count(results):
+                return scraper.global_details["reviews"].stats()["total_seen"]
+
+    if not calls:
+        return {"error": "没有录制数据"}
+
+    pages = items = 0
+    cpu = 0.0
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            if target.startswith("taobao"):
+                scraper.global_products = []
+                scraper.global_details = {"reviews": scraper._new_reservoir(), "itemProps": []}
+            elif target.startswith("vip"):
+                scraper.results = []
+                scraper._seen_pids = set()
+            results = []
+            for call in calls:
+                t0 = time.thread_time()
+                results.append(call())
+                cpu += time.thread_time() - t0
+            pages += len(calls)
+            items += count(results)
+    wall = time.perf_counter() - start
+    return {"pages": pages, "items": items, "wall": wall, "callback_cpu": cpu}
+
+def _replay_browser(name):
+    from src.scrapers import registry, recording
+    from src.utils.tracing import Tracer
+
+    meta = recording.load_meta(BROWSER_TARGETS[name])
+    if not meta.get("keyword"):
+        return {"error": f"没有录制数据 ({recording.platform_dir(BROWSER_TARGETS[name])})"}
+    spec = registry.get_spec(name)
+    kwargs = {"max_pages": meta["max_pages"]} if meta.get("max_pages") else {}
+
+    tracer = Tracer(f"bench-{name}")
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    with tracer.activate():
+        scraper = spec.create()
+        if spec.is_async:
+            import asyncio
+            products = asyncio.run(scraper.search(meta["keyword"], **kwargs))
+        else:
+            products = scraper.search(meta["keyword"], **kwargs)
+    wall = time.perf_counter() - start
+    summary = tracer.summary()
+    pages = sum(r["count"] for r in summary if r["cat"] == "scraper" and r["name"].startswith("page"))
+    callback_ms = sum(r["self_ms"] for r in summary if r["cat"] in ("intercept", "parse"))
+    return {
+        "pages": pages or 1,
+        "items": len(products or []),
+        "wall": wall,
+        "cpu": time.process_time() - cpu_start,
+        "callback_cpu": callback_ms / 1000,
+    }
+
+def _worker(target, repeat, browser):
+    try:
+        result = _replay_browser(target) if browser else _replay_callbacks(target, repeat)
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    result["target"] = target
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(RESULT_MARKER + json_codec.dumps(result, pretty=False))
+
+# ---- 主进程 ----
+def run_target(target, repeat, browser, recordings_dir=None):
+    env = dict(os.environ)
+    if browser:
+        env["SHOPPING_AGENT_RECORDING"] = "replay"
+    if recordings_dir:
+        env["SHOPPING_AGENT_RECORDINGS_DIR"] = recordings_dir
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", target, "--repeat", str(repeat)]
+    if browser:
+        cmd.append("--browser")
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json_codec.loads(line[len(RESULT_MARKER):])
+    tail = (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]
+    return {"target": target, "error": tail}
+
+def format_results(results):
+    lines = [f"{'目标':<16} {'pages':>7} {'items':>8} {'pages/s':>10} {'items/s':>10} {'回调CPU ms':>11} {'峰值RSS MB':>11}"]
+    for r in results:
+        if r.get("error"):
+            lines.append(f"{r['target']:<16} ⚠️ {r['error']}")
+            continue
+        wall = r["wall"] or 1e-9
+        lines.append(
+            f"{r['target']:<16} {r['pages']:>7} {r['items']:>8} {r['pages'] / wall:>10.1f} {r['items'] / wall:>10.1f} "
+            f"{r['callback_cpu'] * 1000:>11.1f} {r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>11}"
+        )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="基于录制数据的离线爬虫基准")
+    parser.add_argument("targets", nargs="*", help="只运行指定目标 (默认全部)")
+    parser.add_argument("--browser", action="store_true", help="启动浏览器并通过 HAR 回放运行完整爬虫")
+    parser.add_argument("--with-llm", action="store_true", help="包含需要 LLM 的目标 (京东 Markdown 提取)")
+    parser.add_argument("--repeat", type=int, default=5, help="离线回放的重复次数")
+    parser.add_argument("--dir", help="录制目录 (默认 config.yaml 中的 recording.dir)")
+    parser.add_argument("--json", help="结果另存为 JSON 文件，便于前后对比")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.repeat, args.browser)
+        return
+
+    if args.browser:
+        available = list(BROWSER_TARGETS)
+    else:
+        available = list(CALLBACK_TARGETS) + (list(LLM_TARGETS) if args.with_llm else [])
+    targets = args.targets or available
+
+    results = []
+    for target in targets:
+        print(f"⏱️ 正在回放 {target} ...")
+        results.append(run_target(target, args.repeat, args.browser, args.dir))
+
+    print()
+    print(format_results(results))
+    if args.json:
+        json_codec.dump(results, args.json)
+        print(f"💾 结果已保存: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import sys
+import argparse
 import webbrowser
 import os
 from src.agent import ShoppingAgent
 from src.config_loader import CONFIG
+from src.utils import profiling
 
 def main():
+    parser = argparse.ArgumentParser(description="AI Shopping Agent 命令行模式")
+    profiling.add_arguments(parser)
+    profiling.apply_arguments(parser.parse_args())
+
     print("="*50)
     print(f"🛒 {CONFIG.get('app', {}).get('name', 'AI Shopping Agent')} - 全流程启动")
     print("="*50)
@@ -69,6 +75,7 @@ def main():
     
     if not products:
         print("❌ 抓取失败，未生成搜索结果。")
+        agent.save_trace()
         return
 
     # 4. 第二阶段：智能初筛
@@ -79,6 +86,7 @@ def main():
     
     if not top_candidates:
         print("❌ 初筛未选中任何商品，流程终止。")
+        agent.save_trace()
         return
 
     # 5. 第三阶段：深度采集
@@ -95,15 +103,16 @@ def main():
 
     # 7. 清理临时文件
     agent.cleanup()
+    agent.save_trace()
 
     print("\n" + "="*50)
     print("🎉 全流程执行完毕！")
-    print("👉 最终报告已生成: data/final_report.html")
+    print(f"👉 最终报告已生成: {agent.workspace.report_html_path}")
     
     # 交互式打开报告
     open_choice = input("🌐 是否立即在浏览器中打开报告? (y/n): ").strip().lower()
     if open_choice == 'y':
-        report_path = os.path.abspath("data/final_report.html")
+        report_path = os.path.abspath(agent.workspace.report_html_path)
         print(f"🚀 正在打开: {report_path}")
         webbrowser.open(f"file://{report_path}")
     
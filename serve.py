@@ -0,0 +1,16 @@
+import sys
+import argparse
+from src.service.server import serve
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Shopping Agent 服务模式 (HTTP API + 任务队列)")
+    parser.add_argument("--host", default=None, help="监听地址 (默认读取 service.host)")
+    parser.add_argument("--port", type=int, default=None, help="监听端口 (默认读取 service.port)")
+    parser.add_argument("--workers", type=int, default=None, help="工作线程数 (默认读取 service.workers)")
+    args = parser.parse_args()
+    serve(host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    main()
@@ -1,49 +1,80 @@
 import os
-import shutil
-import json
+import sys
+import time
 import asyncio
-from src.scrapers.taobao import TaobaoScraper
-from src.scrapers.jd_gui import JDScraper # ✅ 视觉 OCR 爬虫
-from src.scrapers.jd_crawl4ai import JDCrawl4AIScraper # ✅ AI 增强版爬虫
-from src.scrapers.vip import VipScraper
-from src.scrapers.zhihu import ZhihuScraper
+from contextlib import nullcontext, contextmanager
+from src.scrapers import registry # 爬虫按需导入，避免启动时加载 playwright/crawl4ai/pyautogui
 from src.analysis.scorer import SmartScorer
 from src.llm_analyzer import filter_products, analyze_products, ask_clarifying_questions
 from src.config_loader import CONFIG
-from src.report_engine import ReportEngine # ✅ 新增报告引擎
+from src.report_engine import ReportEngine, CrawlDashboard # ✅ 新增报告引擎
+from src.storage.catalog import get_catalog
+from src.storage.workspace import Workspace
+from src.utils.pools import get_browser_pool
+from src.utils.interaction import HumanInterventionRequired, is_interactive
+from src.utils import json_codec, profiling, metrics
+from src.utils.tracing import Tracer, span
 
 class ShoppingAgent:
-    def __init__(self):
+    def __init__(self, session_id=None, run_id=None, workspace=None):
         self.config = CONFIG
+        # 多用户服务时区分用户画像，None 使用默认画像
+        self.session_id = session_id
+        # 每次运行独立的工作区 (data/runs/<run_id>/)，并发会话互不干扰
+        self.workspace = workspace or Workspace(run_id)
         self.products = []
         self.top_candidates = []
-        self.reporter = ReportEngine() # ✅ 初始化报告引擎
+        self.reporter = ReportEngine(output_dir=self.workspace.dir) # ✅ 初始化报告引擎
+        # 各阶段耗时追踪，运行结束后由 save_trace() 写入 <工作区>/trace.json
+        self.tracer = Tracer(self.run_id) if self.config.get("tracing", {}).get("enabled", True) else None
+        # 按阶段剖析 (--profile / SHOPPING_AGENT_PROFILE)，产物写入 <工作区>/profile/
+        self.profiler = profiling.for_workspace(self.workspace)
+
+    @property
+    def run_id(self):
+        return self.workspace.run_id
 
     def clean_data(self):
-        """清理旧数据，为新任务做准备"""
-        print("🧹 正在清理旧数据...")
-        if os.path.exists("data"):
-            for filename in os.listdir("data"):
-                file_path = os.path.join("data", filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"⚠️ 删除 {file_path} 失败: {e}")
-        else:
-            os.makedirs("data")
-        
-        os.makedirs("data/details", exist_ok=True)
+        """清理本次运行工作区中的旧数据，为新任务做准备 (不影响其他会话)"""
+        print(f"🧹 正在清理旧数据 (运行 {self.run_id})...")
+        self.workspace.clean()
         print("✅ 数据清理完成")
 
+    @contextmanager
+    def _stage(self, name, **args):
+        """在当前线程激活本次运行的 Tracer 并记录一个阶段；该阶段被选中剖析时同时运行剖析器"""
+        start = time.perf_counter()
+        try:
+            with self.tracer.span(name, "stage", **args) if self.tracer else nullcontext():
+                with self.profiler.stage(name) if self.profiler else nullcontext():
+                    yield
+        except Exception:
+            metrics.STAGE_ERRORS.labels(name).inc()
+            raise
+        finally:
+            metrics.STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+    def save_trace(self, print_summary=None):
+        """
+        导出本次运行的 Chrome trace (chrome://tracing / Perfetto 可直接打开) 并打印耗时汇总表
+        :return: trace 文件路径 (未开启追踪时返回 None)
+        """
+        if not self.tracer:
+            return None
+        tracing_cfg = self.config.get("tracing", {})
+        path = self.tracer.save(self.workspace.path("trace.json"))
+        if print_summary if print_summary is not None else tracing_cfg.get("print_summary", True):
+            print(f"\n⏱️ 耗时汇总 (运行 {self.run_id})")
+            print(self.tracer.format_summary(limit=tracing_cfg.get("summary_rows", 20)))
+            print(f"📈 完整追踪已保存: {path}")
+        return path
+
     def ask_clarifying_questions(self, keyword):
-        return ask_clarifying_questions(keyword)
+        with self._stage("clarify"):
+            return ask_clarifying_questions(keyword)
 
     def search(self, keyword, max_pages=None, platform_choice="1"):
         """同步入口 (兼容旧代码)"""
-        import sys
         # 修复 Windows 下 Playwright 的 NotImplementedError
         if sys.platform == 'win32':
             asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
@@ -52,57 +83,18 @@ class ShoppingAgent:
 
     async def search_async(self, keyword, max_pages=None, platform_choice="1"):
         """异步搜索核心逻辑"""
+        with self._stage("search", keyword=keyword, platform_choice=platform_choice):
+            return await self._search(keyword, max_pages, platform_choice)
+
+    async def _search(self, keyword, max_pages, platform_choice):
         if max_pages is None:
             max_pages = self.config["crawler"]["max_pages"]
         
         self.products = []
         refined_keyword = keyword 
 
-        tasks = []
-
-        # 淘宝 (目前仍为同步，放入线程池或直接调用)
-        if platform_choice == "2" or platform_choice == "4":
-            print("\n📦 正在启动淘宝抓取...")
-            # 简单的同步调用包装
-            try:
-                taobao_scraper = TaobaoScraper()
-                # 注意：这里如果是耗时操作，建议用 run_in_executor，但为了简单先直接调用
-                tb_products = taobao_scraper.search(keyword=refined_keyword, max_pages=max_pages)
-                self.products.extend(tb_products)
-            except Exception as e:
-                print(f"⚠️ 淘宝抓取失败: {e}")
-
-        # 唯品会
-        if platform_choice == "3" or platform_choice == "4":
-            print("\n🛍️ 正在启动唯品会抓取...")
-            try:
-                vip_scraper = VipScraper()
-                vip_products = vip_scraper.search(keyword=refined_keyword, max_pages=max_pages)
-                self.products.extend(vip_products)
-            except Exception as e:
-                print(f"⚠️ 唯品会抓取失败: {e}")
-
-        # 京东 (默认或全选) - 切换为 Crawl4AI 异步版
-        if platform_choice == "1" or platform_choice == "4" or platform_choice == "5" or (platform_choice not in ["2", "3", "4", "5", "6"]):
-            print("\n🤖 正在启动京东 AI 增强版抓取 (Crawl4AI)...")
-            try:
-                ai_scraper = JDCrawl4AIScraper()
-                # 直接 await 异步方法
-                jd_products = await ai_scraper.search(keyword=refined_keyword, max_pages=max_pages)
-                self.products.extend(jd_products)
-            except Exception as e:
-                print(f"⚠️ 京东 AI 抓取失败: {e}")
-
-        # 京东 OCR 版
-        if platform_choice == "6":
-            print("\n📸 正在启动京东视觉 OCR 抓取 (PaddleOCR)...")
-            try:
-                # OCR 爬虫目前是同步的，直接调用
-                ocr_scraper = JDScraper()
-                jd_products = ocr_scraper.search(keyword=refined_keyword, max_pages=max_pages)
-                self.products.extend(jd_products)
-            except Exception as e:
-                print(f"⚠️ OCR 抓取失败: {e}")
+        with self._live_dashboard():
+            await self._run_scrapers(refined_keyword, max_pages, platform_choice)
         
         # 智能打分与排序
         if self.products:
@@ -114,20 +106,66 @@ class ShoppingAgent:
             self.reporter.print_cli_summary(self.products[:10])
             
             # 保存结果
-            output_file = "data/search_results.json"
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(self.products, f, ensure_ascii=False, indent=2)
+            with span("dump search_results", "io"):
+                json_codec.dump(self.products, self.workspace.search_results_path)
+
+            # 写入本地商品目录 (跨运行保留价格/销量历史)
+            self._record_to_catalog(refined_keyword)
         
         return self.products
 
+    async def _run_scrapers(self, refined_keyword, max_pages, platform_choice):
+        """按平台选择执行爬虫，结果追加到 self.products (每个爬虫占用一个浏览器槽位)"""
+        browsers = get_browser_pool()
+
+        for spec in registry.scrapers_for_choice(platform_choice):
+            print(f"\n{spec.start_message}")
+            try:
+                with browsers.slot():
+                    # 首次选中该平台时才导入对应的爬虫模块
+                    with span(f"load {spec.name}", "import"):
+                        scraper = spec.create()
+                    if spec.is_async:
+                        products = await scraper.search(keyword=refined_keyword, max_pages=max_pages)
+                    else:
+                        products = scraper.search(keyword=refined_keyword, max_pages=max_pages)
+                self.products.extend(products)
+            except HumanInterventionRequired:
+                raise
+            except Exception as e:
+                print(f"⚠️ {spec.label}抓取失败: {e}")
+
+    def _live_dashboard(self):
+        """终端实时看板 (ui.live_dashboard 开启、输出到终端且非无人值守任务时生效)"""
+        if self.config.get("ui", {}).get("live_dashboard", False) and sys.stdout.isatty() and is_interactive():
+            return CrawlDashboard()
+        return nullcontext()
+
+    def _record_to_catalog(self, keyword):
+        try:
+            with span("catalog upsert", "io", products=len(self.products)):
+                new_count = get_catalog().upsert_products(self.products, keyword=keyword)
+            print(f"🗂️ 已写入商品目录: {len(self.products)} 条快照，其中新商品 {new_count} 个")
+        except Exception as e:
+            print(f"⚠️ 写入商品目录失败: {e}")
+
     def filter_products(self, detailed_requirements, top_n=None):
         if top_n is None:
             top_n = self.config["filter"]["top_n"]
             
-        self.top_candidates = filter_products(detailed_requirements, top_n=top_n)
+        # 直接传递内存中的搜索结果，无需重新读取 search_results.json
+        with self._stage("filter", top_n=top_n):
+            self.top_candidates = filter_products(detailed_requirements, top_n=top_n, products=self.products or None,
+                                                  session_id=self.session_id, workspace=self.workspace)
         return self.top_candidates
 
     def get_details(self):
+        with self._stage("details", candidates=len(self.top_candidates)):
+            self._get_details()
+
+    def _get_details(self):
+        store = self.workspace.detail_store()
+
         # 分离不同平台的商品
         tb_candidates = [p for p in self.top_candidates if p.get('platform') not in ['JD', 'Vipshop']]
         other_candidates = [p for p in self.top_candidates if p.get('platform') in ['JD', 'Vipshop']]
@@ -135,39 +173,41 @@ class ShoppingAgent:
         if tb_candidates:
             print(f"📦 正在采集 {len(tb_candidates)} 个淘宝商品详情...")
             try:
-                taobao_scraper = TaobaoScraper()
-                taobao_scraper.get_details(tb_candidates)
+                with get_browser_pool().slot():
+                    taobao_scraper = registry.create("taobao")
+                    taobao_scraper.get_details(tb_candidates, store=store)
+            except HumanInterventionRequired:
+                raise
             except Exception as e:
                 print(f"⚠️ 淘宝详情采集失败: {e}")
             
         if other_candidates:
             print(f"✨ 其他平台商品 ({len(other_candidates)} 个) 已在搜索阶段获取了足够信息，跳过深度采集。")
-            os.makedirs("data/details", exist_ok=True)
+            records = []
             for item in other_candidates:
                 platform_name = "京东" if item.get('platform') == 'JD' else "唯品会"
-                detail_data = {
+                records.append({
                     "id": item['id'],
                     "title": item['title'],
                     "price": item['price'],
                     "shop": item['shop'],
+                    "platform": item.get('platform'),
+                    "link": item.get('link', ''),
                     "captured_reviews": [{"content": f"{platform_name}热度/销量: " + str(item.get('deal_count', '未知'))}], 
                     "captured_props": [{"name": "来源", "value": f"{platform_name}自营/品牌店"}]
-                }
-                with open(f"data/details/{item['id']}.json", "w", encoding="utf-8") as f:
-                    json.dump(detail_data, f, ensure_ascii=False, indent=2)
+                })
+            store.append_many(records)
 
     def analyze_products(self):
-        return analyze_products()
+        with self._stage("analyze"):
+            return analyze_products(all_products=self.products, session_id=self.session_id, workspace=self.workspace)
 
     def cleanup(self):
         """清理临时文件"""
         try:
-            if os.path.exists("data/details"):
-                shutil.rmtree("data/details")
-            if os.path.exists("data/search_results.json"):
-                os.remove("data/search_results.json")
-            if os.path.exists("data/top_candidates.json"):
-                os.remove("data/top_candidates.json")
+            for path in (self.workspace.details_path, self.workspace.search_results_path, self.workspace.top_candidates_path):
+                if os.path.exists(path):
+                    os.remove(path)
             print("✅ 临时文件已清理。")
         except Exception as e:
             print(f"⚠️ 清理失败: {e}")
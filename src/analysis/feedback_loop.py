@@ -1,11 +1,13 @@
 import json
 import os
-from src.llm_analyzer import get_llm_client
-from src.context.context_manager import ContextManager
+import copy
+from src.llm_analyzer import get_llm_client, chat_completion
+from src.context.context_manager import get_context_manager
 
 class FeedbackOptimizer:
-    def __init__(self):
-        self.ctx_mgr = ContextManager()
+    def __init__(self, session_id=None):
+        # 与分析阶段共用同一个画像服务，写入后缓存立即更新
+        self.ctx_mgr = get_context_manager(session_id)
         self.client = get_llm_client()
 
     def optimize(self, user_feedback):
@@ -14,7 +16,7 @@ class FeedbackOptimizer:
         """
         print("⚡ [Agent Lightning] 正在根据您的反馈优化 Agent 记忆...")
         
-        current_profile = self.ctx_mgr.profile
+        current_profile = copy.deepcopy(self.ctx_mgr.profile)
         
         prompt = f"""
         你是一个 Agent 优化师。你的目标是根据用户的反馈，更新用户的“购物偏好配置文件”。
@@ -44,7 +46,8 @@ class FeedbackOptimizer:
         
         try:
             model = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client, "feedback",
                 model=model,
                 messages=[
                     {"role": "system", "content": "你是一个负责优化 AI 行为配置的专家。只输出 JSON。"},
@@ -75,8 +78,7 @@ class FeedbackOptimizer:
             
             if changed:
                 # 保存回文件
-                with open(self.ctx_mgr.profile_path, 'w', encoding='utf-8') as f:
-                    json.dump(current_profile, f, ensure_ascii=False, indent=2)
+                self.ctx_mgr.save(current_profile)
                 print("   💾 用户画像已更新！下次搜索将更懂你。")
             else:
                 print("   ℹ️ 没有产生实质性的规则变更。")
@@ -0,0 +1,35 @@
+def _product_texts(product):
+    """商品中需要检查的文本：标题、店铺、规格参数、评论"""
+    yield product.get("title")
+    yield product.get("shop") or product.get("shop_name")
+    for spec in product.get("specs") or []:
+        yield spec
+    for comment in product.get("comments") or []:
+        yield comment
+    for review in product.get("captured_reviews") or []:
+        if isinstance(review, dict):
+            yield review.get("content") or review.get("rateContent")
+
+def screen_products(products, matcher, drop_blacklisted=False):
+    """
+    在调用 LLM 之前，用用户画像 (黑名单关键词 / 反感成分) 本地筛查商品
+    命中的商品会写入 profile_hits 字段，如 {"blacklist": ["微商"], "disliked": ["尼泊金酯"]}
+    :param matcher: ContextManager.get_matcher() 返回的 TermMatcher
+    :param drop_blacklisted: 为 True 时直接剔除命中黑名单的商品
+    :return: (保留的商品, 被剔除的商品)
+    """
+    if matcher is None or not len(matcher):
+        return list(products), []
+
+    kept, dropped = [], []
+    for p in products:
+        hits = matcher.scan(_product_texts(p))
+        if hits:
+            p["profile_hits"] = hits
+        else:
+            p.pop("profile_hits", None)
+        if drop_blacklisted and "blacklist" in hits:
+            dropped.append(p)
+        else:
+            kept.append(p)
+    return kept, dropped
@@ -1,33 +1,43 @@
 import math
 
+from src.utils.tracing import traced
+
+def parse_price(price_str):
+    """将各平台的价格字符串 (如 "¥1,299.00") 解析为浮点数，失败返回 0.0"""
+    if isinstance(price_str, (int, float)):
+        return float(price_str)
+    try:
+        # 移除常见货币符号和千分位
+        clean_str = str(price_str).replace('¥', '').replace('￥', '').replace(',', '').strip()
+        return float(clean_str)
+    except:
+        return 0.0
+
+def parse_sales(sales_str):
+    """将销量描述 (如 "2000+条评价"、"20万+") 解析为浮点数，失败返回 0.0"""
+    if isinstance(sales_str, (int, float)):
+        return float(sales_str)
+    try:
+        # 处理京东的 "2000+条评价" 或 "20万+"
+        s = str(sales_str).replace('条评价', '').replace('人付款', '').replace('+', '').strip()
+        if '万' in s:
+            return float(s.replace('万', '')) * 10000
+        return float(s)
+    except:
+        return 0.0
+
 class SmartScorer:
     def __init__(self, products):
         self.products = products
         self.stats = self._calculate_global_stats()
 
     def _parse_price(self, price_str):
-        if isinstance(price_str, (int, float)):
-            return float(price_str)
-        try:
-            # 移除常见货币符号和千分位
-            clean_str = str(price_str).replace('¥', '').replace('￥', '').replace(',', '').strip()
-            return float(clean_str)
-        except:
-            return 0.0
+        return parse_price(price_str)
 
     def _parse_sales(self, sales_str):
-        if isinstance(sales_str, (int, float)):
-            return float(sales_str)
-        try:
-            # 处理京东的 "2000+条评价" 或 "20万+"
-            s = str(sales_str).replace('条评价', '').replace('人付款', '').replace('+', '').strip()
-            if '万' in s:
-                return float(s.replace('万', '')) * 10000
-            return float(s)
-        except:
-            return 0.0
-
+        return parse_sales(sales_str)
 
+    @traced("SmartScorer.stats", "scoring")
     def _calculate_global_stats(self):
         prices = [self._parse_price(p.get('price', '0')) for p in self.products]
         sales = [self._parse_sales(p.get('deal_count', '0')) for p in self.products]
@@ -103,6 +113,7 @@ class SmartScorer:
         
         return round(final_score, 2)
 
+    @traced("SmartScorer.rank_products", "scoring")
     def rank_products(self):
         for p in self.products:
             p['smart_score'] = self.calculate_score(p)
@@ -1,6 +1,6 @@
 import os
 import base64
-from src.llm_analyzer import get_llm_client
+from src.llm_analyzer import get_llm_client, chat_completion
 
 class VisualDebugger:
     def __init__(self):
@@ -35,7 +35,8 @@ class VisualDebugger:
             
             print(f"   🧠 正在请求 AI ({model}) 分析截图内容...")
             
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client, "visual_debug",
                 model=model,
                 messages=[
                     {
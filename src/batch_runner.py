@@ -0,0 +1,226 @@
+import os
+import re
+import copy
+import time
+import hashlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from src.config_loader import CONFIG
+from src.pipeline import run_pipeline, platform_choice_for
+from src.utils import json_codec, metrics
+from src.utils.interaction import non_interactive, HumanInterventionRequired
+from src.utils.pools import configure_pools
+
+DEFAULT_SEARCH_CACHE_DIR = "cache/search"
+
+def _normalize_keyword(keyword):
+    return re.sub(r"\s+", " ", str(keyword).strip().casefold())
+
+class SearchCache:
+    """
+    批量任务之间共享的搜索结果缓存
+    - 相同 (关键词, 平台, 页数) 的搜索只执行一次；并发任务同时请求时，后来者等待正在进行的那次搜索 (in-flight 去重)
+    - 结果同时写入磁盘 (cache/search/)，崩溃后重跑或下一批任务在 ttl 内可直接复用
+    - 内存中的结果同样在 ttl 后过期 (ttl 为 0 时只在本次运行内共享)；空结果不缓存
+    """
+
+    def __init__(self, cache_dir=None, ttl_minutes=None):
+        batch_cfg = CONFIG.get("batch", {})
+        self.cache_dir = cache_dir or batch_cfg.get("search_cache_dir", DEFAULT_SEARCH_CACHE_DIR)
+        self.ttl = (ttl_minutes if ttl_minutes is not None else batch_cfg.get("search_cache_ttl_minutes", 60)) * 60
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (Future, 创建时间)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(keyword, platform_choice, max_pages):
+        return f"{_normalize_keyword(keyword)}|{platform_choice}|{max_pages}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+    def _load_disk(self, key):
+        path = self._path(key)
+        if self.ttl <= 0 or not os.path.exists(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            return None
+        try:
+            return json_codec.load(path)
+        except Exception:
+            return None
+
+    def _expired(self, entry):
+        future, created = entry
+        # 进行中的搜索总是复用
+        return future.done() and self.ttl > 0 and time.time() - created > self.ttl
+
+    def _drop(self, key, future):
+        """移除 key 对应的条目 (只在它仍是这次搜索时移除，不影响之后新建的条目)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] is future:
+                del self._entries[key]
+
+    def clear(self):
+        """清空已完成的缓存条目与磁盘缓存 (进行中的搜索不受影响)"""
+        with self._lock:
+            for key in [k for k, (future, _) in self._entries.items() if future.done()]:
+                del self._entries[key]
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def get_or_search(self, key, search_fn, force=False):
+        """
+        :param search_fn: 无参函数，返回商品列表
+        :param force: 忽略内存与磁盘中已有的结果重新搜索 (正在进行的同一搜索仍然复用)
+        :return: 商品列表的副本 (各任务会在自己的副本上打分/标记)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (self._expired(entry) or (force and entry[0].done())):
+                entry = None
+            owner = entry is None
+            if owner:
+                future = Future()
+                self._entries[key] = (future, time.time())
+                self.misses += 1
+            else:
+                future = entry[0]
+                self.hits += 1
+                metrics.cache_result("search", True)
+
+        if owner:
+            try:
+                if force and os.path.exists(self._path(key)):
+                    os.remove(self._path(key))
+                products = None if force else self._load_disk(key)
+                metrics.cache_result("search", products is not None)
+                if products is None:
+                    products = search_fn()
+                    if products:
+                        json_codec.dump(products, self._path(key), pretty=False)
+                future.set_result(products)
+                # 爬虫异常时返回空列表，空结果与失败一样不缓存 (正在等待的任务仍拿到本次结果)
+                if not products:
+                    self._drop(key, future)
+            except BaseException as e:
+                future.set_exception(e)
+                # 失败的搜索不缓存，下一个任务会重新尝试
+                self._drop(key, future)
+                raise
+        return copy.deepcopy(future.result())
+
+def load_specs(path):
+    """读取 JSONL 任务描述；没有 id 字段时按行号生成"""
+    specs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spec = json_codec.loads(line)
+            spec.setdefault("id", spec.get("job_id") or spec.get("request_id") or f"line-{line_no}")
+            specs.append(spec)
+    return specs
+
+def completed_ids(output_path):
+    """输出文件中已成功完成的任务 id (用于断点续跑)"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json_codec.loads(line)
+            except Exception:
+                # 崩溃时可能留下半行
+                continue
+            if record.get("status") == "done":
+                done.add(str(record.get("id")))
+    return done
+
+class BatchRunner:
+    """
+    无交互批量运行: 读取 JSONL 任务描述，并发执行完整流程，每个任务写一行结果
+    并发浏览器/LLM 调用受全局上限约束 (src.utils.pools)；已完成的任务在重跑时跳过
+    """
+
+    def __init__(self, output_path, concurrency=None, search_cache=None):
+        batch_cfg = CONFIG.get("batch", {})
+        self.output_path = output_path
+        self.concurrency = concurrency or batch_cfg.get("concurrency", 2)
+        self.search_cache = search_cache or SearchCache()
+        self._write_lock = threading.Lock()
+
+    def _write(self, record):
+        line = json_codec.dumpb(record, pretty=False) + b"\n"
+        with self._write_lock:
+            with open(self.output_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _run_one(self, spec):
+        job_id = str(spec["id"])
+        start = time.time()
+        record = {"id": job_id, "keyword": spec.get("keyword")}
+        try:
+            if not spec.get("keyword"):
+                raise ValueError("缺少 keyword")
+            with non_interactive():
+                result = run_pipeline(spec, search_cache=self.search_cache)
+            record["status"] = "failed" if result.get("error") else "done"
+            record["result"] = result
+            if result.get("error"):
+                record["error"] = result["error"]
+        except HumanInterventionRequired as e:
+            record.update(status="parked", error=str(e))
+        except Exception as e:
+            record.update(status="failed", error=f"{e}\n{traceback.format_exc()}")
+        record["elapsed"] = round(time.time() - start, 2)
+        self._write(record)
+        print(f"{'✅' if record['status'] == 'done' else '⚠️'} [{job_id}] {record['status']} ({record['elapsed']}s)")
+        return record
+
+    def run(self, specs):
+        """
+        :return: {"total", "skipped", "done", "failed", "parked"}
+        """
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        finished = completed_ids(self.output_path)
+        pending = [s for s in specs if str(s["id"]) not in finished]
+        summary = {"total": len(specs), "skipped": len(specs) - len(pending), "done": 0, "failed": 0, "parked": 0}
+        if summary["skipped"]:
+            print(f"⏭️ 跳过 {summary['skipped']} 个已完成的任务")
+
+        print(f"🚀 开始批量运行 {len(pending)} 个任务 (并发 {self.concurrency})")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for record in executor.map(self._run_one, pending):
+                summary[record["status"]] = summary.get(record["status"], 0) + 1
+
+        print(f"📊 批量运行结束: {summary}，搜索缓存命中 {self.search_cache.hits} 次")
+        return summary
+
+def run_batch(input_path, output_path, concurrency=None, max_browsers=None, max_llm_calls=None):
+    configure_pools(max_browsers=max_browsers, max_llm_calls=max_llm_calls)
+    specs = load_specs(input_path)
+    for spec in specs:
+        # 提前校验平台名称，写入结果时也能看到实际使用的选项
+        spec.setdefault("platform_choice", platform_choice_for(spec.get("platforms")))
+    metrics.install()
+    snapshots = metrics.SnapshotWriter().start()
+    try:
+        return BatchRunner(output_path, concurrency=concurrency).run(specs)
+    finally:
+        snapshots.stop()
@@ -1,19 +1,50 @@
-import json
 import os
+import re
+import copy
+import threading
+from src.utils import json_codec
+from src.utils.term_matcher import TermMatcher
+
+DEFAULT_PROFILE_PATH = "src/context/user_profile.json"
+# 多用户服务时，每个会话的画像单独保存 (首次写入前沿用默认画像)
+SESSION_PROFILE_DIR = "cache/profiles"
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _abs_path(path):
+    # 确保路径是绝对路径或相对于工作区的正确路径
+    return path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
 class ContextManager:
-    def __init__(self, profile_path="src/context/user_profile.json"):
-        # 确保路径是绝对路径或相对于工作区的正确路径
-        if not os.path.isabs(profile_path):
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            self.profile_path = os.path.join(base_dir, profile_path)
-        else:
-            self.profile_path = profile_path
-            
-        self.profile = self._load_profile()
-
-    def _load_profile(self):
-        if not os.path.exists(self.profile_path):
+    """
+    用户画像服务
+    - 解析后的画像与渲染好的 Prompt 片段缓存在内存中，文件 mtime 变化或显式 save/invalidate 时才重新加载
+    - 同一进程内通过 get_context_manager() 共享实例，FeedbackOptimizer 写入后分析阶段立即可见
+    """
+
+    def __init__(self, profile_path=DEFAULT_PROFILE_PATH, fallback_path=None):
+        self.profile_path = _abs_path(profile_path)
+        # 画像文件不存在时读取的底稿 (会话画像沿用默认画像)
+        self.fallback_path = _abs_path(fallback_path) if fallback_path else None
+        self._lock = threading.RLock()
+        self._profile = None
+        self._source_mtime = None
+        self._prompts = {}
+        self._matcher = None
+
+    def _source(self):
+        if self.fallback_path and not os.path.exists(self.profile_path):
+            return self.fallback_path
+        return self.profile_path
+
+    def _load_profile(self, path):
+        if not os.path.exists(path):
             # 默认配置
             return {
                 "shopping_constitution": [],
@@ -22,33 +53,109 @@ class ContextManager:
                 "disliked_ingredients": []
             }
         try:
-            with open(self.profile_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_codec.load(path)
         except Exception as e:
             print(f"⚠️ 加载用户配置文件失败: {e}")
             return {}
 
-    def get_critical_thinking_prompt(self):
+    def _ensure_fresh(self):
+        source = self._source()
+        mtime = _mtime(source)
+        if self._profile is None or mtime != self._source_mtime:
+            self._profile = self._load_profile(source)
+            self._source_mtime = mtime
+            self._prompts = {}
+            self._matcher = None
+
+    @property
+    def profile(self):
+        """当前画像 (只读视图；修改请复制后调用 save)"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._profile
+
+    def invalidate(self):
+        """丢弃缓存，下次访问时重新读取文件"""
+        with self._lock:
+            self._profile = None
+            self._prompts = {}
+            self._matcher = None
+
+    def save(self, profile):
+        """写回画像文件并刷新缓存"""
+        with self._lock:
+            # 用户画像需要人工阅读/编辑，始终使用缩进格式
+            json_codec.dump(profile, self.profile_path, pretty=True)
+            self._profile = copy.deepcopy(profile)
+            self._source_mtime = _mtime(self.profile_path)
+            self._prompts = {}
+            self._matcher = None
+
+    def get_critical_thinking_prompt(self, include_term_lists=True):
         """
         生成基于用户购物宪法的 Prompt 片段。
         这是 MineContext 理念的核心：主动注入用户上下文。
+        :param include_term_lists: 是否列出黑名单/避雷成分词表；
+            已由 get_matcher() 在本地标记命中时可关闭，只把命中结果交给 LLM
         """
-        constitution = self.profile.get("shopping_constitution", [])
-        blacklist = self.profile.get("blacklisted_keywords", [])
-        disliked = self.profile.get("disliked_ingredients", [])
-        
-        prompt = "\n\n=== 🛡️ 用户核心购物宪法 (User Context) ===\n"
-        prompt += "⚠️ 重要指令：你必须优先遵循以下用户设定的原则，这比通用标准更重要：\n"
-        
-        for rule in constitution:
-            prompt += f"- [原则] {rule}\n"
-            
-        if blacklist:
+        with self._lock:
+            self._ensure_fresh()
+            prompt = self._prompts.get(include_term_lists)
+            if prompt is None:
+                prompt = self._render_prompt(self._profile, include_term_lists)
+                self._prompts[include_term_lists] = prompt
+            return prompt
+
+    def get_matcher(self):
+        """由黑名单关键词 (blacklist) 与反感成分 (disliked) 编译的多模式匹配器，随画像一起缓存"""
+        with self._lock:
+            self._ensure_fresh()
+            if self._matcher is None:
+                terms = [(t, "blacklist") for t in self._profile.get("blacklisted_keywords", [])]
+                terms += [(t, "disliked") for t in self._profile.get("disliked_ingredients", [])]
+                self._matcher = TermMatcher(terms)
+            return self._matcher
+
+    def _render_prompt(self, profile, include_term_lists=True):
+        constitution = profile.get("shopping_constitution", [])
+        blacklist = profile.get("blacklisted_keywords", [])
+        disliked = profile.get("disliked_ingredients", [])
+
+        lines = [
+            "\n\n=== 🛡️ 用户核心购物宪法 (User Context) ===",
+            "⚠️ 重要指令：你必须优先遵循以下用户设定的原则，这比通用标准更重要：",
+        ]
+        lines.extend(f"- [原则] {rule}" for rule in constitution)
+        prompt = "\n".join(lines) + "\n"
+
+        if blacklist and include_term_lists:
             prompt += f"\n- [黑名单关键词] 如商品包含以下词汇，直接降级: {', '.join(blacklist)}"
-            
-        if disliked:
+
+        if disliked and include_term_lists:
             prompt += f"\n- [成分避雷] 用户反感以下成分，发现请高亮警告: {', '.join(disliked)}"
-            
+
         prompt += "\n==========================================\n"
-            
         return prompt
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_context_manager(session_id=None):
+    """
+    获取共享的画像服务实例
+    :param session_id: 为 None 时使用默认画像；否则使用该会话独立的画像文件
+    """
+    key = session_id or ""
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            if session_id:
+                safe_id = re.sub(r"[^\w\-]", "_", str(session_id))
+                manager = ContextManager(
+                    os.path.join(SESSION_PROFILE_DIR, f"{safe_id}.json"),
+                    fallback_path=DEFAULT_PROFILE_PATH,
+                )
+            else:
+                manager = ContextManager()
+            _managers[key] = manager
+        return manager
@@ -1,25 +1,39 @@
 import os
 import json
 import sys
+import time
 from openai import OpenAI
 from dotenv import load_dotenv
 
-# 尝试导入 ContextManager
+# 允许直接运行此脚本 (python src/llm_analyzer.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import json_codec
+from src.utils.events import emit
+from src.utils import metrics
+from src.utils.tracing import traced
+from src.utils.pools import get_llm_pool
+from src.config_loader import CONFIG
+from src.analysis.profile_screen import screen_products
+
+# 尝试导入画像服务
 try:
-    from src.context.context_manager import ContextManager
+    from src.context.context_manager import get_context_manager
 except ImportError:
-    # 如果直接运行此脚本，可能需要调整路径
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    try:
-        from src.context.context_manager import ContextManager
-    except ImportError:
-        print("⚠️ 无法导入 ContextManager，将使用默认配置")
-        ContextManager = None
+    print("⚠️ 无法导入 ContextManager，将使用默认配置")
+    get_context_manager = None
 
 # 加载环境变量
 load_dotenv()
 
-def get_llm_client():
+# 词表命中已在本地完成，Prompt 中只说明 profile_hits 字段的含义
+PROFILE_HITS_NOTE = (
+    "\n- [本地筛查] 商品的 profile_hits 字段是本地匹配到的用户画像命中："
+    "blacklist 为黑名单关键词 (直接降级)，disliked 为用户反感的成分 (请高亮警告)。"
+    "没有该字段的商品未命中任何词条。\n"
+)
+
+def create_llm_client():
     api_key = os.getenv("LLM_API_KEY")
     base_url = os.getenv("LLM_BASE_URL")
     
@@ -29,6 +43,37 @@ def get_llm_client():
     # 初始化客户端
     return OpenAI(api_key=api_key, base_url=base_url)
 
+def get_llm_client():
+    """进程内共享的客户端 (复用连接池)，并发上限见 pools.max_llm_calls"""
+    return get_llm_pool().client
+
+def chat_completion(client, stage, **kwargs):
+    """
+    统一的 LLM 调用入口 (受 pools.max_llm_calls 并发上限约束)：发出 llm_start / llm_end 事件 (耗时、Token 用量)，供 CLI 看板等订阅
+    :param stage: 调用所属阶段，如 "filter" / "analyze"
+    """
+    with get_llm_pool().slot():
+        emit("llm_start", stage=stage)
+        start = time.time()
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except Exception as e:
+            seconds = time.time() - start
+            metrics.LLM_SECONDS.labels(stage).observe(seconds)
+            metrics.LLM_ERRORS.labels(stage).inc()
+            emit("llm_end", stage=stage, seconds=seconds, prompt_tokens=0, completion_tokens=0, error=str(e))
+            raise
+    seconds = time.time() - start
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    metrics.LLM_SECONDS.labels(stage).observe(seconds)
+    metrics.LLM_TOKENS.labels(stage, "prompt").inc(prompt_tokens)
+    metrics.LLM_TOKENS.labels(stage, "completion").inc(completion_tokens)
+    emit("llm_end", stage=stage, seconds=seconds, prompt_tokens=prompt_tokens,
+         completion_tokens=completion_tokens, error=None)
+    return response
+
 def ask_clarifying_questions(product_name):
     """
     根据商品名称生成 3 个关键的澄清问题，以便更精准地筛选。
@@ -46,7 +91,8 @@ def ask_clarifying_questions(product_name):
     """
     
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "clarify",
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个专业的购物顾问。"},
@@ -61,23 +107,40 @@ def ask_clarifying_questions(product_name):
         print(f"⚠️ 生成问题失败: {e}")
         return []
 
-def filter_products(user_requirements, top_n=5):
+def _data_path(workspace, name):
+    """中间文件路径：有运行工作区时写入 data/runs/<run_id>/，否则沿用 data/ (命令行单独运行本模块时)"""
+    return workspace.path(name) if workspace is not None else os.path.join("data", name)
+
+def filter_products(user_requirements, top_n=5, products=None, session_id=None, workspace=None):
     """
     第一阶段：智能初筛
-    读取 search_results.json，根据用户需求筛选出 Top N
+    根据用户需求筛选出 Top N
+    :param products: 上一阶段内存中的搜索结果；为 None 时读取 search_results.json
+    :param session_id: 多用户服务时使用该会话的用户画像
+    :param workspace: 本次运行的工作区 (Workspace)，中间文件写入其中
     """
-    input_file = "data/search_results.json"
-    if not os.path.exists(input_file):
-        print(f"文件 {input_file} 不存在，请先运行爬虫抓取列表。")
-        return []
-
-    with open(input_file, "r", encoding="utf-8") as f:
-        products = json.load(f)
+    if products is None:
+        input_file = _data_path(workspace, "search_results.json")
+        if not os.path.exists(input_file):
+            print(f"文件 {input_file} 不存在，请先运行爬虫抓取列表。")
+            return []
+        products = json_codec.load(input_file)
 
     if not products:
         print("商品列表为空。")
         return []
 
+    # 本地筛查黑名单关键词/反感成分，只把命中结果交给 LLM
+    ctx_mgr = get_context_manager(session_id) if get_context_manager else None
+    if ctx_mgr:
+        drop_blacklisted = CONFIG.get("filter", {}).get("drop_blacklisted", True)
+        products, dropped = screen_products(products, ctx_mgr.get_matcher(), drop_blacklisted)
+        if dropped:
+            print(f"🚫 已剔除 {len(dropped)} 个命中黑名单关键词的商品")
+        if not products:
+            print("商品全部命中黑名单，没有可筛选的商品。")
+            return []
+
     print(f"正在对 {len(products)} 个商品进行初筛，需求：{user_requirements}，目标数量：{top_n}")
     
     client = get_llm_client()
@@ -86,19 +149,22 @@ def filter_products(user_requirements, top_n=5):
     # 简化数据以节省 Token
     products_summary = []
     for p in products[:100]: # 限制前 100 个，避免 token 溢出
-        products_summary.append({
+        summary = {
             "id": p.get("id"),
             "title": p.get("title"),
             "price": p.get("price"),
             "sales": p.get("deal_count"),
             "shop": p.get("shop")
-        })
+        }
+        if p.get("profile_hits"):
+            summary["profile_hits"] = p["profile_hits"]
+        products_summary.append(summary)
 
     # 获取用户上下文 (MineContext)
     user_context_prompt = ""
-    if ContextManager:
-        ctx_mgr = ContextManager()
-        user_context_prompt = ctx_mgr.get_critical_thinking_prompt()
+    if ctx_mgr:
+        # 共享实例，画像与 Prompt 片段已缓存；词表已在本地匹配，不再整体塞进 Prompt
+        user_context_prompt = ctx_mgr.get_critical_thinking_prompt(include_term_lists=False) + PROFILE_HITS_NOTE
 
     prompt = f"""
     {user_context_prompt}
@@ -125,7 +191,8 @@ def filter_products(user_requirements, top_n=5):
     """
 
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "filter",
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个只输出 JSON 的助手。"},
@@ -172,8 +239,7 @@ def filter_products(user_requirements, top_n=5):
             print(f"✅ 兜底选中 {len(top_products)} 个商品")
         # ---------------------
 
-        with open("data/top_candidates.json", "w", encoding="utf-8") as f:
-            json.dump(top_products, f, ensure_ascii=False, indent=2)
+        json_codec.dump(top_products, _data_path(workspace, "top_candidates.json"))
             
         print(f"初筛完成！选出 {len(top_products)} 个候选商品。")
         for p in top_products:
@@ -186,49 +252,36 @@ def filter_products(user_requirements, top_n=5):
         # 发生异常时也进行兜底
         print("🔄 异常兜底：按默认顺序选取前 5 个")
         top_products = products[:top_n]
-        with open("data/top_candidates.json", "w", encoding="utf-8") as f:
-            json.dump(top_products, f, ensure_ascii=False, indent=2)
+        json_codec.dump(top_products, _data_path(workspace, "top_candidates.json"))
         return top_products
 
-def analyze_products():
+def analyze_products(all_products=None, session_id=None, workspace=None):
     """
     第二阶段：深度分析
-    1. 调用 parser 解析 data/details/ 下的 HTML
+    1. 调用 parser 解析详情记录 (工作区内的 details.jsonl)
     2. 调用 LLM 生成最终报告
+    :param all_products: 全部搜索结果，用于报告中的商品对比表；为空时只展示候选商品
+    :param session_id: 多用户服务时使用该会话的用户画像
+    :param workspace: 本次运行的工作区 (Workspace)；为 None 时读写 data/
+    :return: HTML 报告路径，失败时返回 None
     """
     # 1. 先运行解析器
     print("正在解析详情页数据...")
     # 动态导入以避免循环依赖
     try:
-        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from product_parser import parse_all
-        # 注意：这里我们复用 product_parser.py，让它去解析 data/details 目录
-        products = parse_all(input_dir="data/details")
+        from src.product_parser import parse_all
+        # 详情记录中已包含商品链接和平台，无需再读取 top_candidates.json
+        products = parse_all(workspace=workspace)
     except ImportError as e:
         print(f"导入解析器失败: {e}")
         return
 
     if not products:
-        print("没有解析到详情数据，请检查 data/details/ 目录下是否有 JSON 文件。")
+        print(f"没有解析到详情数据，请检查 {_data_path(workspace, 'details.jsonl')} 是否存在。")
         return
 
-    # 加载原始链接信息
-    url_map = {}
-    if os.path.exists("data/top_candidates.json"):
-        with open("data/top_candidates.json", "r", encoding="utf-8") as f:
-            candidates = json.load(f)
-            for c in candidates:
-                url_map[str(c.get("id"))] = c.get("link")
-
-    # 将链接注入到解析后的数据中
-    for p in products:
-        # source_file 格式如 "123456.json"
-        p_id = p.get("source_file", "").replace(".json", "")
-        if p_id in url_map:
-            p["url"] = url_map[p_id]
-        else:
-            # 如果找不到，尝试构造默认链接
-            p["url"] = f"https://item.taobao.com/item.htm?id={p_id}"
+    # 注入历史价格走势 (来自本地商品目录)
+    attach_price_trends(products)
 
     client = get_llm_client()
     model = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
@@ -237,9 +290,11 @@ def analyze_products():
 
     # 获取用户上下文 (MineContext)
     user_context_prompt = ""
-    if ContextManager:
-        ctx_mgr = ContextManager()
-        user_context_prompt = ctx_mgr.get_critical_thinking_prompt()
+    if get_context_manager:
+        ctx_mgr = get_context_manager(session_id)
+        # 候选商品已由用户确认，这里只标记命中 (参数、评论中的避雷成分等)，不剔除
+        screen_products(products, ctx_mgr.get_matcher())
+        user_context_prompt = ctx_mgr.get_critical_thinking_prompt(include_term_lists=False) + PROFILE_HITS_NOTE
 
     # 构建 Prompt
     products_str = json.dumps(products, ensure_ascii=False, indent=2)
@@ -255,7 +310,7 @@ def analyze_products():
     请生成一份详细的购买决策报告，包含以下部分：
     
     ## 1. 候选商品概览
-    （列出这几个商品的基本信息，做一个简单的 Markdown 表格对比价格、销量、店铺。**重要：请在表格中的商品名称上加上超链接，格式为 [商品名](URL)**）
+    （列出这几个商品的基本信息，做一个简单的 Markdown 表格对比价格、销量、店铺。**重要：请在表格中的商品名称上加上超链接，格式为 [商品名](URL)**。如果商品带有 price_trend 字段，请在表格中增加一列“历史价格走势”并指出当前是否处于低位）
     
     ## 2. 深度点评
     （对每个商品进行点评，重点分析：
@@ -272,7 +327,8 @@ def analyze_products():
     """
 
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "analyze",
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个客观、犀利、不说废话的购物决策助手。"},
@@ -283,114 +339,50 @@ def analyze_products():
         report = response.choices[0].message.content
         
         # 保存报告
-        with open("data/final_report.md", "w", encoding="utf-8") as f:
+        report_md_path = _data_path(workspace, "final_report.md")
+        with open(report_md_path, "w", encoding="utf-8") as f:
             f.write(report)
             
         # 生成 HTML 报告
-        generate_html_report(report)
+        output_dir = workspace.dir if workspace is not None else "data"
+        report_html_path = generate_html_report(report, products=all_products or products, output_dir=output_dir)
             
         print("\n" + "="*30)
         print("最终购买报告生成成功！")
         print("="*30 + "\n")
         print(report)
         print("\n" + "="*30)
-        print("报告已保存至 data/final_report.md 和 data/final_report.html")
+        print(f"报告已保存至 {report_md_path} 和 {report_html_path}")
+        return report_html_path
 
     except Exception as e:
         print(f"调用大模型失败: {e}")
+        return None
+
+def attach_price_trends(products, days=30):
+    """为解析后的商品附加最近 N 天的价格走势，目录不可用时静默跳过"""
+    try:
+        from src.storage.catalog import get_catalog
+        catalog = get_catalog()
+    except Exception as e:
+        print(f"⚠️ 商品目录不可用，跳过价格走势: {e}")
+        return
 
-def generate_html_report(markdown_content):
+    for p in products:
+        trend = catalog.price_trend(p.get("platform", "Taobao"), p.get("id", ""), days=days)
+        if trend and trend["points"] > 1:
+            p["price_trend"] = (
+                f"近{days}天 {trend['points']} 次观测: 最低 ¥{trend['min']:.2f} / 最高 ¥{trend['max']:.2f} / "
+                f"当前 ¥{trend['last']:.2f} ({trend['change_pct']:+.1f}%)"
+            )
+
+@traced("generate_html_report", "report")
+def generate_html_report(markdown_content, products=None, output_dir="data"):
     """
-    将 Markdown 报告转换为美观的 HTML 页面
+    将 Markdown 报告渲染为自包含的 HTML 页面 (服务端渲染，可离线查看)
     """
-    html_template = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI 购物决策报告</title>
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max_width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background-color: #f9f9f9;
-        }
-        .container {
-            background-color: #fff;
-            padding: 40px;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        h1, h2, h3 {
-            color: #2c3e50;
-            border-bottom: 2px solid #eee;
-            padding-bottom: 10px;
-        }
-        h1 { text-align: center; border-bottom: none; color: #e67e22; }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-        }
-        th, td {
-            padding: 12px;
-            border: 1px solid #ddd;
-            text-align: left;
-        }
-        th {
-            background-color: #f2f2f2;
-            font-weight: bold;
-        }
-        tr:nth-child(even) { background-color: #f8f8f8; }
-        a {
-            color: #3498db;
-            text-decoration: none;
-        }
-        a:hover { text-decoration: underline; }
-        blockquote {
-            border-left: 4px solid #e67e22;
-            padding-left: 15px;
-            color: #7f8c8d;
-            background-color: #fff5e6;
-            padding: 10px;
-        }
-        .footer {
-            text-align: center;
-            margin-top: 40px;
-            font-size: 0.8em;
-            color: #7f8c8d;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🛒 AI 购物决策报告</h1>
-        <div id="content"></div>
-        <div class="footer">
-            Generated by AI Shopping Agent
-        </div>
-    </div>
-    <script>
-        const markdown = `MARKDOWN_PLACEHOLDER`;
-        document.getElementById('content').innerHTML = marked.parse(markdown);
-    </script>
-</body>
-</html>
-    """
-    
-    # Escape backticks in markdown content to avoid breaking JS string
-    safe_markdown = markdown_content.replace("`", "\\`").replace("${", "\\${")
-    
-    html_content = html_template.replace("MARKDOWN_PLACEHOLDER", safe_markdown)
-    
-    with open("data/final_report.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+    from src.report_engine import ReportEngine
+    return ReportEngine(output_dir=output_dir).render_report(markdown_content, products=products, filename="final_report.html")
 
 def analyze_trends(zhihu_data, original_keyword):
     """
@@ -426,7 +418,8 @@ def analyze_trends(zhihu_data, original_keyword):
     """
     
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "refine_keyword",
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个搜索优化专家。"},
@@ -468,7 +461,8 @@ def extract_info_from_markdown(markdown_text):
     
     try:
         print(f"   ...向 LLM 发送请求 (长度: {len(truncated_text)} chars)...")
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "extract",
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个数据提取专家，只输出 JSON。"},
@@ -520,7 +514,7 @@ if __name__ == "__main__":
             print("未知命令。用法: python src/llm_analyzer.py [filter <需求> | analyze]")
     else:
         print("1. 运行智能初筛 (Filter)")
-        print("2. 运行深度分析 (Analyze - 需先有 details HTML)")
+        print("2. 运行深度分析 (Analyze - 需先有 data/details.jsonl)")
         choice = input("请选择 (1/2): ").strip()
         
         if choice == "1":
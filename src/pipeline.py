@@ -0,0 +1,156 @@
+import os
+import threading
+
+from src.agent import ShoppingAgent
+from src.config_loader import CONFIG
+from src.storage.workspace import Workspace
+from src.utils import json_codec
+
+# 流水线阶段 (按顺序)；任务挂起后可从中断的阶段继续
+STAGES = ["search", "filter", "details", "analyze"]
+
+# 平台名称 -> main.py 中的平台选项
+PLATFORM_CHOICES = {
+    "jd": "1",
+    "taobao": "2",
+    "vip": "3",
+    "vipshop": "3",
+    "all": "4",
+    "jd_ai": "5",
+    "crawl4ai": "5",
+    "jd_ocr": "6",
+    "ocr": "6",
+}
+
+class JobCancelled(Exception):
+    pass
+
+class CancelToken:
+    """跨线程的取消标记，流水线在阶段之间检查"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+def platform_choice_for(platforms):
+    """
+    将平台名称 (如 ["jd", "taobao"]) 转换为平台选项
+    同时包含多个平台时使用全平台聚合 ("4")；已经是选项编号时原样返回
+    """
+    if not platforms:
+        return "1"
+    if isinstance(platforms, str):
+        platforms = [p for p in platforms.replace("+", ",").split(",") if p.strip()]
+    choices = set()
+    for name in platforms:
+        name = str(name).strip().lower()
+        choices.add(name if name in PLATFORM_CHOICES.values() else PLATFORM_CHOICES.get(name, "1"))
+    return choices.pop() if len(choices) == 1 else "4"
+
+def build_requirements(keyword, answers=None):
+    """把追问的回答拼接到关键词后面 (与 main.py 的交互逻辑一致)"""
+    requirements = keyword
+    if isinstance(answers, dict):
+        answers = answers.values()
+    for answer in answers or []:
+        if answer:
+            requirements += f" {answer}"
+    return requirements
+
+def _summary(products):
+    return [
+        {k: p.get(k) for k in ("id", "title", "price", "shop", "platform", "link", "smart_score", "profile_hits") if p.get(k) is not None}
+        for p in products
+    ]
+
+def run_pipeline(spec, workspace=None, session_id=None, cancel=None, on_stage=None, start_stage=None, search_cache=None,
+                 force=False):
+    """
+    无交互地运行完整流程: 搜索 -> 初筛 -> 详情采集 -> 分析报告
+    :param spec: {"keyword", "platforms" 或 "platform_choice", "max_pages", "top_n", "answers"}
+    :param workspace: 运行工作区；从中断处继续时传入原工作区
+    :param cancel: CancelToken，在阶段之间检查
+    :param on_stage: 回调 on_stage(stage, partial_result)，每个阶段完成后调用 (用于保存部分结果)
+    :param start_stage: 从指定阶段开始 (之前阶段的结果从工作区文件中读取)
+    :param search_cache: 多个任务共享的搜索缓存 (batch_runner.SearchCache)，相同关键词只搜索一次
+    :param force: 忽略搜索缓存中已有的结果重新抓取
+    :return: 结果 dict
+    """
+    cancel = cancel or CancelToken()
+    keyword = spec["keyword"]
+    platform_choice = spec.get("platform_choice") or platform_choice_for(spec.get("platforms"))
+    max_pages = spec.get("max_pages") or CONFIG["crawler"]["max_pages"]
+    top_n = spec.get("top_n") or CONFIG["filter"]["top_n"]
+    requirements = spec.get("requirements") or build_requirements(keyword, spec.get("answers"))
+
+    agent = ShoppingAgent(session_id=session_id, workspace=workspace or Workspace(spec.get("run_id")))
+    try:
+        result = {
+            "run_id": agent.run_id,
+            "keyword": keyword,
+            "requirements": requirements,
+            "platform_choice": platform_choice,
+            "stage": None,
+        }
+        if agent.profiler:
+            result["profile_dir"] = agent.profiler.output_dir
+        start = STAGES.index(start_stage) if start_stage else 0
+
+        def done(stage, **partial):
+            result.update(partial)
+            result["stage"] = stage
+            agent.workspace.touch()
+            if on_stage:
+                on_stage(stage, dict(result))
+
+        # 1. 搜索
+        cancel.check()
+        if start <= 0 and search_cache is not None:
+            key = search_cache.key(keyword, platform_choice, max_pages)
+            agent.products = search_cache.get_or_search(key, lambda: agent.search(keyword, max_pages, platform_choice),
+                                                        force=force)
+            json_codec.dump(agent.products, agent.workspace.search_results_path)
+        elif start <= 0:
+            agent.search(keyword, max_pages, platform_choice)
+        elif os.path.exists(agent.workspace.search_results_path):
+            agent.products = json_codec.load(agent.workspace.search_results_path)
+        if not agent.products:
+            result.update(stage="search", product_count=0, error="未找到相关商品")
+            return result
+        done("search", product_count=len(agent.products), top_products=_summary(agent.products[:10]))
+
+        # 2. 初筛
+        cancel.check()
+        if start <= 1:
+            agent.filter_products(requirements, top_n=top_n)
+        elif os.path.exists(agent.workspace.top_candidates_path):
+            agent.top_candidates = json_codec.load(agent.workspace.top_candidates_path)
+        if not agent.top_candidates:
+            result.update(stage="filter", error="初筛未选中任何商品")
+            return result
+        done("filter", candidates=_summary(agent.top_candidates))
+
+        # 3. 详情采集
+        cancel.check()
+        if start <= 2:
+            agent.get_details()
+        done("details")
+
+        # 4. 分析报告
+        cancel.check()
+        report_path = agent.analyze_products()
+        done("analyze", report_path=report_path)
+        return result
+    finally:
+        # 无人值守运行不打印汇总表，可用 python -m src.utils.tracing <trace.json> 查看
+        agent.save_trace(print_summary=False)
@@ -1,30 +1,51 @@
 import os
-import json
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-def parse_taobao_json(json_file_path):
+# 允许直接运行此脚本 (python src/product_parser.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage.detail_store import DetailStore
+from src.config_loader import CONFIG
+from src.utils import json_codec
+from src.utils.tracing import traced
+
+# 传给 LLM 的评论/参数数量上限，超出部分在解析阶段直接丢弃
+MAX_COMMENTS = 15
+MAX_SPECS = 20
+
+def parse_detail(data):
     """
-    解析新的 JSON 格式详情数据
+    解析单条详情记录 (dict)
     """
-    with open(json_file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
+    item_id = str(data.get("id", ""))
     parsed = {
+        "id": item_id,
         "title": data.get("title", "未知标题"),
         "price": data.get("price", "未知价格"),
         "shop_name": data.get("shop", "未知店铺"),
-        "source_file": os.path.basename(json_file_path),
+        "platform": data.get("platform") or "Taobao",
+        "url": data.get("link") or f"https://item.taobao.com/item.htm?id={item_id}",
         "comments": [],
         "specs": []
     }
 
-    # 提取评论
+    # 采集阶段统计的评论概况 (评分分布等)，覆盖全部评论而非仅保留的样本
+    review_stats = data.get("review_stats")
+    if review_stats:
+        parsed["review_stats"] = review_stats
+
+    # 提取评论 (达到上限即停止，深度采集的大量评论不会被完整遍历)
     raw_reviews = data.get("captured_reviews", [])
     for review in raw_reviews:
         # 尝试提取评论内容，结构可能多变
         content = review.get("rateContent") or review.get("content") or ""
         if content:
             parsed["comments"].append(content)
-    
+            if len(parsed["comments"]) >= MAX_COMMENTS:
+                break
+
     # 提取规格参数
     raw_props = data.get("captured_props", [])
     # props 可能是 list 或 dict
@@ -34,38 +55,97 @@ def parse_taobao_json(json_file_path):
             value = prop.get("value")
             if name and value:
                 parsed["specs"].append(f"{name}: {value}")
+                if len(parsed["specs"]) >= MAX_SPECS:
+                    break
     elif isinstance(raw_props, dict):
         for k, v in raw_props.items():
-             parsed["specs"].append(f"{k}: {v}")
+            parsed["specs"].append(f"{k}: {v}")
+            if len(parsed["specs"]) >= MAX_SPECS:
+                break
 
-    # 限制数量
-    parsed["comments"] = parsed["comments"][:15]
-    parsed["specs"] = parsed["specs"][:20]
-    
     return parsed
 
-def parse_all(input_dir="data/details"):
-    results = []
-    if not os.path.exists(input_dir):
-        print(f"目录 {input_dir} 不存在")
-        return []
-
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".json"):
-            path = os.path.join(input_dir, filename)
-            print(f"正在解析: {filename} ...")
-            try:
-                item_data = parse_taobao_json(path)
-                results.append(item_data)
-            except Exception as e:
-                print(f"解析失败 {filename}: {e}")
-    
-    # 保存解析结果
-    with open("data/parsed.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    
-    print(f"✅ 解析完成，共 {len(results)} 个商品，结果已保存至 data/parsed.json")
+def _parse_raw(raw):
+    """解析一行原始 JSON (模块级函数，便于进程池序列化)"""
+    try:
+        return parse_detail(json_codec.loads(raw))
+    except Exception as e:
+        print(f"解析失败: {e}")
+        return None
+
+def _parse_chunk(raws):
+    """批量解析，减少进程池的任务调度与序列化开销"""
+    return [parsed for parsed in map(_parse_raw, raws) if parsed]
+
+def parse_taobao_json(json_file_path):
+    """
+    解析单个 JSON 格式详情文件 (旧版 data/details/*.json)
+    """
+    return parse_detail(json_codec.load(json_file_path))
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_parsed(store=None, ids=None, workers=None, use_processes=None, chunk_size=32):
+    """
+    流式解析详情记录，逐条产出解析结果 (顺序与存储中的偏移一致)
+    :param workers: 并行度，<=1 时在当前线程解析；默认读取 parser.workers 配置
+    :param use_processes: 使用进程池而非线程池 (JSON 解码受 GIL 限制，大批量时进程池更快)
+    """
+    if store is None:
+        store = DetailStore()
+    parser_cfg = CONFIG.get("parser", {})
+    if workers is None:
+        workers = parser_cfg.get("workers", 0)
+    if use_processes is None:
+        use_processes = parser_cfg.get("use_processes", False)
+
+    raws = store.iter_raw(ids)
+    if not workers or workers <= 1:
+        for raw in raws:
+            parsed = _parse_raw(raw)
+            if parsed:
+                yield parsed
+        return
+
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    # 限制在途任务数量，避免一次性把整个存储读入内存
+    max_pending = workers * 2
+    with executor_cls(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunked(raws, chunk_size):
+            pending.append(executor.submit(_parse_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+@traced("parse_all", "parse")
+def parse_all(store=None, ids=None, output_file=None, workers=None, use_processes=None, workspace=None):
+    """
+    从详情存储中批量解析商品
+    :param store: DetailStore 实例，默认读取 workspace 中的详情记录，都未指定时读取 data/details.jsonl
+    :param ids: 只解析指定 id，None 表示全部
+    :param output_file: 需要落盘时指定路径 (如 data/parsed.json)，默认只返回内存中的列表
+    :param workspace: 本次运行的工作区 (Workspace)
+    """
+    if store is None and workspace is not None:
+        store = workspace.detail_store()
+    results = list(iter_parsed(store, ids, workers=workers, use_processes=use_processes))
+
+    if output_file:
+        json_codec.dump(results, output_file)
+        print(f"✅ 解析完成，共 {len(results)} 个商品，结果已保存至 {output_file}")
+    else:
+        print(f"✅ 解析完成，共 {len(results)} 个商品")
     return results
 
 if __name__ == "__main__":
-    parse_all()
+    parse_all(output_file="data/parsed.json")
@@ -1,13 +1,65 @@
 import os
-import json
+import html
+import time
+import threading
+from string import Template
+from functools import lru_cache
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.markdown import Markdown
+from rich.live import Live
+from rich.console import Group
+
+from src.utils.markdown_lite import render_markdown
+from src.utils import json_codec
+from src.analysis.scorer import parse_price, SmartScorer
+from src.utils.events import EVENTS
+from src.utils.tracing import traced
 
 console = Console()
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+# 模板中商品表格的插入位置，表格在此处逐批流式写入
+STREAM_MARKER = "<!-- PRODUCT_TABLE -->"
+# 每批写入的表格行数
+ROWS_PER_WRITE = 500
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """
+    读取并编译模板 (进程内只编译一次)
+    :return: (head, tail) 两段 Template，商品表格在两者之间流式写入
+    """
+    with open(os.path.join(TEMPLATE_DIR, name), "r", encoding="utf-8") as f:
+        text = f.read()
+    head, _, tail = text.partition(STREAM_MARKER)
+    return Template(head), Template(tail)
+
+# 内嵌商品数据的列顺序 (与 templates/report.html 中的脚本约定一致)
+PRODUCT_COLUMNS = ["title", "price", "price_num", "shop", "platform", "score", "link"]
+
+def _esc(value):
+    return html.escape(str(value if value is not None else ""))
+
+def _json_for_html(obj):
+    """紧凑 JSON，转义 < 以免数据中的 </script> 提前结束脚本块"""
+    return json_codec.dumps(obj, pretty=False).replace("<", "\\u003c")
+
+def _product_row(p):
+    if hasattr(p, 'dict'): p = p.dict()
+    score = p.get('smart_score')
+    return [
+        p.get('title', ''),
+        str(p.get('price', '')),
+        parse_price(p.get('price', 0)),
+        p.get('shop') or p.get('shop_name', ''),
+        p.get('platform', ''),
+        round(score, 2) if isinstance(score, (int, float)) else None,
+        p.get('link') or p.get('url') or '',
+    ]
+
 class ReportEngine:
     """
     报告生成引擎 (参考 BettaFish 的 ReportEngine)
@@ -51,74 +103,205 @@ class ReportEngine:
         
         console.print(table)
 
-    def generate_html_report(self, products, llm_analysis, filename="shopping_report.html"):
-        """生成包含图表和分析的 HTML 报告"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        # 简单的 HTML 模板
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>AI 购物分析报告 - {timestamp}</title>
-            <style>
-                body {{ font-family: sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px; }}
-                .header {{ text-align: center; border-bottom: 2px solid #eee; padding-bottom: 20px; }}
-                .analysis {{ background: #f9f9f9; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-                th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                tr:nth-child(even) {{ background-color: #f9f9f9; }}
-                .score {{ font-weight: bold; color: #e67e22; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🛒 AI 购物决策报告</h1>
-                <p>生成时间: {timestamp}</p>
-            </div>
-
-            <div class="analysis">
-                <h2>🧠 AI 深度点评</h2>
-                <div>{llm_analysis.replace(chr(10), '<br>')}</div>
-            </div>
-
-            <h2>📊 商品详细对比</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>商品</th>
-                        <th>价格</th>
-                        <th>店铺</th>
-                        <th>平台</th>
-                        <th>智能评分</th>
-                    </tr>
-                </thead>
-                <tbody>
+    @traced("ReportEngine.render_report", "report")
+    def render_report(self, markdown_content, products=None, filename="final_report.html", title="AI 购物决策报告"):
         """
-        
-        for p in products:
-            if hasattr(p, 'dict'): p = p.dict()
-            html += f"""
-                <tr>
-                    <td><a href="{p.get('link', '#')}" target="_blank">{p.get('title', '')}</a></td>
-                    <td>¥{p.get('price', 0)}</td>
-                    <td>{p.get('shop', '')}</td>
-                    <td>{p.get('platform', '')}</td>
-                    <td class="score">{p.get('smart_score', 0):.1f}</td>
-                </tr>
-            """
-            
-        html += """
-                </tbody>
-            </table>
-        </body>
-        </html>
+        统一的 HTML 报告渲染入口
+        - Markdown 在服务端渲染为 HTML，输出文件不依赖 CDN 脚本，可离线查看
+        - 商品对比表格逐批写入文件，不在内存中拼接整个页面
         """
-        
+        head, tail = load_template("report.html")
+        fields = {
+            "title": _esc(title),
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "analysis_html": render_markdown(markdown_content),
+        }
+
         filepath = os.path.join(self.output_dir, filename)
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(html)
-            
+            f.write(head.substitute(fields))
+            if products:
+                self._write_product_table(f, products)
+            f.write(tail.substitute(fields))
+
+        return filepath
+
+    def _write_product_table(self, f, products):
+        """
+        商品数据以紧凑 JSON (列名 + 行数组) 内嵌在页面中，由页面脚本做虚拟滚动、排序和筛选，
+        数千个商品也只渲染可见的几十行。JSON 按批次流式写入。
+        """
+        f.write("""
+        <h2>📊 商品详细对比</h2>
+        <div class="vt-toolbar">
+            <input id="vt-search" type="search" placeholder="🔍 按标题/店铺筛选...">
+            <select id="vt-platform"><option value="">全部平台</option></select>
+            <span class="vt-count" id="vt-count"></span>
+        </div>
+        <div class="vt-row vt-head">
+            <div data-sort="title">商品</div><div data-sort="price_num">价格</div><div data-sort="shop">店铺</div><div data-sort="platform">平台</div><div data-sort="score">智能评分</div>
+        </div>
+        <div class="vt-viewport" id="vt-viewport">
+            <div id="vt-spacer"></div>
+            <div class="vt-rows" id="vt-rows"></div>
+        </div>
+        <script type="application/json" id="product-data">""")
+        f.write('{"columns":' + _json_for_html(PRODUCT_COLUMNS) + ',"rows":[')
+        batch = []
+        first = True
+        for p in products:
+            batch.append(_product_row(p))
+            if len(batch) >= ROWS_PER_WRITE:
+                f.write(("" if first else ",") + _json_for_html(batch)[1:-1])
+                first = False
+                batch = []
+        if batch:
+            f.write(("" if first else ",") + _json_for_html(batch)[1:-1])
+        f.write("]}</script>\n")
+
+    def generate_html_report(self, products, llm_analysis, filename="shopping_report.html"):
+        """生成包含商品对比和分析的 HTML 报告"""
+        filepath = self.render_report(llm_analysis, products=products, filename=filename)
         console.print(f"[bold green]✅ 报告已生成: {filepath}[/bold green]")
         return filepath
+
+
+class CrawlDashboard:
+    """
+    抓取过程的终端实时看板 (订阅 src.utils.events 事件流)
+    展示各平台翻页进度、抓取速率、进行中的 LLM 调用、风控休眠/拦截状态，以及实时 Top 10。
+    刷新频率受 min_interval 限制，Top 10 仅在有新商品到达时重新打分，不拖慢抓取。
+
+    用法:
+        with CrawlDashboard():
+            ... # 抓取过程
+    """
+
+    def __init__(self, min_interval=0.25, top_n=10):
+        self.min_interval = min_interval
+        self.top_n = top_n
+        self._lock = threading.RLock()
+        self._live = None
+        self._unsubscribe = None
+        self._last_render = 0.0
+        self._start = time.time()
+        self._platforms = {}  # platform -> 状态
+        self._products = []
+        self._top = []
+        self._top_dirty = False
+        self._llm_in_flight = 0
+        self._llm_calls = 0
+        self._llm_tokens = 0
+
+    def __enter__(self):
+        self._start = time.time()
+        self._live = Live(self._render(), console=console, auto_refresh=False, transient=False)
+        self._live.__enter__()
+        self._unsubscribe = EVENTS.subscribe(self.on_event)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+        with self._lock:
+            self._live.update(self._render(), refresh=True)
+        self._live.__exit__(exc_type, exc, tb)
+        return False
+
+    def _platform(self, name):
+        state = self._platforms.get(name)
+        if state is None:
+            state = {"pages": 0, "max_pages": "?", "items": 0, "throttle": None, "blocked": 0, "status": "抓取中"}
+            self._platforms[name] = state
+        return state
+
+    def on_event(self, event, data):
+        with self._lock:
+            platform = data.get("platform")
+            if event == "crawl_start":
+                state = self._platform(platform)
+                state["max_pages"] = data.get("max_pages", "?")
+            elif event == "page_done":
+                state = self._platform(platform)
+                state["pages"] += 1
+                state["items"] += data.get("items", 0)
+                if data.get("error"):
+                    state["status"] = "本页失败"
+                new_products = data.get("products") or []
+                if new_products:
+                    self._products.extend(new_products)
+                    self._top_dirty = True
+            elif event == "throttle":
+                self._platform(platform)["throttle"] = data.get("seconds")
+            elif event == "blocked":
+                state = self._platform(platform)
+                state["blocked"] += 1
+                state["status"] = f"被拦截 ({data.get('reason', '')})"
+            elif event == "crawl_end":
+                self._platform(platform)["status"] = "完成"
+            elif event == "llm_start":
+                self._llm_in_flight += 1
+            elif event == "llm_end":
+                self._llm_in_flight = max(0, self._llm_in_flight - 1)
+                self._llm_calls += 1
+                self._llm_tokens += data.get("prompt_tokens", 0) + data.get("completion_tokens", 0)
+            else:
+                return
+            self._refresh()
+
+    def _refresh(self):
+        now = time.time()
+        if self._live is None or now - self._last_render < self.min_interval:
+            return
+        self._last_render = now
+        self._live.update(self._render(), refresh=True)
+
+    def _ranked_top(self):
+        if self._top_dirty and self._products:
+            # 在副本上打分，不修改爬虫返回的商品对象
+            ranked = SmartScorer([dict(p) for p in self._products]).rank_products()
+            self._top = ranked[:self.top_n]
+            self._top_dirty = False
+        return self._top
+
+    def _render(self):
+        elapsed = max(time.time() - self._start, 1e-6)
+
+        progress = Table(title="📡 抓取进度", show_header=True, header_style="bold magenta", expand=False)
+        progress.add_column("平台", style="yellow")
+        progress.add_column("页数", justify="right")
+        progress.add_column("商品数", justify="right", style="green")
+        progress.add_column("速率 (件/秒)", justify="right")
+        progress.add_column("上次休眠", justify="right")
+        progress.add_column("拦截", justify="right", style="red")
+        progress.add_column("状态")
+        for name, state in self._platforms.items():
+            throttle = state["throttle"]
+            progress.add_row(
+                str(name),
+                f"{state['pages']}/{state['max_pages']}",
+                str(state["items"]),
+                f"{state['items'] / elapsed:.1f}",
+                f"{throttle:.1f}s" if throttle else "-",
+                str(state["blocked"]),
+                state["status"],
+            )
+
+        summary = (f"⏱️ 已用时 {elapsed:.0f}s | 🧠 LLM 进行中 {self._llm_in_flight}，"
+                   f"已完成 {self._llm_calls} 次，Token {self._llm_tokens}")
+
+        top = Table(title=f"🏆 实时 Top {self.top_n}", show_header=True, header_style="bold cyan")
+        top.add_column("商品标题", width=40)
+        top.add_column("价格", justify="right", style="green")
+        top.add_column("平台", style="yellow")
+        top.add_column("评分", justify="right")
+        for p in self._ranked_top():
+            top.add_row(
+                str(p.get('title', ''))[:38],
+                f"¥{p.get('price', 0)}",
+                str(p.get('platform', '')),
+                f"{p.get('smart_score', 0):.1f}",
+            )
+
+        return Panel(Group(progress, summary, top), title="🛒 AI Shopping Agent", border_style="blue")
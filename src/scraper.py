@@ -1,10 +1,16 @@
 import os
 import time
 import random
-import json
 import re
 from playwright.sync_api import sync_playwright
 
+# 允许直接运行此脚本 (python src/scraper.py)
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage.detail_store import DetailStore
+from src.utils import json_codec
+from src.utils.review_reservoir import new_reservoir
+
 # 全局变量，确保数据不会丢失
 GLOBAL_PRODUCTS = []
 
@@ -150,8 +156,7 @@ def run_scraper(keyword=None, max_pages=None):
 
         # 保存结果
         output_file = "data/search_results.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(GLOBAL_PRODUCTS, f, ensure_ascii=False, indent=2)
+        json_codec.dump(GLOBAL_PRODUCTS, output_file)
             
         print(f"\n🎉 海量抓取结束！共收集 {len(GLOBAL_PRODUCTS)} 个商品信息。")
         print(f"📁 结果已保存至: {output_file}")
@@ -184,22 +189,22 @@ def handle_detail_response(response):
                 
                 # 尝试解析 JSON
                 try:
-                    data = json.loads(text)
+                    data = json_codec.loads(text)
                     
                     # 识别评论数据
                     if "rateList" in text or "rateDetail" in text:
                         # 找到当前页面的商品 ID (从 URL 或 Referer 中推断，这里简化处理，假设只有一个页面在活动)
                         # 更好的方式是把数据暂存，最后统一关联
-                        # 这里我们简单地把所有捕获到的 rateList 存起来
-                        if "rateList" not in GLOBAL_DETAILS:
-                            GLOBAL_DETAILS["rateList"] = []
+                        # 这里我们把所有捕获到的 rateList 精简后放入评论蓄水池 (内存上限固定)
+                        if "reviews" not in GLOBAL_DETAILS:
+                            GLOBAL_DETAILS["reviews"] = new_reservoir()
                         
                         # 提取评论列表
                         # 结构通常是 data -> rateDetail -> rateList
                         rate_list = data.get("data", {}).get("rateDetail", {}).get("rateList", [])
                         if rate_list:
                             print(f"   💬 捕获到 {len(rate_list)} 条评论数据")
-                            GLOBAL_DETAILS["rateList"].extend(rate_list)
+                            GLOBAL_DETAILS["reviews"].add_many(rate_list)
 
                     # 识别商品参数数据
                     if "item" in text and "props" in text:
@@ -229,15 +234,14 @@ def run_deep_scraper():
         print(f"❌ 文件 {input_file} 不存在，请先运行初筛。")
         return
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        candidates = json.load(f)
+    candidates = json_codec.load(input_file)
 
     if not candidates:
         print("⚠️ 候选列表为空。")
         return
 
     print(f"🚀 开始深度采集 {len(candidates)} 个精选商品 (网络拦截模式)...")
-    os.makedirs("data/details", exist_ok=True)
+    store = DetailStore()
 
     with sync_playwright() as p:
         browser = p.chromium.launch(
@@ -263,7 +267,7 @@ def run_deep_scraper():
 
         for i, item in enumerate(candidates):
             # 重置当前商品的抓取数据
-            GLOBAL_DETAILS = {"rateList": [], "itemProps": []}
+            GLOBAL_DETAILS = {"reviews": new_reservoir(), "itemProps": []}
             
             url = item['link']
             print(f"🔄 [{i+1}/{len(candidates)}] 正在深度抓取: {item['title'][:20]}...")
@@ -294,15 +298,14 @@ def run_deep_scraper():
                     "title": item['title'],
                     "price": item['price'],
                     "shop": item['shop'],
-                    "captured_reviews": GLOBAL_DETAILS.get("rateList", []),
-                    "captured_props": GLOBAL_DETAILS.get("itemProps", [])
+                    "link": url,
+                    "captured_reviews": GLOBAL_DETAILS["reviews"].items(),
+                    "captured_props": GLOBAL_DETAILS.get("itemProps", []),
+                    "review_stats": GLOBAL_DETAILS["reviews"].stats()
                 }
+                store.append(detail_data)
                 
-                file_name = f"data/details/{item['id']}.json"
-                with open(file_name, "w", encoding="utf-8") as f:
-                    json.dump(detail_data, f, ensure_ascii=False, indent=2)
-                
-                print(f"   ✅ 已保存详情数据: {file_name} (评论数: {len(detail_data['captured_reviews'])})")
+                print(f"   ✅ 已保存详情数据 (评论数: {len(detail_data['captured_reviews'])})")
                 
                 time.sleep(random.uniform(3, 5))
                 
@@ -2,6 +2,7 @@ import time
 import random
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.scrapers import recording
 
 class BilibiliScraper(BaseScraper):
     def search(self, keyword, max_count=10):
@@ -17,7 +18,8 @@ class BilibiliScraper(BaseScraper):
                 args=["--disable-blink-features=AutomationControlled"]
             )
             
-            context = browser.new_context(
+            context = recording.new_context(
+                browser, "bilibili", meta={"keyword": keyword},
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
             )
             
@@ -70,6 +72,7 @@ class BilibiliScraper(BaseScraper):
             except Exception as e:
                 print(f"   ⚠️ B站调研失败: {e}")
                 
+            context.close()
             browser.close()
             
         return results
@@ -2,6 +2,7 @@ import time
 import random
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.scrapers import recording
 
 class DouyinScraper(BaseScraper):
     def search(self, keyword, max_count=10):
@@ -22,7 +23,8 @@ class DouyinScraper(BaseScraper):
                 ]
             )
             
-            context = browser.new_context(
+            context = recording.new_context(
+                browser, "douyin", meta={"keyword": keyword},
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
                 viewport={"width": 1280, "height": 800}
             )
@@ -96,6 +98,7 @@ class DouyinScraper(BaseScraper):
             except Exception as e:
                 print(f"   ⚠️ 抖音调研失败: {e}")
                 
+            context.close()
             browser.close()
             
         return results
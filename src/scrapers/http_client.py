@@ -0,0 +1,104 @@
+"""
+爬虫共用的异步 HTTP 客户端 (直连接口模式)
+- 复用浏览器保存的登录状态 (Playwright storage_state，如 auth.json) 中的 Cookie
+- 一次搜索共用一个连接池，按并发上限与随机间隔发送请求
+- httpx 为可选依赖，未安装时 available() 返回 False，各爬虫退回浏览器模式
+"""
+import os
+import random
+import asyncio
+import threading
+import contextvars
+
+from src.utils import json_codec
+from src.utils.events import emit
+from src.utils.tracing import current_tracer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+def available():
+    return httpx is not None
+
+def load_cookies(storage_state_path, domain_suffix=""):
+    """
+    从 storage_state 文件读取 Cookie
+    :param domain_suffix: 只保留该域名下的 Cookie (如 "taobao.com")
+    :return: [(name, value, domain, path)]，文件不存在时为空列表
+    """
+    if not storage_state_path or not os.path.exists(storage_state_path):
+        return []
+    try:
+        state = json_codec.load(storage_state_path)
+    except Exception as e:
+        print(f"⚠️ 读取登录状态失败: {e}")
+        return []
+    cookies = []
+    for cookie in state.get("cookies", []):
+        domain = cookie.get("domain", "")
+        if domain_suffix and not domain.lstrip(".").endswith(domain_suffix):
+            continue
+        cookies.append((cookie.get("name", ""), cookie.get("value", ""), domain, cookie.get("path", "/")))
+    return cookies
+
+def new_client(cookies=(), headers=None, max_connections=4, timeout=15):
+    """创建带连接池的 httpx.AsyncClient (需在事件循环内使用并关闭)"""
+    jar = httpx.Cookies()
+    for name, value, domain, path in cookies:
+        jar.set(name, value, domain=domain, path=path or "/")
+    return httpx.AsyncClient(
+        cookies=jar,
+        headers={"user-agent": DEFAULT_USER_AGENT, **(headers or {})},
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=timeout,
+        follow_redirects=False,
+    )
+
+async def throttle(platform, delay):
+    """
+    请求前的随机间隔 (与浏览器模式一样发出 throttle 事件)
+    :param delay: (最小秒数, 最大秒数)，或单个秒数
+    """
+    low, high = delay if isinstance(delay, (list, tuple)) else (delay, delay)
+    seconds = random.uniform(low, high)
+    if seconds > 0:
+        emit("throttle", platform=platform, seconds=seconds)
+        await asyncio.sleep(seconds)
+
+def run_sync(coro):
+    """
+    在同步代码中运行协程
+    同步爬虫可能在 Agent 的事件循环内被直接调用，此时在独立线程中运行新的事件循环；
+    该线程沿用调用方的 contextvars 并激活同一个 Tracer，page_start / throttle 等事件仍记入追踪
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+    context = contextvars.copy_context()
+    tracer = current_tracer()
+
+    def run():
+        if tracer is None:
+            return asyncio.run(coro)
+        with tracer.activate():
+            return asyncio.run(coro)
+
+    def target():
+        try:
+            result["value"] = context.run(run)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, name="http-fetch", daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result.get("value")
@@ -7,6 +7,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+from src.utils.events import emit
+from src.utils.tracing import span
+from src.scrapers import recording
+from src.utils.interaction import require_human, HumanInterventionRequired
 try:
     from src.llm_analyzer import extract_info_from_markdown
 except ImportError:
@@ -24,8 +28,13 @@ class JDCrawl4AIScraper:
         return asyncio.run(self.search(keyword, max_pages))
 
     async def search(self, keyword, max_pages=1):
+        if recording.is_replay():
+            return await self._replay(keyword, max_pages)
+
         results = []
         print(f"🚀 [Crawl4AI] 启动智能搜索: {keyword}")
+        emit("crawl_start", platform="JD", max_pages=max_pages)
+        recording.save_meta("jd", keyword=keyword, max_pages=max_pages)
         
         # 1. 配置浏览器 (使用独立的用户数据目录，不影响日常使用)
         # 我们会创建一个新的目录，专门给爬虫用，但使用 Edge 内核
@@ -85,6 +94,7 @@ class JDCrawl4AIScraper:
                     jd_page_param = 2 * page - 1
                     url = f"https://search.jd.com/Search?keyword={keyword}&page={jd_page_param}"
                     
+                    emit("page_start", platform="JD", page=page)
                     print(f"   🔄 [第 {page} 页] AI 正在阅读页面...")
                     print("   ⏳ 如果弹出登录窗口，请在 60秒内 完成扫码登录...")
                     
@@ -111,16 +121,21 @@ class JDCrawl4AIScraper:
                             if is_login:
                                 print(f"   🚨 [第 {attempt+1}/{max_retries} 次检测] 似乎还在登录页或首页，请扫码/验证...")
                                 print("      (登录成功后，程序会自动跳转，无需手动操作)")
+                                # 无人值守时直接挂起任务，不在这里轮询等待
+                                require_human("JD", "login")
                                 await asyncio.sleep(5) # 等待用户操作
                             else:
                                 # 成功获取到内容
                                 break
+                        except HumanInterventionRequired:
+                            raise
                         except Exception as e:
                             print(f"   ⚠️ 尝试读取失败: {e}")
                             await asyncio.sleep(5)
                     
                     if result and result.success and not is_login:
                         print(f"   ✅ 页面读取成功 (长度: {len(result.markdown)} 字符)")
+                        recording.save_markdown("jd", page, result.markdown)
                         
                         # 如果页面太短，可能是被验证码拦截了
                         if len(result.markdown) < 5000:
@@ -130,7 +145,8 @@ class JDCrawl4AIScraper:
                         # --- 智能解析 (使用 LLM 提取数据) ---
                         print("   🧠 正在调用 DeepSeek/GPT 提取商品信息...")
                         # 使用 to_thread 避免阻塞异步循环
-                        items = await asyncio.to_thread(extract_info_from_markdown, result.markdown)
+                        with span("extract_markdown JD", "parse", chars=len(result.markdown)):
+                            items = await asyncio.to_thread(extract_info_from_markdown, result.markdown)
                         
                         print(f"   📄 本页提取到 {len(items)} 个商品")
                         
@@ -141,11 +157,15 @@ class JDCrawl4AIScraper:
                             print("   💾 页面 Markdown 已保存至 debug_jd_markdown.md")
 
                         results.extend(items)
+                        emit("page_done", platform="JD", page=page, items=len(items), products=items)
                         
                     else:
                         err_msg = result.error_message if result else "Unknown Error"
                         print(f"   ❌ 抓取失败: {err_msg}")
+                        emit("page_done", platform="JD", page=page, items=0, products=[], error=err_msg)
                 
+                except HumanInterventionRequired:
+                    raise
                 except Exception as e:
                     print(f"   ❌ 页面 {page} 处理发生严重错误: {e}")
                     continue # 继续下一页
@@ -153,4 +173,23 @@ class JDCrawl4AIScraper:
         print("   🛑 正在关闭爬虫浏览器...")
         # async with 块结束时会自动关闭浏览器，这里只是打印状态
         
+        emit("crawl_end", platform="JD", total=len(results))
+        return results
+
+    async def _replay(self, keyword, max_pages):
+        """回放录制的页面 Markdown (不启动浏览器)，商品提取流程与在线抓取一致"""
+        results = []
+        print(f"📼 [Crawl4AI] 回放录制数据: {keyword}")
+        emit("crawl_start", platform="JD", max_pages=max_pages)
+        for page in range(1, max_pages + 1):
+            markdown = recording.load_markdown("jd", page)
+            if markdown is None:
+                print(f"   ⚠️ 没有第 {page} 页的录制数据，回放结束")
+                break
+            emit("page_start", platform="JD", page=page)
+            with span("extract_markdown JD", "parse", chars=len(markdown)):
+                items = await asyncio.to_thread(extract_info_from_markdown, markdown)
+            results.extend(items)
+            emit("page_done", platform="JD", page=page, items=len(items), products=items)
+        emit("crawl_end", platform="JD", total=len(results))
         return results
@@ -5,6 +5,7 @@ import random
 import urllib.parse
 import os
 from src.utils.ocr_adapter import OCRAdapter
+from src.utils.events import emit
 
 class JDScraper:
     def __init__(self):
@@ -17,6 +18,7 @@ class JDScraper:
     def search(self, keyword, max_pages=3):
         results = []
         print(f"🚀 [京东] 启动搜索 (视觉 OCR 模式): {keyword}")
+        emit("crawl_start", platform="JD (OCR)", max_pages=max_pages)
         print("⚠️  请注意：程序将接管您的鼠标和键盘，请不要触碰！")
         print("👉 请在 5 秒内切换到 Edge 浏览器窗口，并保持最大化...")
         
@@ -78,6 +80,7 @@ class JDScraper:
                 print(f"   📄 本页提取到 {len(page_products)} 个商品 (OCR)")
                 
                 results.extend(page_products)
+                emit("page_done", platform="JD (OCR)", page=page_num, items=len(page_products), products=page_products)
 
                 # 清理截图
                 if os.path.exists(screenshot_path):
@@ -87,6 +90,7 @@ class JDScraper:
                 if page_num < max_pages:
                     sleep_time = random.uniform(2, 4)
                     print(f"   💤 休息 {sleep_time:.1f} 秒...")
+                    emit("throttle", platform="JD (OCR)", seconds=sleep_time)
                     time.sleep(sleep_time)
 
         except pyautogui.FailSafeException:
@@ -94,6 +98,7 @@ class JDScraper:
         except Exception as e:
             print(f"   ❌ 发生错误: {e}")
             
+        emit("crawl_end", platform="JD (OCR)", total=len(results))
         return results
 
     def get_details(self, item_id):
@@ -0,0 +1,205 @@
+"""
+抓取录制/回放
+- record: 浏览器上下文录制 HAR，拦截到的 JSON 和京东页面 Markdown 另存一份，便于离线解析
+- replay: 浏览器请求全部由 HAR 应答 (route_from_har)，不访问真实站点；京东 AI 版直接读取录制的 Markdown
+  接口请求带有每次都不同的参数 (淘宝 mtop 的 t/sign/callback、唯品会的 _)，按去掉这些参数后的 URL 匹配录制的响应
+录制文件位于 recordings/<平台>/，回放时关键词与页数需与录制时一致 (见 <名称>.json)
+模式由环境变量 SHOPPING_AGENT_RECORDING 或 config.yaml 的 recording.mode 决定 (off / record / replay)
+"""
+import os
+import time
+import base64
+import itertools
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from src.config_loader import CONFIG
+from src.utils import json_codec
+
+DEFAULT_RECORDINGS_DIR = "recordings"
+ENV_MODE = "SHOPPING_AGENT_RECORDING"
+ENV_DIR = "SHOPPING_AGENT_RECORDINGS_DIR"
+# 每次请求都不同的查询参数 (时间戳、签名、jsonp 回调名)，回放时匹配 URL 忽略这些参数
+VOLATILE_PARAMS = {"t", "sign", "_", "callback"}
+# 回放的响应体已解码，不能再带原始的编码/长度头
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+def _config():
+    return CONFIG.get("recording", {})
+
+def recording_mode():
+    return (os.getenv(ENV_MODE) or _config().get("mode") or "off").lower()
+
+def is_recording():
+    return recording_mode() == "record"
+
+def is_replay():
+    return recording_mode() == "replay"
+
+def platform_dir(platform):
+    root = os.getenv(ENV_DIR) or _config().get("dir", DEFAULT_RECORDINGS_DIR)
+    return os.path.join(root, platform)
+
+def har_path(platform, name="search"):
+    return os.path.join(platform_dir(platform), f"{name}.har")
+
+def new_context(browser, platform, name="search", meta=None, **context_args):
+    """
+    所有爬虫共用的浏览器上下文创建入口
+    录制模式下写入 HAR (需在关闭浏览器前调用 context.close() 才会落盘)；回放模式下由 HAR 应答所有请求
+    :param meta: 录制时一并保存的参数 (如 keyword/max_pages)，回放与基准测试据此复现同样的请求
+    """
+    mode = recording_mode()
+    path = har_path(platform, name)
+    if mode == "record":
+        os.makedirs(platform_dir(platform), exist_ok=True)
+        context_args["record_har_path"] = path
+        # 重新录制时覆盖上次拦截到的数据
+        if os.path.exists(payloads_path(platform, name)):
+            os.remove(payloads_path(platform, name))
+        save_meta(platform, name, **(meta or {}))
+        print(f"🎙️ [录制] {platform}/{name} -> {path}")
+
+    context = browser.new_context(**context_args)
+
+    if mode == "replay":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"未找到录制文件: {path} (请先以 {ENV_MODE}=record 运行一次)")
+        # 未录制的请求直接中断，保证回放过程不访问网络
+        context.route_from_har(path, not_found="abort")
+        # 后注册的路由先执行: 先按去掉易变参数的 URL 匹配，匹配不到再交给 route_from_har
+        context.route("**/*", HarReplayer(path).handle)
+        print(f"📼 [回放] {platform}/{name} <- {path}")
+    return context
+
+def normalize_url(url):
+    """去掉易变参数并排序其余参数，作为回放匹配的键"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+class HarReplayer:
+    """
+    按 (方法, 规范化 URL) 索引 HAR 中的响应；同一个键录制了多次时按录制顺序轮流返回
+    jsonp 响应会把回调名替换为本次请求的 callback 参数，页面脚本可以正常执行
+    """
+
+    def __init__(self, har_file):
+        self.har_dir = os.path.dirname(har_file)
+        self._entries = {}
+        for entry in json_codec.load(har_file).get("log", {}).get("entries", []):
+            request = entry.get("request", {})
+            key = (request.get("method", "GET"), normalize_url(request.get("url", "")))
+            self._entries.setdefault(key, []).append(entry["response"])
+        self._cycles = {key: itertools.cycle(responses) for key, responses in self._entries.items()}
+
+    def _body(self, content):
+        if content.get("_file"):
+            with open(os.path.join(self.har_dir, content["_file"]), "rb") as f:
+                return f.read()
+        text = content.get("text") or ""
+        return base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+
+    def lookup(self, method, url):
+        """:return: (status, headers, body)，没有录制时返回 None"""
+        cycle = self._cycles.get((method, normalize_url(url)))
+        if cycle is None:
+            return None
+        response = next(cycle)
+        headers = {h["name"]: h["value"] for h in response.get("headers", []) if h["name"].lower() not in _DROP_HEADERS}
+        body = self._body(response.get("content", {}))
+        callback = dict(parse_qsl(urlsplit(url).query)).get("callback")
+        if callback:
+            prefix, paren, rest = body.partition(b"(")
+            if paren and prefix.strip() and b"{" not in prefix:
+                body = callback.encode("utf-8") + paren + rest
+        return response.get("status", 200), headers, body
+
+    def handle(self, route):
+        request = route.request
+        found = self.lookup(request.method, request.url)
+        if found is None:
+            route.fallback()
+            return
+        status, headers, body = found
+        route.fulfill(status=status, headers=headers, body=body)
+
+def payloads_path(platform, kind="search"):
+    return os.path.join(platform_dir(platform), f"{kind}.payloads.jsonl")
+
+def save_meta(platform, name="search", **meta):
+    """录制模式下保存本次录制的参数"""
+    if not is_recording():
+        return
+    os.makedirs(platform_dir(platform), exist_ok=True)
+    meta["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+    json_codec.dump(meta, os.path.join(platform_dir(platform), f"{name}.json"))
+
+def load_meta(platform, name="search"):
+    path = os.path.join(platform_dir(platform), f"{name}.json")
+    return json_codec.load(path) if os.path.exists(path) else {}
+
+def pause(seconds):
+    """防风控休眠；回放时没有风控，直接跳过"""
+    if not is_replay():
+        time.sleep(seconds)
+
+# ---- 拦截到的 JSON (离线解析基准使用) ----
+def capture_payload(platform, kind, response, text):
+    """录制模式下保存拦截回调读到的响应内容 (每行一个 JSON)"""
+    if not is_recording():
+        return
+    record = {
+        "url": response.url,
+        "resource_type": response.request.resource_type,
+        "content_type": response.headers.get("content-type", ""),
+        "text": text,
+    }
+    os.makedirs(platform_dir(platform), exist_ok=True)
+    with open(payloads_path(platform, kind), "ab") as f:
+        f.write(json_codec.dumpb(record, pretty=False) + b"\n")
+
+class _RecordedRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+class RecordedResponse:
+    """与 Playwright Response 接口一致的最小实现，可直接传给拦截回调"""
+
+    def __init__(self, record):
+        self.url = record.get("url", "")
+        self.headers = {"content-type": record.get("content_type", "")}
+        self.request = _RecordedRequest(record.get("resource_type", "xhr"))
+        self._text = record.get("text", "")
+
+    def text(self):
+        return self._text
+
+def iter_payloads(platform, kind="search"):
+    path = payloads_path(platform, kind)
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield RecordedResponse(json_codec.loads(line))
+
+# ---- 京东 AI 版: 页面 Markdown ----
+def markdown_path(platform, page):
+    return os.path.join(platform_dir(platform), "pages", f"page-{page}.md")
+
+def save_markdown(platform, page, markdown):
+    if not is_recording():
+        return
+    path = markdown_path(platform, page)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(markdown)
+
+def load_markdown(platform, page):
+    """回放时读取录制的页面 Markdown，没有该页时返回 None"""
+    path = markdown_path(platform, page)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
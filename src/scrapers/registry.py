@@ -0,0 +1,88 @@
+import time
+import importlib
+import threading
+
+class ScraperSpec:
+    """
+    爬虫注册信息：只记录模块路径，首次使用时才导入
+    (jd_gui 会拉起 pyautogui/pyperclip 且需要图形界面，jd_crawl4ai 依赖 crawl4ai，其余依赖 playwright)
+    """
+
+    def __init__(self, name, module, class_name, label, capabilities=("search",), is_async=False, start_message=""):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.label = label
+        self.capabilities = frozenset(capabilities)
+        self.is_async = is_async
+        self.start_message = start_message
+        self._cls = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._cls is not None
+
+    def load(self):
+        """导入爬虫模块并返回爬虫类 (只导入一次，并记录耗时)"""
+        if self._cls is None:
+            with self._lock:
+                if self._cls is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.module)
+                    self._cls = getattr(module, self.class_name)
+                    self.load_seconds = time.perf_counter() - start
+        return self._cls
+
+    def create(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def supports(self, capability):
+        return capability in self.capabilities
+
+SCRAPERS = {}
+
+def register(name, module, class_name, label, capabilities=("search",), is_async=False, start_message=""):
+    SCRAPERS[name] = ScraperSpec(name, module, class_name, label, capabilities, is_async, start_message)
+    return SCRAPERS[name]
+
+register("taobao", "src.scrapers.taobao", "TaobaoScraper", "淘宝",
+         capabilities=("search", "details"), start_message="📦 正在启动淘宝抓取...")
+register("vip", "src.scrapers.vip", "VipScraper", "唯品会",
+         start_message="🛍️ 正在启动唯品会抓取...")
+register("jd_crawl4ai", "src.scrapers.jd_crawl4ai", "JDCrawl4AIScraper", "京东 AI",
+         is_async=True, start_message="🤖 正在启动京东 AI 增强版抓取 (Crawl4AI)...")
+register("jd_ocr", "src.scrapers.jd_gui", "JDScraper", "OCR",
+         start_message="📸 正在启动京东视觉 OCR 抓取 (PaddleOCR)...")
+# 内容平台爬虫用于趋势调研，不参与商品搜索
+register("zhihu", "src.scrapers.zhihu", "ZhihuScraper", "知乎", capabilities=("research",))
+register("xhs", "src.scrapers.xhs", "XiaohongshuScraper", "小红书", capabilities=("research",))
+register("bilibili", "src.scrapers.bilibili", "BilibiliScraper", "Bilibili", capabilities=("research",))
+register("douyin", "src.scrapers.douyin", "DouyinScraper", "抖音", capabilities=("research",))
+
+# 平台选项 (main.py / app.py 菜单) -> 依次执行的爬虫
+PLATFORM_SCRAPERS = {
+    "1": ["jd_crawl4ai"],
+    "2": ["taobao"],
+    "3": ["vip"],
+    "4": ["taobao", "vip", "jd_crawl4ai"],
+    "5": ["jd_crawl4ai"],
+    "6": ["jd_ocr"],
+}
+
+def get_spec(name):
+    try:
+        return SCRAPERS[name]
+    except KeyError:
+        raise ValueError(f"未知的爬虫: {name} (可选: {', '.join(SCRAPERS)})")
+
+def create(name, *args, **kwargs):
+    return get_spec(name).create(*args, **kwargs)
+
+def available(capability=None):
+    return [spec for spec in SCRAPERS.values() if capability is None or spec.supports(capability)]
+
+def scrapers_for_choice(platform_choice):
+    """未知选项默认使用京东 AI 增强版 (与原先的行为一致)"""
+    return [get_spec(name) for name in PLATFORM_SCRAPERS.get(platform_choice, ["jd_crawl4ai"])]
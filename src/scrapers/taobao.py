@@ -1,18 +1,36 @@
 import os
 import time
 import random
-import json
 import re
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.config_loader import CONFIG
+from src.storage.catalog import get_catalog, catalog_key, list_fingerprint, merge_reviews
+from src.storage.detail_store import DetailStore
+from src.utils import json_codec
+from src.utils.review_reservoir import new_reservoir
+from src.utils.events import emit
+from src.utils.tracing import traced
+from src.utils import metrics
+from src.scrapers import recording, taobao_api
+from src.utils.interaction import require_human, HumanInterventionRequired
+
+# 拦截回调是热路径，预先绑定标签
+_SEARCH_RESPONSES = metrics.INTERCEPTED.labels("Taobao", "search")
+_DETAIL_RESPONSES = metrics.INTERCEPTED.labels("Taobao", "detail")
 
 class TaobaoScraper(BaseScraper):
     def __init__(self):
         self.global_products = []
         self.global_details = {}
         self.keyword = "" # Store keyword for filtering
+        self._template_saved = False
+        # 离线回放拦截回调时关闭 (录制的响应没有请求头，也不能覆盖真实的请求模板)
+        self.capture_templates = True
 
+    @traced("intercept Taobao search", "intercept")
     def _handle_search_response(self, response):
+        _SEARCH_RESPONSES.inc()
         # 放宽拦截条件：只要是 API 请求或者包含 search 关键字
         resource_type = response.request.resource_type
         if resource_type in ["xhr", "fetch", "script"]:
@@ -20,104 +38,124 @@ class TaobaoScraper(BaseScraper):
                 content_type = response.headers.get("content-type", "")
                 if "json" in content_type or "javascript" in content_type:
                     text = response.text()
-                    
-                    # 尝试解析 mtopjsonp
-                    if text.strip().startswith("mtopjsonp") or text.strip().startswith("jsonp"):
-                        match = re.search(r'\((.*)\)', text)
-                        if match:
-                            text = match.group(1)
+                    recording.capture_payload("taobao", "search", response, text)
+                    if "suggest" in response.url: return
+
+                    before = len(self.global_products)
+                    parsed_json = self._ingest_search_payload(text)
+                    # 记录能解析出商品的搜索接口请求，供直连模式复用
+                    if self.capture_templates and len(self.global_products) > before and not self._template_saved \
+                            and taobao_api.is_search_api(response.url) and not recording.is_replay():
+                        taobao_api.capture_template(response.request)
+                        self._template_saved = True
+                    if parsed_json:
+                        print(f"   ✅ 通过 API 拦截解析了 {parsed_json} 个商品")
+            except Exception:
+                pass
 
-                    if '"raw_title"' in text or '"view_price"' in text or '"title":' in text:
-                        if "suggest" in response.url: return 
+    def _ingest_search_payload(self, text):
+        """
+        解析搜索接口返回的内容 (JSON / jsonp)，商品追加到 global_products
+        :return: 通过 JSON 结构解析出的新增商品数 (回退到正则提取时为 0)
+        """
+        # 尝试解析 mtopjsonp
+        if text.strip().startswith("mtopjsonp") or text.strip().startswith("jsonp"):
+            match = re.search(r'\((.*)\)', text)
+            if match:
+                text = match.group(1)
 
-                        # print(f"   ⚡ 捕获到疑似商品数据: {response.url[:60]}...")
-                        
-                        # 尝试直接 JSON 解析 (更准确)
-                        try:
-                            data = json.loads(text)
-                            # 淘宝 API 结构多变，尝试几种常见路径
-                            # 1. mods.itemlist.data.auctions
-                            itemlist = data.get("mods", {}).get("itemlist", {}).get("data", {}).get("auctions", [])
-                            if not itemlist:
-                                # 2. itemsArray
-                                itemlist = data.get("itemsArray", [])
-                            
-                            if itemlist:
-                                count = 0
-                                seen_ids = set(p['id'] for p in self.global_products)
-                                for item in itemlist:
-                                    nid = item.get("nid") or item.get("item_id")
-                                    if not nid or nid in seen_ids: continue
-                                    
-                                    title = item.get("raw_title") or item.get("title", "")
-                                    price = item.get("view_price") or item.get("price", "0")
-                                    sales = item.get("view_sales") or item.get("sold", "0")
-                                    link = item.get("detail_url") or item.get("url", "")
-                                    
-                                    # 移除严格的关键词过滤，信任淘宝的搜索结果
-                                    # if self.keyword[:1] not in title: continue
-                                    
-                                    # 识别天猫
-                                    shop_name = item.get("nick", "淘宝店铺")
-                                    is_tmall = False
-                                    if "旗舰店" in shop_name or "专卖店" in shop_name or item.get("user_type") == "1": # user_type 1 通常是天猫
-                                        is_tmall = True
-                                        shop_name = "🔴 [天猫] " + shop_name
-                                    
-                                    self.global_products.append({
-                                        "id": nid,
-                                        "title": title,
-                                        "price": price,
-                                        "link": link if link.startswith("http") else "https:" + link,
-                                        "shop": shop_name,
-                                        "deal_count": sales,
-                                        "platform": "Tmall" if is_tmall else "Taobao"
-                                    })
-                                    seen_ids.add(nid)
-                                    count += 1
-                                if count > 0:
-                                    print(f"   ✅ 通过 API 拦截解析了 {count} 个商品")
-                                    return
-                        except:
-                            pass
+        if not ('"raw_title"' in text or '"view_price"' in text or '"title":' in text):
+            return 0
 
-                        # 如果 JSON 解析失败，回退到正则提取
-                        titles = re.findall(r'"raw_title":"([^"]+)"', text)
-                        if not titles:
-                            titles = re.findall(r'"title":"([^"]+)"', text)
-                        
-                        prices = re.findall(r'"view_price":"([^"]+)"', text)
-                        nids = re.findall(r'"nid":"([^"]+)"', text)
-                        sales = re.findall(r'"view_sales":"([^"]+)"', text)
-                        shops = re.findall(r'"nick":"([^"]+)"', text)
-
-                        if titles and len(titles) > 0:
-                            # print(f"   ✅ 成功提取到 {len(titles)} 条记录")
-                            for i in range(len(titles)):
-                                price = prices[i] if i < len(prices) else "未知"
-                                nid = nids[i] if i < len(nids) else ""
-                                sale = sales[i] if i < len(sales) else "0"
-                                shop = shops[i] if i < len(shops) else "未知店铺"
-                                title = titles[i]
-
-                                # 简单过滤：标题必须包含关键词的一部分 (避免完全不相关的推荐)
-                                # 如果关键词很长，取前两个字
-                                # filter_key = self.keyword[:2] if len(self.keyword) >= 2 else self.keyword
-                                # if filter_key and filter_key not in title:
-                                #    continue
-
-                                if nid and not any(p['id'] == nid for p in self.global_products):
-                                    self.global_products.append({
-                                        "id": nid,
-                                        "title": title,
-                                        "price": price,
-                                        "link": f"https://item.taobao.com/item.htm?id={nid}",
-                                        "shop": shop,
-                                        "deal_count": sale
-                                    })
+        # 尝试直接 JSON 解析 (更准确)
+        try:
+            data = json_codec.loads(text)
+            # 淘宝 API 结构多变，尝试几种常见路径
+            # 1. mods.itemlist.data.auctions
+            itemlist = data.get("mods", {}).get("itemlist", {}).get("data", {}).get("auctions", [])
+            if not itemlist:
+                # 2. itemsArray
+                itemlist = data.get("itemsArray", [])
+            if not itemlist:
+                # 3. mtop 接口: data.itemsArray
+                itemlist = (data.get("data") or {}).get("itemsArray", [])
+
+            if itemlist:
+                count = 0
+                seen_ids = set(p['id'] for p in self.global_products)
+                for item in itemlist:
+                    nid = item.get("nid") or item.get("item_id")
+                    if not nid or nid in seen_ids: continue
 
-            except Exception:
-                pass
+                    title = item.get("raw_title") or item.get("title", "")
+                    # mtop 接口的标题带有关键词高亮标签
+                    if "<" in title:
+                        title = re.sub(r"<[^>]+>", "", title)
+                    price = item.get("view_price") or item.get("price", "0")
+                    sales = item.get("view_sales") or item.get("sold") or item.get("realSales", "0")
+                    link = item.get("detail_url") or item.get("url") or item.get("auctionURL", "")
+
+                    # 移除严格的关键词过滤，信任淘宝的搜索结果
+                    # if self.keyword[:1] not in title: continue
+
+                    # 识别天猫
+                    shop_name = item.get("nick", "淘宝店铺")
+                    is_tmall = False
+                    if "旗舰店" in shop_name or "专卖店" in shop_name or item.get("user_type") == "1": # user_type 1 通常是天猫
+                        is_tmall = True
+                        shop_name = "🔴 [天猫] " + shop_name
+
+                    self.global_products.append({
+                        "id": nid,
+                        "title": title,
+                        "price": price,
+                        "link": link if link.startswith("http") else "https:" + link,
+                        "shop": shop_name,
+                        "deal_count": sales,
+                        "platform": "Tmall" if is_tmall else "Taobao"
+                    })
+                    seen_ids.add(nid)
+                    count += 1
+                if count > 0:
+                    return count
+        except:
+            pass
+
+        # 如果 JSON 解析失败，回退到正则提取
+        titles = re.findall(r'"raw_title":"([^"]+)"', text)
+        if not titles:
+            titles = re.findall(r'"title":"([^"]+)"', text)
+
+        prices = re.findall(r'"view_price":"([^"]+)"', text)
+        nids = re.findall(r'"nid":"([^"]+)"', text)
+        sales = re.findall(r'"view_sales":"([^"]+)"', text)
+        shops = re.findall(r'"nick":"([^"]+)"', text)
+
+        if titles and len(titles) > 0:
+            # print(f"   ✅ 成功提取到 {len(titles)} 条记录")
+            for i in range(len(titles)):
+                price = prices[i] if i < len(prices) else "未知"
+                nid = nids[i] if i < len(nids) else ""
+                sale = sales[i] if i < len(sales) else "0"
+                shop = shops[i] if i < len(shops) else "未知店铺"
+                title = titles[i]
+
+                # 简单过滤：标题必须包含关键词的一部分 (避免完全不相关的推荐)
+                # 如果关键词很长，取前两个字
+                # filter_key = self.keyword[:2] if len(self.keyword) >= 2 else self.keyword
+                # if filter_key and filter_key not in title:
+                #    continue
+
+                if nid and not any(p['id'] == nid for p in self.global_products):
+                    self.global_products.append({
+                        "id": nid,
+                        "title": title,
+                        "price": price,
+                        "link": f"https://item.taobao.com/item.htm?id={nid}",
+                        "shop": shop,
+                        "deal_count": sale
+                    })
+        return 0
 
     def _extract_from_dom(self, page):
         """
@@ -227,7 +265,54 @@ class TaobaoScraper(BaseScraper):
     def search(self, keyword, max_pages=3):
         self.global_products = []
         self.keyword = keyword
-        
+        self._template_saved = False
+        emit("crawl_start", platform="Taobao", max_pages=max_pages)
+
+        start_page = 1
+        # 直连接口模式: 录制/回放时仍走浏览器，保证 HAR 与拦截数据完整
+        if taobao_api.http_mode_enabled() and recording.recording_mode() == "off":
+            start_page = self._search_http(keyword, max_pages)
+        if start_page <= max_pages:
+            self._search_browser(keyword, max_pages, start_page)
+
+        emit("crawl_end", platform="Taobao", total=len(self.global_products))
+        return self.global_products
+
+    def _search_http(self, keyword, max_pages, auth_file="auth.json"):
+        """
+        用保存的登录状态直接请求搜索接口
+        :return: 需要由浏览器继续抓取的第一页 (全部完成时为 max_pages + 1)
+        """
+        pages = list(range(1, max_pages + 1))
+        print(f"⚡ [淘宝] 直连接口模式: {keyword}")
+        try:
+            results = taobao_api.fetch_search_pages(
+                keyword, pages, auth_file, on_page_start=lambda page: emit("page_start", platform="Taobao", page=page))
+        except taobao_api.TaobaoChallenge as e:
+            print(f"   ⚠️ 无法使用直连模式 ({e.reason})，改用浏览器")
+            return 1
+        except Exception as e:
+            print(f"   ⚠️ 直连请求失败: {e}，改用浏览器")
+            return 1
+
+        for page_num, result in zip(pages, results):
+            if result is None or isinstance(result, BaseException):
+                if isinstance(result, taobao_api.TaobaoChallenge):
+                    print(f"   🚨 直连请求被拦截: {result}，从第 {page_num} 页起改用浏览器")
+                    metrics.BLOCKED.labels("Taobao", "http_challenge").inc()
+                    emit("blocked", platform="Taobao", reason="http_challenge")
+                elif result is not None:
+                    print(f"   ❌ 第 {page_num} 页直连请求异常: {result}，从该页起改用浏览器")
+                    emit("page_done", platform="Taobao", page=page_num, items=0, products=[], error=str(result))
+                return page_num
+            page_start = len(self.global_products)
+            self._ingest_search_payload(result)
+            print(f"   📊 [第 {page_num}/{max_pages} 页] 直连新增: {len(self.global_products) - page_start} 个商品")
+            emit("page_done", platform="Taobao", page=page_num, items=len(self.global_products) - page_start,
+                 products=self.global_products[page_start:])
+        return max_pages + 1
+
+    def _search_browser(self, keyword, max_pages, start_page=1):
         with sync_playwright() as p:
             # ⚠️ 严重警告：淘宝对 Headless 模式检测极严，必须使用有头模式 (headless=False)
             # 否则极易触发风控，导致账号被限制
@@ -255,7 +340,7 @@ class TaobaoScraper(BaseScraper):
                 print("🔑 [系统] 加载历史登录凭证...")
                 context_args["storage_state"] = auth_file
             
-            context = browser.new_context(**context_args)
+            context = recording.new_context(browser, "taobao", meta={"keyword": keyword, "max_pages": max_pages}, **context_args)
             
             # 注入强力防检测脚本
             context.add_init_script("""
@@ -278,6 +363,8 @@ class TaobaoScraper(BaseScraper):
             # 如果跳转到了 login.taobao.com 或者页面上有登录框
             if "login.taobao.com" in page.url or page.query_selector(".login-btn") or page.query_selector("a.h-login"):
                 print("🔔 [需要登录] 凭证已过期或不存在。")
+                # 无人值守 (服务模式) 时直接挂起任务，不占用浏览器等待 5 分钟
+                require_human("Taobao", "login")
                 print("👉 请在弹出的浏览器中扫码登录。")
                 
                 try:
@@ -290,17 +377,20 @@ class TaobaoScraper(BaseScraper):
                 except:
                     print("❌ 登录超时，程序可能无法获取数据。")
 
-            for page_num in range(1, max_pages + 1):
+            for page_num in range(start_page, max_pages + 1):
                 # 🛡️ 安全延迟：每页之间随机暂停，模拟人类行为，防止触发风控
-                if page_num > 1:
+                if page_num > start_page:
                     sleep_time = random.uniform(3, 6)
                     print(f"   💤 休息 {sleep_time:.1f} 秒以防检测...")
-                    time.sleep(sleep_time)
+                    emit("throttle", platform="Taobao", seconds=sleep_time)
+                    recording.pause(sleep_time)
 
                 offset = (page_num - 1) * 44
                 search_url = f"https://s.taobao.com/search?q={keyword}&s={offset}"
                 
                 print(f"🚀 [第 {page_num}/{max_pages} 页] 正在搜索: {keyword}")
+                # 网络拦截在页面加载过程中就会写入商品，需在跳转前记录起点
+                page_start = len(self.global_products)
                 
                 try:
                     page.goto(search_url, timeout=60000)
@@ -312,7 +402,8 @@ class TaobaoScraper(BaseScraper):
                         print("👉 请手动在浏览器中完成滑块验证或解除限制...")
                         # 播放提示音 (Windows)
                         print("\a") 
-                        input("✅ 验证完成后，请务必按 [回车] 继续...")
+                        require_human("Taobao", "baxia" if "baxia-dialog" in content else "captcha",
+                                      "✅ 验证完成后，请务必按 [回车] 继续...")
                     
                     # 等待商品列表加载
                     try:
@@ -342,15 +433,26 @@ class TaobaoScraper(BaseScraper):
                         
                     new_count = len(self.global_products) - current_count
                     print(f"   📊 本页新增: {new_count} 个商品")
+                    emit("page_done", platform="Taobao", page=page_num, items=len(self.global_products) - page_start,
+                         products=self.global_products[page_start:])
                     
+                except HumanInterventionRequired:
+                    raise
                 except Exception as e:
                     print(f"   ❌ 本页抓取异常: {e}")
+                    emit("page_done", platform="Taobao", page=page_num, items=0, products=[], error=str(e))
 
             page.remove_listener("response", self._handle_search_response)
+            # 直连模式依赖 auth.json 中的 Cookie (含 _m_h5_tk)，浏览器运行后刷新一次
+            if taobao_api.http_mode_enabled() and not recording.is_replay():
+                try:
+                    context.storage_state(path=auth_file)
+                except Exception:
+                    pass
+            context.close()
             browser.close()
-            
-        return self.global_products
 
+    @traced("script_data Taobao", "parse")
     def _extract_from_script_data(self, page):
         """
         从页面嵌入的 JSON 数据中提取 (g_page_config)
@@ -395,6 +497,7 @@ class TaobaoScraper(BaseScraper):
         except:
             pass
 
+    @traced("dom_extract Taobao", "parse")
     def _extract_from_dom_desktop(self, page):
         """
         桌面端 DOM 提取 (通用兜底版)
@@ -476,13 +579,16 @@ class TaobaoScraper(BaseScraper):
         except Exception as e:
             print(f"   ❌ DOM 提取失败: {e}")
 
+    @traced("intercept Taobao detail", "intercept")
     def _handle_detail_response(self, response):
+        _DETAIL_RESPONSES.inc()
         try:
             url = response.url
             if "rate" in url or "detail" in url or "mtop" in url:
                 content_type = response.headers.get("content-type", "")
                 if "json" in content_type or "javascript" in content_type:
                     text = response.text()
+                    recording.capture_payload("taobao", "detail", response, text)
                     
                     if text.strip().startswith("mtopjsonp") or text.strip().startswith("jsonp"):
                         match = re.search(r'\((.*)\)', text)
@@ -490,16 +596,17 @@ class TaobaoScraper(BaseScraper):
                             text = match.group(1)
                     
                     try:
-                        data = json.loads(text)
+                        data = json_codec.loads(text)
                         
                         if "rateList" in text or "rateDetail" in text:
-                            if "rateList" not in self.global_details:
-                                self.global_details["rateList"] = []
+                            if "reviews" not in self.global_details:
+                                self.global_details["reviews"] = self._new_reservoir()
                             
                             rate_list = data.get("data", {}).get("rateDetail", {}).get("rateList", [])
                             if rate_list:
                                 print(f"   💬 捕获到 {len(rate_list)} 条评论数据")
-                                self.global_details["rateList"].extend(rate_list)
+                                # 捕获时即做字段裁剪 + 蓄水池抽样，内存占用与评论页数无关
+                                self.global_details["reviews"].add_many(rate_list)
 
                         if "item" in text and "props" in text:
                              if "itemProps" not in self.global_details:
@@ -515,15 +622,75 @@ class TaobaoScraper(BaseScraper):
         except:
             pass
 
-    def get_details(self, candidates):
+    def _new_reservoir(self):
+        return new_reservoir()
+
+    def _save_detail(self, store, item, captured_reviews, captured_props, review_stats=None):
+        detail_data = {
+            "id": item['id'],
+            "title": item['title'],
+            "price": item['price'],
+            "shop": item['shop'],
+            "platform": item.get('platform') or "Taobao",
+            "link": item.get('link', ''),
+            "captured_reviews": captured_reviews,
+            "captured_props": captured_props
+        }
+        if review_stats:
+            detail_data["review_stats"] = review_stats
+        store.append(detail_data)
+
+    def _plan_incremental(self, candidates, catalog, stored_details, store):
+        """
+        增量模式：只保留新商品、超过 TTL 或列表页价格/销量变化的商品进行重抓，
+        其余直接复用商品目录中保存的详情。
+        """
+        ttl_hours = CONFIG.get("crawler", {}).get("detail_ttl_hours", 24)
+        to_crawl = []
+        reused = 0
+        for item in candidates:
+            reason, stored = catalog.detail_status(item, ttl_hours=ttl_hours)
+            if stored:
+                stored_details[str(item['id'])] = stored
+            metrics.cache_result("detail", not reason)
+            if reason:
+                print(f"   🔄 需要重抓 ({reason}): {item['title'][:20]}...")
+                to_crawl.append(item)
+            else:
+                self._save_detail(store, item, stored["captured_reviews"], stored["captured_props"])
+                reused += 1
+        print(f"♻️ [增量模式] 复用 {reused} 个已采集详情，需重抓 {len(to_crawl)} 个")
+        return to_crawl
+
+    def get_details(self, candidates, incremental=None, store=None):
         """
         深度采集 (桌面端)
+        :param incremental: 是否启用增量模式，默认读取 crawler.incremental 配置
+        :param store: 详情存储 (DetailStore)，默认写入 data/details.jsonl
         """
         if not candidates:
             return
 
+        if store is None:
+            store = DetailStore()
+
+        if incremental is None:
+            incremental = CONFIG.get("crawler", {}).get("incremental", False)
+
+        catalog = None
+        stored_details = {}
+        if incremental:
+            try:
+                catalog = get_catalog()
+                candidates = self._plan_incremental(candidates, catalog, stored_details, store)
+            except Exception as e:
+                print(f"⚠️ 增量模式不可用，回退到全量采集: {e}")
+                catalog = None
+            if not candidates:
+                print("✅ 所有候选商品详情均在有效期内，跳过浏览器采集。")
+                return
+
         print(f"🚀 开始深度采集 {len(candidates)} 个精选商品 (桌面端模式)...")
-        os.makedirs("data/details", exist_ok=True)
 
         with sync_playwright() as p:
             browser = p.chromium.launch(
@@ -548,7 +715,7 @@ class TaobaoScraper(BaseScraper):
             if os.path.exists(auth_file):
                 context_args["storage_state"] = auth_file
                 
-            context = browser.new_context(**context_args)
+            context = recording.new_context(browser, "taobao", name="detail", **context_args)
             
             context.add_init_script("""
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
@@ -564,13 +731,15 @@ class TaobaoScraper(BaseScraper):
                 time.sleep(2)
                 if "login" in page.url or page.query_selector(".login-btn") or page.query_selector("a.h-login"):
                      print("🔔 [请注意]：详情页采集也需要登录。")
-                     input("✅ 登录完成后，请在控制台按 [回车] 键继续...")
+                     require_human("Taobao", "login", "✅ 登录完成后，请在控制台按 [回车] 键继续...")
                      context.storage_state(path=auth_file)
+            except HumanInterventionRequired:
+                raise
             except:
                 pass
 
             for i, item in enumerate(candidates):
-                self.global_details = {"rateList": [], "itemProps": []}
+                self.global_details = {"reviews": self._new_reservoir(), "itemProps": []}
                 
                 url = item['link']
                 print(f"🔄 [{i+1}/{len(candidates)}] 正在深度抓取: {item['title'][:20]}...")
@@ -614,33 +783,35 @@ class TaobaoScraper(BaseScraper):
                             pass
 
                     # DOM 提取评论 (桌面端)
-                    captured_reviews = self.global_details.get("rateList", [])
-                    if not captured_reviews:
+                    reservoir = self.global_details["reviews"]
+                    if not len(reservoir):
                         try:
                             # 尝试提取评论文本
                             # 淘宝评论通常在 .tm-rate-content
                             reviews = page.query_selector_all(".tm-rate-content, .review-content")
                             for r in reviews[:10]:
-                                captured_reviews.append({"content": r.inner_text()})
+                                reservoir.add({"content": r.inner_text()})
                         except:
                             pass
-
-                    detail_data = {
-                        "id": item['id'],
-                        "title": item['title'],
-                        "price": item['price'],
-                        "shop": item['shop'],
-                        "captured_reviews": captured_reviews,
-                        "captured_props": captured_props
-                    }
-                    
-                    file_name = f"data/details/{item['id']}.json"
-                    with open(file_name, "w", encoding="utf-8") as f:
-                        json.dump(detail_data, f, ensure_ascii=False, indent=2)
+                    captured_reviews = reservoir.items()
+                    review_stats = reservoir.stats()
+
+                    if catalog is not None:
+                        # 与历史评论合并，参数为空时沿用上次采集结果
+                        stored = stored_details.get(str(item['id']))
+                        if stored:
+                            max_reviews = CONFIG.get("crawler", {}).get("max_stored_reviews", 200)
+                            captured_reviews = merge_reviews(captured_reviews, stored["captured_reviews"], limit=max_reviews)
+                            captured_props = captured_props or stored["captured_props"]
+                        platform, item_id = catalog_key(item)
+                        catalog.save_detail(platform, item_id, captured_reviews, captured_props, list_fingerprint(item))
+
+                    self._save_detail(store, item, captured_reviews, captured_props, review_stats)
                     
-                    print(f"   ✅ 已保存详情数据: {file_name}")
+                    print(f"   ✅ 已保存详情数据 (评论 {len(captured_reviews)} 条, 参数 {len(captured_props)} 项)")
                     
                 except Exception as e:
                     print(f"   ❌ 抓取失败: {e}")
 
+            context.close()
             browser.close()
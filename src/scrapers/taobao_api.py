@@ -0,0 +1,221 @@
+"""
+淘宝搜索的直连接口模式 (taobao_http.mode: http)
+- 浏览器模式下拦截到搜索接口 (h5api mtop) 的商品数据时，记录该请求的模板 (URL、方法、请求头、请求体)
+- 直连模式复用 auth.json 中的 Cookie，按模板替换关键词与页码，用 _m_h5_tk 中的 token 重新签名后直接请求接口
+- 每页只需一次小请求；遇到登录失效、滑块验证等风控时抛出 TaobaoChallenge，由 TaobaoScraper 退回浏览器模式
+"""
+import os
+import time
+import hashlib
+import asyncio
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from src.config_loader import CONFIG
+from src.utils import json_codec
+from src.scrapers import http_client
+
+DEFAULT_TEMPLATE_PATH = "cache/taobao_search_template.json"
+DEFAULT_APP_KEY = "12574478"
+PER_PAGE = 44
+
+# 不写入模板的请求头 (由 HTTP 客户端自行生成，或每次请求不同)
+_SKIP_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+# 需要人工处理的返回码 (滑块验证、登录失效、非法请求)
+_CHALLENGE_RETS = ("RGV587", "FAIL_SYS_USER_VALIDATE", "FAIL_SYS_SESSION_EXPIRED", "FAIL_SYS_ILLEGAL_ACCESS", "FAIL_SYS_PERMISSION")
+# token 过期，服务端会通过 Set-Cookie 下发新的 _m_h5_tk，用新 token 重签一次即可
+_TOKEN_RETS = ("FAIL_SYS_TOKEN_EXOIRED", "FAIL_SYS_TOKEN_EXPIRED", "FAIL_SYS_TOKEN_EMPTY", "FAIL_SYS_TOKEN_ILLEGAL")
+
+class TaobaoChallenge(Exception):
+    """直连请求被风控拦截或登录失效"""
+
+    def __init__(self, reason, page=None):
+        super().__init__(f"{reason} (第 {page} 页)" if page else reason)
+        self.reason = reason
+        self.page = page
+
+def _config():
+    return CONFIG.get("taobao_http", {})
+
+def http_mode_enabled():
+    return str(_config().get("mode", "browser")).lower() == "http"
+
+def template_path():
+    return _config().get("template_path", DEFAULT_TEMPLATE_PATH)
+
+# ---- 请求模板 ----
+def is_search_api(url):
+    return "h5api" in url and "mtop" in url and "suggest" not in url
+
+def capture_template(request):
+    """从浏览器拦截到的搜索接口请求中提取模板并保存 (请求对象与 Playwright Request 接口一致)"""
+    try:
+        headers = {k: v for k, v in (request.headers or {}).items() if k.lower() not in _SKIP_HEADERS and not k.startswith(":")}
+        template = {
+            "url": request.url,
+            "method": request.method,
+            "headers": headers,
+            "post_data": request.post_data,
+            "captured_at": time.time(),
+        }
+    except Exception:
+        return
+    path = template_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    json_codec.dump(template, path)
+
+def load_template():
+    path = template_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return json_codec.load(path)
+    except Exception as e:
+        print(f"⚠️ 读取淘宝接口模板失败: {e}")
+        return None
+
+def _substitute(value, keyword, page):
+    """替换 data 中的关键词与页码；mtop 的 data 常把参数再编码成 JSON 字符串 (如 params)，逐层处理"""
+    if isinstance(value, dict):
+        per_page = _int(value.get("n")) or PER_PAGE
+        result = {}
+        for k, v in value.items():
+            if k == "q":
+                result[k] = keyword
+            elif k in ("page", "pageNo", "pageNum") and _int(v) is not None:
+                result[k] = str(page) if isinstance(v, str) else page
+            elif k == "s" and _int(v) is not None:
+                offset = (page - 1) * per_page
+                result[k] = str(offset) if isinstance(v, str) else offset
+            else:
+                result[k] = _substitute(v, keyword, page)
+        return result
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        try:
+            inner = json_codec.loads(value)
+        except Exception:
+            return value
+        return json_codec.dumps(_substitute(inner, keyword, page), pretty=False)
+    return value
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def h5_token(cookies):
+    """
+    _m_h5_tk 的格式为 <token>_<过期时间(毫秒)>，签名只用前半部分
+    不同子域名下可能同时存在多个，取过期时间最晚的
+    """
+    values = [c.value for c in getattr(cookies, "jar", cookies) if c.name == "_m_h5_tk" and c.value]
+    if not values:
+        return ""
+    return max(values, key=lambda v: _int(v.rpartition("_")[2]) or 0).split("_")[0]
+
+def mtop_sign(token, t, app_key, data):
+    return hashlib.md5(f"{token}&{t}&{app_key}&{data}".encode("utf-8")).hexdigest()
+
+def build_request(template, keyword, page, token):
+    """
+    按模板生成第 page 页的请求
+    :return: (method, url, headers, body)
+    """
+    parts = urlsplit(template["url"])
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    method = (template.get("method") or "GET").upper()
+    form = dict(parse_qsl(template.get("post_data") or "", keep_blank_values=True)) if method == "POST" else {}
+
+    source = form if "data" in form else query
+    data = json_codec.dumps(_substitute(json_codec.loads(source.get("data") or "{}"), keyword, page), pretty=False)
+    source["data"] = data
+
+    t = str(int(time.time() * 1000))
+    app_key = query.get("appKey", DEFAULT_APP_KEY)
+    query["t"] = t
+    query["sign"] = mtop_sign(token, t, app_key, data)
+
+    url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+    body = urlencode(form) if form else None
+    return method, url, dict(template.get("headers") or {}), body
+
+def _check_response(response, page):
+    """HTTP 层面的拦截: 跳转到登录/验证页，或 4xx"""
+    location = response.headers.get("location", "")
+    if response.is_redirect:
+        reason = "login" if "login" in location else "punish" if "punish" in location else "redirect"
+        raise TaobaoChallenge(reason, page)
+    if 400 <= response.status_code < 500:
+        raise TaobaoChallenge(f"http_{response.status_code}", page)
+    response.raise_for_status()
+
+def _ret_code(text):
+    """mtop 返回的 ret 字段 (如 SUCCESS::调用成功)，无法解析时返回空字符串"""
+    body = text.strip()
+    if not body.startswith("{"):
+        start, end = body.find("("), body.rfind(")")
+        body = body[start + 1:end] if start >= 0 and end > start else body
+    try:
+        ret = json_codec.loads(body).get("ret") or [""]
+    except Exception:
+        return ""
+    return str(ret[0])
+
+async def _fetch_page(client, template, keyword, page):
+    for attempt in range(2):
+        method, url, headers, body = build_request(template, keyword, page, h5_token(client.cookies))
+        response = await client.request(method, url, headers=headers, content=body)
+        _check_response(response, page)
+        text = response.text
+        ret = _ret_code(text)
+        if any(code in ret for code in _CHALLENGE_RETS) or "punish" in text[:2000]:
+            raise TaobaoChallenge(ret.split("::")[0] or "punish", page)
+        if any(code in ret for code in _TOKEN_RETS) and attempt == 0:
+            # 新 token 已通过 Set-Cookie 写入客户端，重签后再试一次
+            continue
+        if ret and not ret.startswith("SUCCESS"):
+            raise TaobaoChallenge(ret.split("::")[0], page)
+        return text
+    raise TaobaoChallenge("token_expired", page)
+
+async def _fetch_all(template, cookies, keyword, pages, on_page_start):
+    cfg = _config()
+    concurrency = max(1, int(cfg.get("concurrency", 2)))
+    delay = cfg.get("delay", [1, 3])
+    semaphore = asyncio.Semaphore(concurrency)
+    challenged = asyncio.Event()
+
+    async with http_client.new_client(cookies, max_connections=concurrency, timeout=cfg.get("timeout", 15)) as client:
+        async def worker(index, page):
+            async with semaphore:
+                if challenged.is_set():
+                    return None
+                # 第一批请求直接发送，之后每个请求前随机间隔
+                if index >= concurrency:
+                    await http_client.throttle("Taobao", delay)
+                on_page_start(page)
+                try:
+                    return await _fetch_page(client, template, keyword, page)
+                except TaobaoChallenge:
+                    challenged.set()
+                    raise
+
+        return await asyncio.gather(*(worker(i, page) for i, page in enumerate(pages)), return_exceptions=True)
+
+def fetch_search_pages(keyword, pages, auth_file, on_page_start=lambda page: None):
+    """
+    直连请求多页搜索结果
+    :return: 与 pages 一一对应的结果列表，每项为响应文本或异常 (TaobaoChallenge / 网络错误)，因风控未发送的页为 None
+    :raises TaobaoChallenge: 缺少模板、Cookie 或 httpx 时 (reason 说明原因)
+    """
+    if not http_client.available():
+        raise TaobaoChallenge("httpx_missing")
+    template = load_template()
+    if not template:
+        raise TaobaoChallenge("no_template")
+    cookies = http_client.load_cookies(auth_file, "taobao.com")
+    if not any(name == "_m_h5_tk" for name, *_ in cookies):
+        raise TaobaoChallenge("no_token")
+    return http_client.run_sync(_fetch_all(template, cookies, keyword, pages, on_page_start))
@@ -2,12 +2,133 @@ import time
 import random
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.scrapers import recording, vip_api
+from src.utils.events import emit
+from src.utils.tracing import span, traced
+from src.utils import metrics
+
+_LIST_RESPONSES = metrics.INTERCEPTED.labels("Vipshop", "search")
 
 class VipScraper(BaseScraper):
+    """
+    唯品会搜索 (vip.mode)
+    - api (默认): 优先直连商品列表接口；需要浏览器时拦截 rank / module/list 接口的 JSON 批量解析，
+      页面未加载的批次按 pid 直接请求，不再滚动页面；某页接口没有数据时才读取页面元素
+    - dom: 只读取页面元素 (滚动加载后逐个商品读取)
+    """
+
+    def __init__(self):
+        self.results = []
+        self._seen_pids = set()
+        self._rank_pids = []
+        self._rank_total = None
+        self._templates = {}
+        # 离线回放拦截回调时关闭 (录制的响应没有请求头，也不能覆盖真实的请求模板)
+        self.capture_templates = True
+
     def search(self, keyword, max_pages=3):
-        results = []
+        self.results = []
+        self._seen_pids = set()
+        self._templates = {}
         print(f"🛍️ [唯品会] 启动搜索: {keyword}")
-        
+        emit("crawl_start", platform="Vipshop", max_pages=max_pages)
+
+        start_page = 1
+        # 录制/回放时仍走浏览器，保证 HAR 与拦截数据完整
+        if vip_api.direct_http_enabled() and recording.recording_mode() == "off":
+            start_page = self._search_http(keyword, max_pages)
+        if start_page <= max_pages:
+            self._search_browser(keyword, max_pages, start_page)
+
+        emit("crawl_end", platform="Vipshop", total=len(self.results))
+        return self.results
+
+    def _add_products(self, products):
+        count = 0
+        for product in products:
+            pid = vip_api.pid_of(product)
+            if pid in self._seen_pids:
+                continue
+            self._seen_pids.add(pid)
+            self.results.append(product)
+            count += 1
+        return count
+
+    def _search_http(self, keyword, max_pages):
+        """
+        直接请求商品列表接口
+        :return: 需要由浏览器继续抓取的第一页 (全部完成或已无更多结果时为 max_pages + 1)
+        """
+        pages = list(range(1, max_pages + 1))
+        print(f"⚡ [唯品会] 直连接口模式: {keyword}")
+        try:
+            results = vip_api.fetch_search_pages(
+                keyword, pages, on_page_start=lambda page: emit("page_start", platform="Vipshop", page=page))
+        except Exception as e:
+            print(f"   ⚠️ 无法使用直连模式 ({e})，改用浏览器")
+            return 1
+
+        ranked = 0
+        for page_num, result in zip(pages, results):
+            if isinstance(result, BaseException):
+                print(f"   ⚠️ 第 {page_num} 页直连请求失败: {result}，从该页起改用浏览器")
+                emit("page_done", platform="Vipshop", page=page_num, items=0, products=[], error=str(result))
+                return page_num
+            products, total, page_pids = result
+            page_start = len(self.results)
+            self._add_products(products)
+            print(f"   📊 [第 {page_num}/{max_pages} 页] 直连新增: {len(self.results) - page_start} 个商品")
+            emit("page_done", platform="Vipshop", page=page_num, items=len(self.results) - page_start,
+                 products=self.results[page_start:])
+            ranked += page_pids
+            if not page_pids or ranked >= total:
+                break
+        return max_pages + 1
+
+    @traced("intercept Vipshop search", "intercept")
+    def _handle_response(self, response):
+        kind = vip_api.classify(response.url)
+        if not kind:
+            return
+        _LIST_RESPONSES.inc()
+        try:
+            text = response.text()
+            recording.capture_payload("vip", "search", response, text)
+            data = vip_api.parse_jsonp(text)
+            if not data or str(data.get("code")) != "1":
+                return
+            if kind == "rank":
+                pids, total = vip_api.parse_rank(data)
+                self._rank_pids.extend(pids)
+                self._rank_total = total
+            else:
+                self._add_products(vip_api.parse_products(data))
+            # 记录请求模板，供页面未加载的批次及直连模式使用
+            if self.capture_templates and kind not in self._templates and not recording.is_replay():
+                template = vip_api.request_template(response.request)
+                self._templates[kind] = template
+                vip_api.save_template(kind, template)
+        except Exception:
+            pass
+
+    def _fetch_missing(self, context):
+        """页面只加载了前几批商品，其余 pid 用浏览器上下文 (共用 Cookie) 按批直接请求"""
+        missing = [pid for pid in self._rank_pids if pid not in self._seen_pids]
+        template = self._templates.get("list")
+        if not missing or not template or recording.is_replay():
+            return
+        with span("bulk_fetch Vipshop", "fetch", items=len(missing)):
+            for url in vip_api.list_urls(template, missing):
+                try:
+                    response = context.request.get(url, headers=template.get("headers"))
+                    data = vip_api.check(vip_api.parse_jsonp(response.text()))
+                    self._add_products(vip_api.parse_products(data))
+                except Exception as e:
+                    print(f"   ⚠️ 唯品会商品批量请求失败: {e}")
+                    return
+
+    def _search_browser(self, keyword, max_pages, start_page=1):
+        api_mode = vip_api.api_mode_enabled()
         with sync_playwright() as p:
             browser = p.chromium.launch(
                 headless=False,
@@ -18,73 +139,108 @@ class VipScraper(BaseScraper):
                     "--window-size=1280,800"
                 ]
             )
-            
-            context = browser.new_context(
+
+            context = recording.new_context(
+                browser, "vip", meta={"keyword": keyword, "max_pages": max_pages},
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
                 viewport={"width": 1280, "height": 800}
             )
-            
+
             context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             page = context.new_page()
-            
-            try:
-                # 唯品会搜索 URL
-                url = f"https://category.vip.com/suggest.php?keyword={keyword}"
-                page.goto(url, timeout=40000)
-                
-                # 等待商品列表
+            if api_mode:
+                page.on("response", self._handle_response)
+
+            site_page_size = 0
+            for page_num in range(start_page, max_pages + 1):
+                if page_num > start_page:
+                    sleep_time = random.uniform(1, 3)
+                    emit("throttle", platform="Vipshop", seconds=sleep_time)
+                    recording.pause(sleep_time)
+
+                emit("page_start", platform="Vipshop", page=page_num)
+                page_start = len(self.results)
+                self._rank_pids = []
+                self._rank_total = None
                 try:
-                    page.wait_for_selector(".c-goods-item", timeout=10000)
-                except:
-                    print("   ⚠️ 唯品会未找到商品或加载超时")
-                
-                # 滚动加载
-                for _ in range(5):
-                    page.mouse.wheel(0, 1000)
-                    time.sleep(0.5)
-                
-                items = page.query_selector_all(".c-goods-item")
-                print(f"   📄 唯品会发现 {len(items)} 个商品")
-                
-                for item in items:
+                    # 唯品会搜索 URL
+                    url = f"https://category.vip.com/suggest.php?keyword={keyword}&page={page_num}"
+                    page.goto(url, timeout=40000)
+
+                    # 等待商品列表
                     try:
-                        # 标题
-                        title_el = item.query_selector(".c-goods-item__name")
-                        title = title_el.inner_text().strip() if title_el else ""
-                        
-                        # 价格
-                        price_el = item.query_selector(".c-goods-item__sale-price")
-                        price = price_el.inner_text().replace("¥", "").strip() if price_el else "0"
-                        
-                        # 折扣/原价
-                        market_price_el = item.query_selector(".c-goods-item__market-price")
-                        market_price = market_price_el.inner_text().strip() if market_price_el else ""
-                        
-                        # 链接
-                        link_el = item.query_selector("a")
-                        link = link_el.get_attribute("href") if link_el else ""
-                        if link and not link.startswith("http"):
-                            link = "https:" + link
-                            
-                        if title:
-                            results.append({
-                                "id": link.split('/')[-1].split('.')[0] if link else str(random.randint(10000,99999)),
-                                "title": f"[唯品会] {title} {market_price}",
-                                "price": price,
-                                "shop": "唯品会自营",
-                                "deal_count": "热销中", # 唯品会不常显示具体销量
-                                "link": link,
-                                "platform": "Vipshop"
-                            })
+                        page.wait_for_selector(".c-goods-item", timeout=10000)
                     except:
-                        continue
-                        
-            except Exception as e:
-                print(f"   ❌ 唯品会抓取异常: {e}")
-                
+                        print("   ⚠️ 唯品会未找到商品或加载超时")
+
+                    if api_mode:
+                        self._fetch_missing(context)
+                    # 接口没有拿到数据 (或 dom 模式) 时读取页面元素
+                    if len(self.results) == page_start:
+                        self._extract_from_dom(page)
+
+                    new_count = len(self.results) - page_start
+                    print(f"   📄 [第 {page_num}/{max_pages} 页] 唯品会新增 {new_count} 个商品")
+                    emit("page_done", platform="Vipshop", page=page_num, items=new_count,
+                         products=self.results[page_start:])
+                    if new_count == 0:
+                        break
+                    # 每页商品数由站点决定 (与配置的 page_size 无关)，按 rank 接口实际返回的 pid 数计算
+                    site_page_size = max(site_page_size, len(self._rank_pids))
+                    if self._rank_total is not None and (not self._rank_pids or page_num * site_page_size >= self._rank_total):
+                        break
+                except Exception as e:
+                    print(f"   ❌ 唯品会抓取异常: {e}")
+                    emit("page_done", platform="Vipshop", page=page_num, items=0, products=[], error=str(e))
+                    break
+
+            if api_mode:
+                page.remove_listener("response", self._handle_response)
+            context.close()
             browser.close()
-            
-        return results
+
+    def _extract_from_dom(self, page):
+        # 滚动加载
+        for _ in range(5):
+            page.mouse.wheel(0, 1000)
+            time.sleep(0.5)
+
+        items = page.query_selector_all(".c-goods-item")
+        print(f"   📄 唯品会页面发现 {len(items)} 个商品")
+
+        with span("dom_extract Vipshop", "parse", items=len(items)):
+            for item in items:
+                try:
+                    # 标题
+                    title_el = item.query_selector(".c-goods-item__name")
+                    title = title_el.inner_text().strip() if title_el else ""
+
+                    # 价格
+                    price_el = item.query_selector(".c-goods-item__sale-price")
+                    price = price_el.inner_text().replace("¥", "").strip() if price_el else "0"
+
+                    # 折扣/原价
+                    market_price_el = item.query_selector(".c-goods-item__market-price")
+                    market_price = market_price_el.inner_text().strip() if market_price_el else ""
+
+                    # 链接
+                    link_el = item.query_selector("a")
+                    link = link_el.get_attribute("href") if link_el else ""
+                    if link and not link.startswith("http"):
+                        link = "https:" + link
+
+                    if title:
+                        self._add_products([{
+                            "id": link.split('/')[-1].split('.')[0] if link else str(random.randint(10000,99999)),
+                            "title": f"[唯品会] {title} {market_price}",
+                            "price": price,
+                            "shop": "唯品会自营",
+                            "deal_count": "热销中", # 唯品会不常显示具体销量
+                            "link": link,
+                            "platform": "Vipshop"
+                        }])
+                except:
+                    continue
 
     def get_details(self, item_id):
         pass
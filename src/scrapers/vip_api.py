@@ -0,0 +1,189 @@
+"""
+唯品会商品列表接口 (mapi.vip.com)
+搜索页先请求 product/rank 得到本页全部商品 ID (pid)，再按批次请求 product/module/list 获取商品信息；
+页面只在滚动时才请求后续批次，这里直接按 pid 批量请求，一次拿到整页商品
+- 浏览器模式下拦截两个接口的响应并批量解析，同时记录请求模板
+- 有模板且安装了 httpx 时可不打开浏览器，直接用连接池请求接口
+"""
+import os
+import re
+import time
+import asyncio
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from src.config_loader import CONFIG
+from src.utils import json_codec
+from src.scrapers import http_client
+
+DEFAULT_TEMPLATE_PATH = "cache/vip_api_templates.json"
+DEFAULT_PAGE_SIZE = 120
+LIST_BATCH = 50
+
+_SKIP_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+_JSONP = re.compile(r"^\s*[\w$.]+\s*\((.*)\)\s*;?\s*$", re.S)
+
+class VipApiError(Exception):
+    """接口返回异常 (非 JSON、code 不为 1 或被拦截)"""
+
+def _config():
+    return CONFIG.get("vip", {})
+
+def api_mode_enabled():
+    return str(_config().get("mode", "api")).lower() == "api"
+
+def direct_http_enabled():
+    return api_mode_enabled() and _config().get("direct_http", True) and http_client.available()
+
+def page_size():
+    return int(_config().get("page_size", DEFAULT_PAGE_SIZE))
+
+def classify(url):
+    """rank / list / None"""
+    if "mapi.vip.com" not in url and "/vips-mobile/" not in url:
+        return None
+    if "/product/rank" in url:
+        return "rank"
+    if "/product/module/list" in url:
+        return "list"
+    return None
+
+# ---- 解析 ----
+def parse_jsonp(text):
+    """解析 JSON 或 jsonp (callback(...)) 响应，失败时返回 None"""
+    match = _JSONP.match(text)
+    try:
+        return json_codec.loads(match.group(1) if match else text)
+    except Exception:
+        return None
+
+def parse_rank(data):
+    """:return: (本页 pid 列表, 搜索结果总数)"""
+    body = (data or {}).get("data") or {}
+    pids = [str(p["pid"]) for p in body.get("products") or [] if p.get("pid")]
+    return pids, int(body.get("total") or 0)
+
+def parse_products(data):
+    """module/list 响应 -> 商品列表 (与浏览器 DOM 提取的字段一致)"""
+    products = []
+    for item in ((data or {}).get("data") or {}).get("products") or []:
+        pid = str(item.get("productId") or "")
+        title = item.get("title") or ""
+        if not pid or not title:
+            continue
+        price = item.get("price") or {}
+        brand_id = item.get("brandId") or ""
+        market_price = price.get("marketPrice") or ""
+        link = f"https://detail.vip.com/detail-{brand_id}-{pid}.html"
+        products.append({
+            # 与 DOM 提取一致: 取详情页链接的文件名作为 ID
+            "id": f"detail-{brand_id}-{pid}",
+            "title": f"[唯品会] {title} ¥{market_price}" if market_price else f"[唯品会] {title}",
+            "price": str(price.get("salePrice") or "0"),
+            "shop": "唯品会自营",
+            "deal_count": "热销中", # 唯品会不常显示具体销量
+            "link": link,
+            "platform": "Vipshop",
+        })
+    return products
+
+def pid_of(product):
+    """商品 ID (detail-<品牌>-<pid>) 中的 pid"""
+    return product["id"].rsplit("-", 1)[-1]
+
+def check(data):
+    if data is None:
+        raise VipApiError("响应不是 JSON")
+    if str(data.get("code")) != "1":
+        raise VipApiError(f"code={data.get('code')} {data.get('msg', '')}".strip())
+    return data
+
+# ---- 请求模板 ----
+def template_path():
+    return _config().get("template_path", DEFAULT_TEMPLATE_PATH)
+
+def request_template(request):
+    """Playwright Request -> 模板 dict"""
+    headers = {k: v for k, v in (request.headers or {}).items() if k.lower() not in _SKIP_HEADERS and not k.startswith(":")}
+    return {"url": request.url, "headers": headers}
+
+def save_template(kind, template):
+    path = template_path()
+    templates = load_templates()
+    templates[kind] = {**template, "captured_at": time.time()}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    json_codec.dump(templates, path)
+
+def load_templates():
+    path = template_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        return json_codec.load(path)
+    except Exception as e:
+        print(f"⚠️ 读取唯品会接口模板失败: {e}")
+        return {}
+
+def _with_params(url, **params):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({k: str(v) for k, v in params.items()})
+    if "_" in query:
+        query["_"] = str(int(time.time() * 1000))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def rank_url(template, keyword, page, size=None):
+    size = size or page_size()
+    return _with_params(template["url"], keyword=keyword, pageOffset=(page - 1) * size, batchSize=size)
+
+def list_urls(template, pids):
+    """按 LIST_BATCH 个 pid 一批生成 module/list 请求"""
+    return [_with_params(template["url"], productIds=",".join(pids[i:i + LIST_BATCH]))
+            for i in range(0, len(pids), LIST_BATCH)]
+
+# ---- 直连请求 ----
+async def _get_json(client, url, headers):
+    response = await client.get(url, headers=headers)
+    if response.is_redirect or response.status_code >= 400:
+        raise VipApiError(f"HTTP {response.status_code}")
+    return check(parse_jsonp(response.text))
+
+async def _fetch_page(client, templates, keyword, page):
+    """:return: (本页商品, 搜索结果总数, rank 接口返回的本页 pid 数)"""
+    rank = templates["rank"]
+    pids, total = parse_rank(await _get_json(client, rank_url(rank, keyword, page), rank.get("headers")))
+    listing = templates["list"]
+    batches = await asyncio.gather(*(_get_json(client, url, listing.get("headers")) for url in list_urls(listing, pids)))
+    products = [p for data in batches for p in parse_products(data)]
+    # module/list 不保证按 pid 顺序返回，按搜索排序还原
+    order = {pid: i for i, pid in enumerate(pids)}
+    products.sort(key=lambda p: order.get(pid_of(p), len(order)))
+    return products, total, len(pids)
+
+async def _fetch_all(templates, keyword, pages, on_page_start):
+    cfg = _config()
+    concurrency = max(1, int(cfg.get("concurrency", 2)))
+    delay = cfg.get("delay", [0.5, 1.5])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with http_client.new_client(max_connections=concurrency * 2, timeout=cfg.get("timeout", 15)) as client:
+        async def worker(index, page):
+            async with semaphore:
+                if index >= concurrency:
+                    await http_client.throttle("Vipshop", delay)
+                on_page_start(page)
+                return await _fetch_page(client, templates, keyword, page)
+
+        return await asyncio.gather(*(worker(i, page) for i, page in enumerate(pages)), return_exceptions=True)
+
+def fetch_search_pages(keyword, pages, on_page_start=lambda page: None):
+    """
+    直连请求多页搜索结果
+    :return: 与 pages 一一对应的结果列表，每项为 (商品列表, 总数, 本页 pid 数) 或异常
+    :raises VipApiError: 缺少请求模板时
+    """
+    templates = load_templates()
+    if "rank" not in templates or "list" not in templates:
+        raise VipApiError("没有接口请求模板")
+    return http_client.run_sync(_fetch_all(templates, keyword, pages, on_page_start))
@@ -5,6 +5,7 @@ import re
 import os
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.scrapers import recording
 
 class XiaohongshuScraper(BaseScraper):
     def search(self, keyword, max_count=10):
@@ -36,7 +37,7 @@ class XiaohongshuScraper(BaseScraper):
                 print("🔑 [小红书] 加载历史登录凭证...")
                 context_args["storage_state"] = auth_file
 
-            context = browser.new_context(**context_args)
+            context = recording.new_context(browser, "xhs", meta={"keyword": keyword}, **context_args)
             
             # 注入防检测
             context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -151,6 +152,7 @@ class XiaohongshuScraper(BaseScraper):
             except Exception as e:
                 print(f"   ⚠️ 小红书调研失败: {e}")
                 
+            context.close()
             browser.close()
             
         return results
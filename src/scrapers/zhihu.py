@@ -3,6 +3,7 @@ import time
 import random
 from playwright.sync_api import sync_playwright
 from .base import BaseScraper
+from src.scrapers import recording
 
 class ZhihuScraper(BaseScraper):
     def search(self, keyword, max_count=5):
@@ -24,7 +25,7 @@ class ZhihuScraper(BaseScraper):
                 print("🔑 [知乎] 加载历史登录凭证...")
                 context_args["storage_state"] = auth_file
                 
-            context = browser.new_context(**context_args)
+            context = recording.new_context(browser, "zhihu", meta={"keyword": keyword}, **context_args)
             page = context.new_page()
             
             # 注入防检测脚本
@@ -57,7 +58,7 @@ class ZhihuScraper(BaseScraper):
                     
                     # 重启为有头模式
                     browser = p.chromium.launch(headless=False, args=["--disable-blink-features=AutomationControlled"])
-                    context = browser.new_context(**context_args)
+                    context = recording.new_context(browser, "zhihu", meta={"keyword": keyword}, **context_args)
                     page = context.new_page()
                     page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                     
@@ -146,6 +147,7 @@ class ZhihuScraper(BaseScraper):
             except Exception as e:
                 print(f"   ⚠️ 知乎调研失败: {e}")
             
+            context.close()
             browser.close()
             
         if not results:
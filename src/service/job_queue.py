@@ -0,0 +1,191 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+
+from src.config_loader import CONFIG
+from src.utils import json_codec
+
+DEFAULT_QUEUE_PATH = "cache/jobs.db"
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+PARKED = "parked"        # 需要人工处理 (登录/验证码)，处理完成后 resume
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,
+    kind             TEXT NOT NULL,
+    spec             TEXT NOT NULL,
+    status           TEXT NOT NULL,
+    stage            TEXT,
+    run_id           TEXT,
+    result           TEXT,
+    error            TEXT,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at       REAL NOT NULL,
+    updated_at       REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+class JobQueue:
+    """
+    SQLite 持久化任务队列
+    服务重启后排队中的任务不会丢失；重启时仍处于 running 的任务会被重新排队。
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = CONFIG.get("service", {}).get("queue_path", DEFAULT_QUEUE_PATH)
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["spec"] = json_codec.loads(job["spec"])
+        job["result"] = json_codec.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def submit(self, spec, kind="pipeline"):
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, spec, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json_codec.dumps(spec, pretty=False), QUEUED, now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def list_jobs(self, status=None, limit=100):
+        with self._lock:
+            if status:
+                rows = self.conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def count_by_status(self):
+        """{状态: 任务数}"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def claim(self):
+        """取出最早排队的任务并标记为 running；没有任务时返回 None"""
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), row["id"], QUEUED),
+            )
+        return self.get(row["id"])
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json_codec.dumps(fields["result"], pretty=False)
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self.conn:
+            self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def update_progress(self, job_id, stage, result=None, run_id=None):
+        """保存阶段性结果 (部分结果可通过 API 随时查看)"""
+        fields = {"stage": stage, "result": result}
+        if run_id:
+            fields["run_id"] = run_id
+        self._update(job_id, **fields)
+
+    def finish(self, job_id, result):
+        self._update(job_id, status=DONE, result=result, error=None)
+
+    def fail(self, job_id, error):
+        self._update(job_id, status=FAILED, error=str(error))
+
+    def park(self, job_id, reason):
+        self._update(job_id, status=PARKED, error=str(reason))
+
+    def mark_cancelled(self, job_id):
+        self._update(job_id, status=CANCELLED)
+
+    def request_cancel(self, job_id):
+        """
+        排队中/挂起的任务直接取消；运行中的任务打上取消标记，由工作线程在阶段之间响应
+        :return: 更新后的任务，不存在时返回 None
+        """
+        with self._lock, self.conn:
+            now = time.time()
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, now, job_id, QUEUED, PARKED),
+            )
+            self.conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?",
+                (now, job_id, RUNNING),
+            )
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id):
+        with self._lock:
+            row = self.conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def resume(self, job_id):
+        """人工处理完成后，把挂起的任务重新排队 (从中断的阶段继续)"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, PARKED),
+            )
+        return self.get(job_id)
+
+    def requeue_running(self):
+        """服务启动时调用：上次异常退出时仍在运行的任务重新排队"""
+        with self._lock, self.conn:
+            now = time.time()
+            # 退出前已被请求取消的任务不再重跑
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND cancel_requested = 1",
+                (CANCELLED, now, RUNNING),
+            )
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?", (QUEUED, now, RUNNING)
+            )
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
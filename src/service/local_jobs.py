@@ -0,0 +1,137 @@
+import time
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config_loader import CONFIG
+from src.pipeline import run_pipeline, CancelToken, JobCancelled, STAGES
+from src.storage.workspace import Workspace
+from src.utils.interaction import HumanInterventionRequired
+from src.utils import metrics
+
+DEFAULT_MAX_RESULTS = 32
+
+class LocalJob:
+    """在本进程后台线程中运行的一次完整流程 (供 Streamlit 轮询进度)"""
+
+    def __init__(self, key, spec, force=False):
+        self.key = key
+        self.spec = spec
+        self.force = force
+        self.status = "running"
+        self.stage = None
+        self.result = {}
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self.cancel_token = CancelToken()
+        # 任务对象持有工作区，结果仍被缓存时 GC 不会删除其中的报告文件
+        self.workspace = Workspace()
+
+    @property
+    def done(self):
+        return self.status != "running"
+
+    @property
+    def progress(self):
+        """已完成阶段的比例 (0~1)"""
+        if self.status == "done":
+            return 1.0
+        if self.stage not in STAGES:
+            return 0.0
+        return (STAGES.index(self.stage) + 1) / len(STAGES)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+class LocalJobRunner:
+    """
+    进程内的后台任务表: 相同参数的任务只运行一次，结果保留在内存中供后续页面刷新复用
+    - 页面重跑 (rerun) 或多个会话提交相同参数时直接返回已有任务，不会重新抓取
+    - 只保留最近 max_results 个已结束的任务
+    """
+
+    def __init__(self, max_workers=None, max_results=DEFAULT_MAX_RESULTS, search_cache=None):
+        max_workers = max_workers or CONFIG.get("pools", {}).get("max_browsers", 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_results = max_results
+        self.search_cache = search_cache
+
+    @staticmethod
+    def key(spec):
+        return (
+            spec.get("requirements") or spec.get("keyword"),
+            spec.get("platform_choice"),
+            spec.get("max_pages"),
+            spec.get("top_n"),
+        )
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, spec, force=False):
+        """
+        :param force: 忽略已有结果与搜索缓存重新运行 (已在运行中的任务仍然复用)
+        :return: LocalJob
+        """
+        key = self.key(spec)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job and (not job.done or (job.status == "done" and not force)):
+                self._jobs.move_to_end(key)
+                metrics.cache_result("local_jobs", True)
+                return job
+            metrics.cache_result("local_jobs", False)
+            job = LocalJob(key, spec, force=force)
+            self._jobs[key] = job
+            self._evict()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _evict(self):
+        finished = [k for k, j in self._jobs.items() if j.done]
+        for k in finished[:max(0, len(finished) - self.max_results)]:
+            del self._jobs[k]
+
+    def clear(self):
+        """清除已结束的任务及其工作区文件，并清空搜索缓存 (运行中的任务不受影响)"""
+        with self._lock:
+            for k in [k for k, j in self._jobs.items() if j.done]:
+                self._jobs.pop(k).workspace.remove()
+        if self.search_cache is not None:
+            self.search_cache.clear()
+
+    def _run(self, job):
+        def on_stage(stage, partial):
+            job.stage = stage
+            job.result = partial
+
+        try:
+            result = run_pipeline(
+                job.spec, workspace=job.workspace, cancel=job.cancel_token,
+                on_stage=on_stage, search_cache=self.search_cache, force=job.force,
+            )
+        except HumanInterventionRequired as e:
+            job.status, job.error = "parked", str(e)
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"❌ 后台任务失败: {e}\n{traceback.format_exc()}")
+            job.status, job.error = "failed", str(e)
+        else:
+            job.result = result
+            job.stage = result.get("stage")
+            if result.get("error"):
+                job.status, job.error = "failed", result["error"]
+            else:
+                job.status = "done"
+        finally:
+            job.finished = time.time()
@@ -0,0 +1,137 @@
+import re
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from src.config_loader import CONFIG
+from src.service.job_queue import JobQueue, DONE
+from src.service.workers import WorkerPool
+from src.utils.pools import get_browser_pool, get_llm_pool
+from src.utils import json_codec, metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_JOB_PATH = re.compile(r"^/jobs/([\w-]+)(?:/(result|cancel|resume))?/?$")
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    本地 HTTP API
+    - POST /jobs                 提交任务 {"keyword", "platforms", "max_pages", "top_n", "answers"}
+    - GET  /jobs[?status=]       任务列表
+    - GET  /jobs/<id>            任务状态与阶段性结果
+    - GET  /jobs/<id>/result     最终结果 (未完成时返回 409)
+    - POST /jobs/<id>/cancel     取消任务
+    - POST /jobs/<id>/resume     人工处理 (登录/验证码) 完成后恢复挂起的任务
+    - GET  /health               工作线程与资源池状态
+    - GET  /metrics              运行指标 (Prometheus 文本格式)
+    """
+
+    queue = None
+    pool = None
+
+    def log_message(self, format, *args):
+        # 默认会把每个请求打印到 stderr，这里保持安静
+        pass
+
+    def _send(self, status, payload):
+        body = json_codec.dumpb(payload, pretty=False)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text, content_type="text/plain; version=0.0.4; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json_codec.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            browsers = get_browser_pool()
+            return self._send(200, {
+                "workers": self.pool.workers,
+                "running_jobs": self.pool.running_jobs,
+                "browsers_in_use": browsers.in_use,
+                "max_browsers": browsers.max_browsers,
+                "max_llm_calls": get_llm_pool().max_concurrency,
+            })
+        if url.path == "/metrics":
+            return self._send_text(200, metrics.REGISTRY.to_prometheus())
+        if url.path.rstrip("/") == "/jobs":
+            status = parse_qs(url.query).get("status", [None])[0]
+            return self._send(200, {"jobs": self.queue.list_jobs(status=status)})
+
+        m = _JOB_PATH.match(url.path)
+        if not m or m.group(2) not in (None, "result"):
+            return self._send(404, {"error": "not found"})
+        job = self.queue.get(m.group(1))
+        if job is None:
+            return self._send(404, {"error": "job not found"})
+        if m.group(2) == "result":
+            if job["status"] != DONE:
+                return self._send(409, {"error": "job not finished", "status": job["status"], "partial": job["result"]})
+            return self._send(200, job["result"])
+        return self._send(200, job)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/jobs":
+            try:
+                spec = self._read_json()
+            except Exception:
+                return self._send(400, {"error": "invalid JSON"})
+            if not isinstance(spec, dict) or not spec.get("keyword"):
+                return self._send(400, {"error": "keyword is required"})
+            job_id = self.queue.submit(spec)
+            return self._send(201, {"id": job_id, "status": "queued"})
+
+        m = _JOB_PATH.match(url.path)
+        if not m or m.group(2) not in ("cancel", "resume"):
+            return self._send(404, {"error": "not found"})
+        job_id = m.group(1)
+        if self.queue.get(job_id) is None:
+            return self._send(404, {"error": "job not found"})
+        if m.group(2) == "cancel":
+            job = self.queue.request_cancel(job_id)
+            self.pool.cancel(job_id)
+        else:
+            job = self.queue.resume(job_id)
+        return self._send(200, {"id": job_id, "status": job["status"]})
+
+def serve(host=None, port=None, workers=None):
+    """启动服务：工作线程池 + HTTP API (阻塞直到 Ctrl+C)"""
+    service_cfg = CONFIG.get("service", {})
+    host = host or service_cfg.get("host", DEFAULT_HOST)
+    port = port or service_cfg.get("port", DEFAULT_PORT)
+
+    queue = JobQueue()
+    pool = WorkerPool(queue, workers=workers)
+    pool.start()
+
+    metrics.install()
+    metrics.QUEUE_DEPTH.set_function(queue.count_by_status)
+    snapshots = metrics.SnapshotWriter().start()
+
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"queue": queue, "pool": pool})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🛰️ 服务已启动: http://{host}:{port} (工作线程 {pool.workers} 个)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 正在停止服务...")
+    finally:
+        server.server_close()
+        # 运行中的任务保持 running 状态，下次启动时会被重新排队
+        pool.stop(timeout=5)
+        snapshots.stop()
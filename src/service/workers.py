@@ -0,0 +1,114 @@
+import threading
+import traceback
+
+from src.config_loader import CONFIG
+from src.pipeline import run_pipeline, CancelToken, JobCancelled, STAGES
+from src.storage.workspace import Workspace
+from src.utils.interaction import non_interactive, HumanInterventionRequired
+
+DEFAULT_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 1.0
+
+def _next_stage(completed_stage):
+    """上次完成的阶段之后的下一个阶段；尚未完成任何阶段时从头开始"""
+    if completed_stage not in STAGES:
+        return None
+    index = STAGES.index(completed_stage) + 1
+    return STAGES[index] if index < len(STAGES) else STAGES[-1]
+
+class WorkerPool:
+    """
+    后台工作线程池：从 JobQueue 取任务并运行流水线
+    - 每个任务在独立的工作区中运行，浏览器与 LLM 并发由 src.utils.pools 统一限制
+    - 需要人工处理 (登录/验证码) 时任务被挂起，不阻塞工作线程
+    """
+
+    def __init__(self, queue, workers=None, poll_interval=None):
+        service_cfg = CONFIG.get("service", {})
+        self.queue = queue
+        self.workers = workers or service_cfg.get("workers", DEFAULT_WORKERS)
+        self.poll_interval = poll_interval or service_cfg.get("poll_interval", DEFAULT_POLL_INTERVAL)
+        self._stop = threading.Event()
+        self._threads = []
+        self._tokens = {}
+        self._tokens_lock = threading.Lock()
+
+    def start(self):
+        requeued = self.queue.requeue_running()
+        if requeued:
+            print(f"♻️ 已重新排队 {requeued} 个上次未完成的任务")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """不再领取新任务；正在运行的任务不会被取消"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def running_jobs(self):
+        with self._tokens_lock:
+            return list(self._tokens)
+
+    def cancel(self, job_id):
+        """通知正在本进程中运行的任务尽快停止"""
+        with self._tokens_lock:
+            token = self._tokens.get(job_id)
+        if token:
+            token.cancel()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["id"]
+        token = CancelToken()
+        with self._tokens_lock:
+            self._tokens[job_id] = token
+
+        workspace = Workspace(job.get("run_id"))
+        self.queue.update_progress(job_id, job.get("stage"), job.get("result"), run_id=workspace.run_id)
+
+        def on_stage(stage, partial):
+            self.queue.update_progress(job_id, stage, partial)
+            if self.queue.is_cancel_requested(job_id):
+                token.cancel()
+
+        print(f"▶️ 开始任务 {job_id}: {job['spec'].get('keyword')}")
+        try:
+            with non_interactive():
+                result = run_pipeline(
+                    job["spec"],
+                    workspace=workspace,
+                    session_id=job["spec"].get("session_id"),
+                    cancel=token,
+                    on_stage=on_stage,
+                    start_stage=_next_stage(job.get("stage")),
+                )
+        except HumanInterventionRequired as e:
+            print(f"⏸️ 任务 {job_id} 已挂起: {e}")
+            self.queue.park(job_id, e)
+        except JobCancelled:
+            print(f"⏹️ 任务 {job_id} 已取消")
+            self.queue.mark_cancelled(job_id)
+        except Exception as e:
+            print(f"❌ 任务 {job_id} 失败: {e}")
+            self.queue.fail(job_id, f"{e}\n{traceback.format_exc()}")
+        else:
+            if result.get("error"):
+                self.queue.update_progress(job_id, result.get("stage"), result)
+                self.queue.fail(job_id, result["error"])
+            else:
+                self.queue.finish(job_id, result)
+                print(f"✅ 任务 {job_id} 完成")
+        finally:
+            with self._tokens_lock:
+                self._tokens.pop(job_id, None)
@@ -0,0 +1,290 @@
+import os
+import sys
+import time
+import hashlib
+import sqlite3
+import threading
+
+# 允许直接运行此脚本 (python src/storage/catalog.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.analysis.scorer import parse_price, parse_sales
+from src.config_loader import CONFIG
+from src.utils import json_codec
+
+DEFAULT_CATALOG_PATH = "cache/catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    platform   TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    title      TEXT,
+    shop       TEXT,
+    link       TEXT,
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL,
+    last_price REAL,
+    last_sales REAL,
+    PRIMARY KEY (platform, id)
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    platform   TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    ts         REAL NOT NULL,
+    price      REAL,
+    sales      REAL,
+    deal_count TEXT,
+    keyword    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS details (
+    platform     TEXT NOT NULL,
+    id           TEXT NOT NULL,
+    last_crawled REAL NOT NULL,
+    fingerprint  TEXT,
+    reviews      TEXT,
+    props        TEXT,
+    PRIMARY KEY (platform, id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_item ON snapshots (platform, id, ts);
+CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots (ts);
+"""
+
+def catalog_key(product):
+    """商品在目录中的主键 (platform, id)；DOM 兜底提取的淘宝商品没有 platform 字段"""
+    return (product.get("platform") or "Taobao", str(product.get("id", "")))
+
+def list_fingerprint(product):
+    """列表页内容指纹：价格或销量变化时指纹随之变化，用于判断详情是否需要重抓"""
+    raw = f"{parse_price(product.get('price', '0')):.2f}|{parse_sales(product.get('deal_count', '0')):.0f}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def merge_reviews(new_reviews, old_reviews, limit=None):
+    """合并新旧评论，新评论优先；按评论 id (没有则按内容) 去重"""
+    merged = []
+    seen = set()
+    for review in list(new_reviews or []) + list(old_reviews or []):
+        key = review.get("id") or review.get("rateContent") or review.get("content")
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        merged.append(review)
+        if limit and len(merged) >= limit:
+            break
+    return merged
+
+class ProductCatalog:
+    """
+    本地 SQLite 商品目录
+    - products: 每个 (platform, id) 一行，记录最近一次观测到的标题/价格/销量
+    - snapshots: 每次运行观测到的价格/销量快照，用于价格走势和历史最低价查询
+    数据跨运行保留，不受 clean_data() 影响。
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = CONFIG.get("storage", {}).get("catalog_path", DEFAULT_CATALOG_PATH)
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Streamlit / 线程池下可能跨线程访问，统一用一把锁串行化写入
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def upsert_products(self, products, keyword=None, ts=None):
+        """
+        批量写入一次运行的搜索结果 (单个事务)
+        :return: 本次新出现的商品数量
+        """
+        if not products:
+            return 0
+        if ts is None:
+            ts = time.time()
+
+        product_rows = []
+        snapshot_rows = []
+        for p in products:
+            platform, item_id = catalog_key(p)
+            if not item_id:
+                continue
+            price = parse_price(p.get("price", "0"))
+            sales = parse_sales(p.get("deal_count", "0"))
+            product_rows.append((
+                platform, item_id, p.get("title", ""), p.get("shop", ""), p.get("link", ""),
+                ts, ts, price, sales
+            ))
+            snapshot_rows.append((platform, item_id, ts, price, sales, str(p.get("deal_count", "")), keyword))
+
+        with self._lock:
+            with self.conn:
+                # 先插入新商品 (total_changes 的增量即新增数量)，再统一刷新最近观测值
+                changes_before = self.conn.total_changes
+                self.conn.executemany("""
+                    INSERT OR IGNORE INTO products (platform, id, title, shop, link, first_seen, last_seen, last_price, last_sales)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, product_rows)
+                new_count = self.conn.total_changes - changes_before
+                self.conn.executemany("""
+                    UPDATE products SET title = ?, shop = ?, link = ?, last_seen = ?, last_price = ?, last_sales = ?
+                    WHERE platform = ? AND id = ?
+                """, [(r[2], r[3], r[4], r[6], r[7], r[8], r[0], r[1]) for r in product_rows])
+                self.conn.executemany("""
+                    INSERT INTO snapshots (platform, id, ts, price, sales, deal_count, keyword)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, snapshot_rows)
+        return new_count
+
+    def known_ids(self, platform=None):
+        """返回目录中已存在的 (platform, id) 集合，用于跳过已知商品"""
+        with self._lock:
+            if platform:
+                rows = self.conn.execute("SELECT platform, id FROM products WHERE platform = ?", (platform,)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT platform, id FROM products").fetchall()
+        return {(r["platform"], r["id"]) for r in rows}
+
+    def get_product(self, platform, item_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM products WHERE platform = ? AND id = ?", (platform, str(item_id))
+            ).fetchone()
+        return dict(row) if row else None
+
+    def price_history(self, platform, item_id, days=None):
+        """按时间顺序返回某个商品的价格/销量快照"""
+        sql = "SELECT ts, price, sales FROM snapshots WHERE platform = ? AND id = ?"
+        params = [platform, str(item_id)]
+        if days:
+            sql += " AND ts >= ?"
+            params.append(time.time() - days * 86400)
+        sql += " ORDER BY ts"
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def price_trend(self, platform, item_id, days=30):
+        """
+        汇总某商品最近 N 天的价格走势
+        :return: {"min", "max", "first", "last", "change_pct", "points"}，无数据时返回 None
+        """
+        history = [h for h in self.price_history(platform, item_id, days) if h["price"] and h["price"] > 0]
+        if not history:
+            return None
+        prices = [h["price"] for h in history]
+        first, last = prices[0], prices[-1]
+        return {
+            "days": days,
+            "min": min(prices),
+            "max": max(prices),
+            "first": first,
+            "last": last,
+            "change_pct": round((last - first) / first * 100, 1) if first else 0.0,
+            "points": len(prices),
+        }
+
+    def cheapest(self, keyword=None, days=30, limit=10, platform=None):
+        """
+        查询最近 N 天内历史最低价最便宜的商品，无需重新抓取
+        :param keyword: 按标题模糊匹配，空格分隔的多个词需同时命中
+        """
+        sql = """
+            SELECT p.platform, p.id, p.title, p.shop, p.link, p.last_price,
+                   MIN(s.price) AS min_price, MAX(s.ts) AS last_ts
+            FROM snapshots s
+            JOIN products p ON p.platform = s.platform AND p.id = s.id
+            WHERE s.ts >= ? AND s.price > 0
+        """
+        params = [time.time() - days * 86400]
+        if platform:
+            sql += " AND p.platform = ?"
+            params.append(platform)
+        for token in (keyword or "").split():
+            # 关键词中的 % 和 _ 按字面匹配，不作为通配符
+            sql += " AND p.title LIKE ? ESCAPE '\\'"
+            params.append("%" + token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        sql += " GROUP BY p.platform, p.id ORDER BY min_price ASC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_detail(self, platform, item_id):
+        """读取上次深度采集的详情 (评论/参数)，不存在时返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM details WHERE platform = ? AND id = ?", (platform, str(item_id))
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "last_crawled": row["last_crawled"],
+            "fingerprint": row["fingerprint"],
+            "captured_reviews": json_codec.loads(row["reviews"] or "[]"),
+            "captured_props": json_codec.loads(row["props"] or "[]"),
+        }
+
+    def save_detail(self, platform, item_id, reviews, props, fingerprint, ts=None):
+        if ts is None:
+            ts = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO details (platform, id, last_crawled, fingerprint, reviews, props)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (platform, id) DO UPDATE SET
+                        last_crawled = excluded.last_crawled,
+                        fingerprint = excluded.fingerprint,
+                        reviews = excluded.reviews,
+                        props = excluded.props
+                """, (platform, str(item_id), ts, fingerprint,
+                      json_codec.dumps(reviews, pretty=False), json_codec.dumps(props, pretty=False)))
+
+    def detail_status(self, product, ttl_hours=24):
+        """
+        判断候选商品的详情是否需要重新采集
+        :return: (reason, stored)，reason 为 "new" / "expired" / "changed" / None (无需重抓)
+        """
+        platform, item_id = catalog_key(product)
+        stored = self.get_detail(platform, item_id)
+        if stored is None:
+            return "new", None
+        if time.time() - stored["last_crawled"] > ttl_hours * 3600:
+            return "expired", stored
+        if stored["fingerprint"] != list_fingerprint(product):
+            return "changed", stored
+        return None, stored
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+def get_catalog():
+    """进程内共享的目录实例"""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = ProductCatalog()
+        return _CATALOG
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    if len(sys.argv) > 2 and sys.argv[1] == "cheapest":
+        keyword = " ".join(sys.argv[2:])
+        for row in get_catalog().cheapest(keyword, days=30):
+            seen = datetime.fromtimestamp(row["last_ts"]).strftime("%Y-%m-%d")
+            print(f"¥{row['min_price']:<10.2f} [{row['platform']}] {row['title'][:40]} (最近出现: {seen})")
+    else:
+        print("用法: python src/storage/catalog.py cheapest <关键词>")
@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+
+from src.storage.catalog import catalog_key
+from src.utils import json_codec
+
+DEFAULT_DETAIL_STORE_PATH = "data/details.jsonl"
+
+# 记录总是以 platform、id 字段开头写入，建索引时只需匹配行首，无需解析整行 (旧记录回退到完整解析)
+_KEY_PREFIX = re.compile(rb'^\{"platform":\s*"([^"]*)",\s*"id":\s*"?([^",}]*)')
+
+class DetailStore:
+    """
+    商品详情存储 (单文件追加日志)
+    - 每条详情记录序列化为一行 JSON，只追加不改写
+    - 内存中维护 (platform, id) -> (offset, length) 索引 (与商品目录的主键一致，不同平台的相同 id 互不覆盖)，
+      同一商品多次写入时以最后一条为准
+    - 支持按商品批量读取，读取时按文件偏移排序，尽量顺序 I/O
+    取代原先 data/details/ 下每个商品一个 indent=2 JSON 文件的做法。
+    """
+
+    def __init__(self, path=DEFAULT_DETAIL_STORE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._index = {}
+        self._indexed_size = 0
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._refresh_index()
+
+    def _refresh_index(self):
+        """增量扫描文件尾部新增的记录 (其他实例/进程追加的数据也能被看到)"""
+        if not os.path.exists(self.path):
+            self._index = {}
+            self._indexed_size = 0
+            return
+        size = os.path.getsize(self.path)
+        if size < self._indexed_size:
+            # 文件被清理后重建
+            self._index = {}
+            self._indexed_size = 0
+        if size == self._indexed_size:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._indexed_size)
+            offset = self._indexed_size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 写入中的半行，留到下次再索引
+                    break
+                match = _KEY_PREFIX.match(line)
+                try:
+                    if match:
+                        key = (match.group(1).decode("utf-8"), match.group(2).decode("utf-8"))
+                    else:
+                        key = catalog_key(json_codec.loads(line))
+                    self._index[key] = (offset, len(line))
+                except Exception:
+                    pass
+                offset += len(line)
+        self._indexed_size = offset
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        """批量追加详情记录 (一次写入、一次 flush)"""
+        lines = []
+        for record in records:
+            key = catalog_key(record)
+            record = {"platform": key[0], "id": record["id"], **record}
+            lines.append((key, json_codec.dumpb(record, pretty=False) + b"\n"))
+        if not lines:
+            return
+        with self._lock:
+            self._refresh_index()
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(b"".join(line for _, line in lines))
+            for key, line in lines:
+                self._index[key] = (offset, len(line))
+                offset += len(line)
+            self._indexed_size = offset
+
+    def _keys_for(self, item):
+        """
+        :param item: (platform, id)、商品 dict，或单独的 id (匹配所有平台下的该 id)
+        """
+        if isinstance(item, tuple):
+            return [(item[0], str(item[1]))]
+        if isinstance(item, dict):
+            return [catalog_key(item)]
+        item_id = str(item)
+        return [key for key in self._index if key[1] == item_id]
+
+    def ids(self):
+        """已存储的商品主键 (platform, id)"""
+        with self._lock:
+            self._refresh_index()
+            return list(self._index.keys())
+
+    def __contains__(self, item):
+        with self._lock:
+            self._refresh_index()
+            return any(key in self._index for key in self._keys_for(item))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh_index()
+            return len(self._index)
+
+    def iter_raw(self, ids=None):
+        """
+        按文件偏移顺序逐条产出原始 JSON 行 (bytes)，不做解析，
+        方便调用方在线程/进程池中并行解码。
+        :param ids: 只读取指定商品 ((platform, id)、商品 dict 或 id)，None 表示全部
+        """
+        with self._lock:
+            self._refresh_index()
+            if ids is None:
+                entries = list(self._index.values())
+            else:
+                entries = list({self._index[key] for item in ids for key in self._keys_for(item) if key in self._index})
+        entries.sort()
+        if not entries:
+            return
+        with open(self.path, "rb") as f:
+            for offset, length in entries:
+                f.seek(offset)
+                yield f.read(length)
+
+    def get_many(self, ids=None):
+        """按商品批量读取并解析详情记录"""
+        return [json_codec.loads(raw) for raw in self.iter_raw(ids)]
+
+    def get(self, item_id):
+        records = self.get_many([item_id])
+        return records[0] if records else None
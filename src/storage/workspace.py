@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+import shutil
+import threading
+import weakref
+from datetime import datetime
+
+from src.config_loader import CONFIG
+from src.storage.detail_store import DetailStore
+
+DEFAULT_RUNS_DIR = "data/runs"
+DEFAULT_RUN_TTL_HOURS = 24
+DEFAULT_GC_INTERVAL_MINUTES = 30
+
+# 当前进程中仍在使用的工作区，GC 不会删除它们 (对象被回收后自动移除)
+_active = weakref.WeakValueDictionary()
+_active_lock = threading.Lock()
+_gc_thread = None
+
+def _storage_config():
+    return CONFIG.get("storage", {})
+
+def new_run_id():
+    """时间前缀便于按目录名排序查看，随机后缀避免并发会话冲突"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+class Workspace:
+    """
+    单次运行的隔离工作区 (data/runs/<run_id>/)
+    搜索结果、候选商品、详情记录和报告都写在各自的目录里，多个 Streamlit 会话或并发任务互不干扰。
+    商品目录 (cache/catalog.db) 仍是全局共享的。
+    """
+
+    def __init__(self, run_id=None, root=None):
+        self.run_id = run_id or new_run_id()
+        self.root = root or _storage_config().get("runs_dir", DEFAULT_RUNS_DIR)
+        self.dir = os.path.join(self.root, self.run_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self._detail_store = None
+        with _active_lock:
+            _active[self.run_id] = self
+        ensure_gc()
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    @property
+    def search_results_path(self):
+        return self.path("search_results.json")
+
+    @property
+    def top_candidates_path(self):
+        return self.path("top_candidates.json")
+
+    @property
+    def details_path(self):
+        return self.path("details.jsonl")
+
+    @property
+    def report_md_path(self):
+        return self.path("final_report.md")
+
+    @property
+    def report_html_path(self):
+        return self.path("final_report.html")
+
+    def detail_store(self):
+        if self._detail_store is None:
+            self._detail_store = DetailStore(self.details_path)
+        return self._detail_store
+
+    def touch(self):
+        """标记最近活跃时间，长时间运行的任务可定期调用，避免被 GC"""
+        os.utime(self.dir, None)
+
+    def clean(self):
+        """清空本工作区内的文件 (不影响其他会话)"""
+        for filename in os.listdir(self.dir):
+            file_path = os.path.join(self.dir, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.unlink(file_path)
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+            except Exception as e:
+                print(f"⚠️ 删除 {file_path} 失败: {e}")
+        self._detail_store = None
+
+    def remove(self):
+        with _active_lock:
+            if _active.get(self.run_id) is self:
+                del _active[self.run_id]
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def _last_activity(run_dir):
+    latest = os.path.getmtime(run_dir)
+    for entry in os.scandir(run_dir):
+        try:
+            latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            pass
+    return latest
+
+def collect_garbage(root=None, ttl_hours=None):
+    """
+    删除超过 ttl_hours 未活跃、且不在当前进程使用中的运行目录
+    :return: 删除的 run_id 列表
+    """
+    cfg = _storage_config()
+    root = root or cfg.get("runs_dir", DEFAULT_RUNS_DIR)
+    if ttl_hours is None:
+        ttl_hours = cfg.get("run_ttl_hours", DEFAULT_RUN_TTL_HOURS)
+    if not os.path.isdir(root):
+        return []
+
+    deadline = time.time() - ttl_hours * 3600
+    with _active_lock:
+        active = set(_active.keys())
+    removed = []
+    for entry in os.scandir(root):
+        if not entry.is_dir() or entry.name in active:
+            continue
+        try:
+            if _last_activity(entry.path) < deadline:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed.append(entry.name)
+        except OSError:
+            continue
+    return removed
+
+def _gc_loop(interval):
+    while True:
+        try:
+            removed = collect_garbage()
+            if removed:
+                print(f"🧹 已清理 {len(removed)} 个过期运行目录")
+        except Exception as e:
+            print(f"⚠️ 运行目录清理失败: {e}")
+        time.sleep(interval)
+
+def ensure_gc():
+    """启动后台清理线程 (每个进程只启动一次，run_ttl_hours <= 0 时不清理)"""
+    global _gc_thread
+    cfg = _storage_config()
+    if cfg.get("run_ttl_hours", DEFAULT_RUN_TTL_HOURS) <= 0:
+        return
+    with _active_lock:
+        if _gc_thread is not None:
+            return
+        interval = cfg.get("gc_interval_minutes", DEFAULT_GC_INTERVAL_MINUTES) * 60
+        _gc_thread = threading.Thread(target=_gc_loop, args=(interval,), name="workspace-gc", daemon=True)
+        _gc_thread.start()
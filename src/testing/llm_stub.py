@@ -0,0 +1,297 @@
+"""
+OpenAI 兼容的本地 LLM 模拟服务 (离线基准/压测使用)
+- 按各阶段的 Prompt 返回格式正确的确定性回复 (初筛返回 ID 数组、提取返回商品 JSON、分析返回 Markdown 报告等)
+- 也可回放录制的回复 (JSONL，每行 {"stage": ..., "content": ...})
+- 可配置固定延迟、输出速率 (tokens/s) 与错误注入 (429/500)
+
+用法:
+    python -m src.testing.llm_stub --port 8799 --latency 0.2 --token-rate 60 --error-rate 0.05
+    LLM_API_KEY=stub LLM_BASE_URL=http://127.0.0.1:8799/v1 python main.py
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.utils import json_codec
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8799
+
+_CJK = re.compile(r"[　-鿿＀-￯]")
+
+def estimate_tokens(text):
+    """粗略估算 token 数: 中文约一字一 token，其余约 4 个字符一个 token"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def detect_stage(messages):
+    """根据 system/user 消息识别调用阶段 (与 src/llm_analyzer.py 中的 Prompt 对应)"""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    user = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+    if "只输出 JSON 的助手" in system:
+        return "filter"
+    if "数据提取专家" in system:
+        return "extract"
+    if "购物决策助手" in system:
+        return "analyze"
+    if "搜索优化专家" in system:
+        return "refine_keyword"
+    if "澄清问题" in user:
+        return "clarify"
+    return "chat"
+
+def _json_after(text, marker):
+    """取 marker 之后的第一个 JSON 数组"""
+    start = text.find(marker)
+    if start < 0:
+        return None
+    start = text.find("[", start)
+    if start < 0:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text[start:])[0]
+    except ValueError:
+        return None
+
+class CannedResponder:
+    """按阶段生成确定性的回复 (相同输入得到相同输出)"""
+
+    def __init__(self, replay=None):
+        # 回放: stage -> 回复列表，按调用次数轮流返回
+        self.replay = replay or {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path):
+        replay = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json_codec.loads(line)
+                    replay.setdefault(record["stage"], []).append(record["content"])
+        return cls(replay)
+
+    def respond(self, stage, messages):
+        if stage in self.replay:
+            with self._lock:
+                index = self._counters.get(stage, 0)
+                self._counters[stage] = index + 1
+            candidates = self.replay[stage]
+            return candidates[index % len(candidates)]
+        user = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+        handler = getattr(self, f"_{stage}", self._chat)
+        return handler(user)
+
+    def _clarify(self, prompt):
+        return json.dumps(["您的预算大概是多少？", "主要在什么场景下使用？", "对品牌或功能有特别要求吗？"], ensure_ascii=False)
+
+    def _filter(self, prompt):
+        products = _json_after(prompt, "商品列表") or []
+        match = re.search(r"筛选出最值得深入研究的\s*(\d+)\s*个商品", prompt)
+        top_n = int(match.group(1)) if match else 5
+        # 确定性的"选择": 按 id 的哈希排序，避免总是选前几个
+        ranked = sorted(products, key=lambda p: hashlib.md5(str(p.get("id")).encode()).hexdigest())
+        return json.dumps([str(p.get("id")) for p in ranked[:top_n]], ensure_ascii=False)
+
+    def _extract(self, prompt):
+        items = []
+        for title, link in re.findall(r"\[([^\]]{4,})\]\((https?://[^)]+)\)", prompt):
+            price = re.search(r"[¥￥]\s*([\d,]+(?:\.\d+)?)", prompt[prompt.find(link):prompt.find(link) + 200])
+            items.append({"title": title, "price": price.group(1).replace(",", "") if price else "0", "shop": "未知", "link": link})
+            if len(items) >= 10:
+                break
+        return json.dumps(items, ensure_ascii=False)
+
+    def _analyze(self, prompt):
+        products = _json_after(prompt, "详细数据") or []
+        lines = ["## 1. 候选商品概览", "", "| 商品 | 价格 | 店铺 |", "| --- | --- | --- |"]
+        for p in products:
+            lines.append(f"| [{p.get('title', '')}]({p.get('url', '')}) | ¥{p.get('price', '')} | {p.get('shop_name', '')} |")
+        lines += ["", "## 2. 深度点评", ""]
+        for p in products:
+            lines.append(f"### {p.get('title', '')}")
+            lines.append(f"- **优点**: 评论 {len(p.get('comments', []))} 条，整体口碑稳定。")
+            lines.append("- **缺点/风险**: 个别评论提到做工问题。")
+            lines.append("- **适合人群**: 预算有限、追求性价比的用户。")
+        if products:
+            winner = products[0]
+            lines += ["", "## 3. 最终推荐 (Winner)", "",
+                      f"- **首选推荐**: [{winner.get('title', '')}]({winner.get('url', '')})",
+                      "- **理由**: 价格与口碑的综合表现最好。"]
+        return "\n".join(lines)
+
+    def _refine_keyword(self, prompt):
+        match = re.search(r'用户想买："([^"]+)"', prompt)
+        return " ".join((match.group(1) if match else "商品").split()[:2])
+
+    def _chat(self, prompt):
+        return "好的。"
+
+class StubSettings:
+    def __init__(self, latency=0.0, token_rate=0.0, error_rate=0.0, seed=0):
+        """
+        :param latency: 每次调用的固定延迟 (秒)
+        :param token_rate: 输出速率 (completion tokens/s)，0 表示不按输出长度额外等待
+        :param error_rate: 返回错误 (429/500) 的概率
+        """
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def should_fail(self):
+        if self.error_rate <= 0:
+            return None
+        with self.rng_lock:
+            if self.rng.random() >= self.error_rate:
+                return None
+            return self.rng.choice([429, 500])
+
+class StubHandler(BaseHTTPRequestHandler):
+    responder = None
+    settings = None
+    stats = None
+    stats_lock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json_codec.dumpb(payload, pretty=False)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._send(200, {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]})
+        if self.path.rstrip("/") == "/stats":
+            with self.stats_lock:
+                return self._send(200, dict(self.stats))
+        self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json_codec.loads(self.rfile.read(length)) if length else {}
+        except Exception:
+            return self._send(400, {"error": {"message": "invalid JSON"}})
+
+        messages = request.get("messages") or []
+        stage = detect_stage(messages)
+        if self.settings.latency:
+            time.sleep(self.settings.latency)
+
+        status = self.settings.should_fail()
+        if status:
+            self._count(stage, errors=1)
+            return self._send(status, {"error": {"message": f"injected error {status}", "type": "stub_error", "code": status}})
+
+        content = self.responder.respond(stage, messages)
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        if self.settings.token_rate:
+            time.sleep(completion_tokens / self.settings.token_rate)
+        self._count(stage, calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or "stub-model",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def _count(self, stage, **values):
+        with self.stats_lock:
+            row = self.stats.setdefault(stage, {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            for key, value in values.items():
+                row[key] += value
+
+class StubLLMServer:
+    """
+    在后台线程中运行的模拟服务 (基准脚本内嵌使用)
+        with StubLLMServer(latency=0.1) as server:
+            os.environ["LLM_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=0, latency=0.0, token_rate=0.0, error_rate=0.0, seed=0, replay_path=None):
+        responder = CannedResponder.from_file(replay_path) if replay_path else CannedResponder()
+        handler = type("BoundStubHandler", (StubHandler,), {
+            "responder": responder,
+            "settings": StubSettings(latency, token_rate, error_rate, seed),
+            "stats": {},
+            "stats_lock": threading.Lock(),
+        })
+        self.handler = handler
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self):
+        with self.handler.stats_lock:
+            return {stage: dict(row) for stage, row in self.handler.stats.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地 LLM 模拟服务")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次调用的固定延迟 (秒)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="输出速率 (tokens/s)，0 表示不限")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误注入概率 (0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="回放录制的回复 (JSONL: {\"stage\", \"content\"})")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.latency, args.token_rate, args.error_rate, args.seed, args.replay)
+    print(f"🤖 LLM 模拟服务已启动: {server.base_url}")
+    print(f"👉 使用方式: LLM_API_KEY=stub LLM_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 正在停止...")
+        print(json_codec.dumps(server.stats))
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    if sys.platform.startswith("win"):
+        sys.stdout.reconfigure(encoding="utf-8")
+    main()
@@ -0,0 +1,152 @@
+"""
+合成商品数据 (离线基准/压测使用)
+价格、销量、店铺名沿用各平台抓取结果中的真实字符串格式，生成结果可直接交给打分、初筛与报告流程
+"""
+import time
+import random
+import asyncio
+import zlib
+
+from src.utils.events import emit
+
+_NOUNS = ["机械键盘", "跑步鞋", "蓝牙耳机", "洗发水", "保温杯", "显示器", "空气炸锅", "双肩包", "电动牙刷", "降噪耳机"]
+_ADJECTIVES = ["2024新款", "旗舰版", "高性价比", "静音", "轻薄", "大容量", "无线", "专业级", "学生党", "官方正品"]
+_BRANDS = ["小米", "罗技", "耐克", "华为", "美的", "飞利浦", "安踏", "雷蛇", "海尔", "索尼"]
+
+def _taobao_sales(rng):
+    n = rng.choice([rng.randint(1, 99), rng.randint(100, 9999), rng.randint(1, 50)])
+    if n >= 10000 or rng.random() < 0.2:
+        return f"{rng.randint(1, 20)}万+人付款"
+    return f"{n}+人付款" if n >= 100 else f"{n}人付款"
+
+def _jd_sales(rng):
+    if rng.random() < 0.3:
+        return f"{rng.randint(1, 50)}万+条评价"
+    return f"{rng.randint(1, 99) * 100}+条评价"
+
+def _title(rng):
+    return f"{rng.choice(_BRANDS)} {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {rng.choice(_ADJECTIVES)}"
+
+def make_product(rng, index, platform=None):
+    """生成一个商品 (字段与各平台爬虫输出一致)"""
+    platform = platform or rng.choice(["Taobao", "Tmall", "JD", "Vipshop"])
+    base_price = rng.lognormvariate(5, 0.8)
+    item_id = str(600000000000 + index)
+    if platform == "JD":
+        return {
+            "id": item_id,
+            "title": _title(rng),
+            "price": f"¥{base_price:,.2f}" if rng.random() < 0.5 else f"{base_price:.2f}",
+            "shop": rng.choice(["京东自营", f"{rng.choice(_BRANDS)}京东自营旗舰店", f"{rng.choice(_BRANDS)}专营店"]),
+            "deal_count": _jd_sales(rng),
+            "link": f"https://item.jd.com/{item_id}.html",
+            "platform": "JD",
+        }
+    if platform == "Vipshop":
+        return {
+            "id": item_id,
+            "title": f"[唯品会] {_title(rng)} ¥{base_price * 1.6:.0f}",
+            "price": f"{base_price:.0f}",
+            "shop": "唯品会自营",
+            "deal_count": "热销中",
+            "link": f"https://detail.vip.com/detail-{item_id}.html",
+            "platform": "Vipshop",
+        }
+    shop = f"{rng.choice(_BRANDS)}{rng.choice(['旗舰店', '专卖店', '数码专营店', '小店'])}"
+    if platform == "Tmall":
+        shop = "🔴 [天猫] " + shop
+    return {
+        "id": item_id,
+        "title": _title(rng),
+        "price": f"{base_price:.2f}",
+        "link": f"https://item.taobao.com/item.htm?id={item_id}",
+        "shop": shop,
+        "deal_count": _taobao_sales(rng),
+        "platform": platform,
+    }
+
+# 抓取结果中实际出现过的异常值 (DOM 兜底解析、缺少销量、价格区间等)
+_INVALID_PRICES = ["", "暂无报价", "99-199", None, 0]
+_INVALID_SALES = ["未知", "", "热销中", None, "1.5万+人付款"]
+
+def make_products(n, seed=0, platforms=None, invalid_rate=0.0):
+    """
+    :param platforms: 限定平台列表 (如 ["JD"])，默认四个平台混合
+    :param invalid_rate: 价格/销量替换为异常值的比例 (覆盖解析失败的分支)
+    """
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        product = make_product(rng, i, rng.choice(platforms) if platforms else None)
+        if invalid_rate and rng.random() < invalid_rate:
+            product["price"] = rng.choice(_INVALID_PRICES)
+        if invalid_rate and rng.random() < invalid_rate:
+            product["deal_count"] = rng.choice(_INVALID_SALES)
+        products.append(product)
+    return products
+
+def make_detail(rng, product, reviews=20):
+    """生成详情记录 (与 DetailStore 中的字段一致)，供分析阶段使用"""
+    phrases = ["做工扎实", "物流很快", "性价比高", "用了一周有异味", "和描述一致", "声音偏大", "包装简陋", "客服态度好"]
+    return {
+        "id": product["id"],
+        "title": product["title"],
+        "price": product["price"],
+        "shop": product["shop"],
+        "platform": product.get("platform"),
+        "link": product.get("link", ""),
+        "captured_reviews": [
+            {"content": "，".join(rng.sample(phrases, 3)), "rating": rng.randint(1, 5)} for _ in range(reviews)
+        ],
+        "captured_props": [{"name": "参数", "value": f"规格: {rng.choice(_ADJECTIVES)}"}],
+    }
+
+def make_search_markdown(products):
+    """生成类似京东搜索结果页 (Crawl4AI 输出) 的 Markdown"""
+    lines = ["# 京东搜索结果", ""]
+    for p in products:
+        lines.append(f"* [{p['title']}]({p.get('link', '')})")
+        lines.append(f"  ¥{str(p['price']).lstrip('¥')}  {p.get('deal_count', '')}  {p.get('shop', '')}")
+    return "\n".join(lines)
+
+class SyntheticScraper:
+    """
+    模拟爬虫 (压测使用): 每页等待 page_seconds 后返回合成商品，并发出与真实爬虫相同的抓取事件
+    默认只生成淘宝商品，详情阶段走淘宝深度采集的路径 (压测时由 SyntheticDetailScraper 代替真实爬虫)
+    """
+
+    page_seconds = 0.5
+    per_page = 40
+    platforms = ("Taobao",)
+
+    async def search(self, keyword, max_pages=1):
+        # 相同关键词得到相同结果，不同关键词互不相同
+        rng = random.Random(zlib.crc32(keyword.encode("utf-8")))
+        emit("crawl_start", platform="Synthetic", max_pages=max_pages)
+        results = []
+        for page in range(1, max_pages + 1):
+            emit("page_start", platform="Synthetic", page=page)
+            await asyncio.sleep(self.page_seconds)
+            offset = (page - 1) * self.per_page
+            products = [make_product(rng, offset + i, rng.choice(self.platforms)) for i in range(self.per_page)]
+            results.extend(products)
+            emit("page_done", platform="Synthetic", page=page, items=len(products), products=products)
+        emit("crawl_end", platform="Synthetic", total=len(results))
+        return results
+
+class SyntheticDetailScraper:
+    """
+    模拟淘宝详情采集 (压测使用): 每个商品等待 detail_seconds 后写入合成详情
+    Agent 在浏览器池槽位内调用 get_details，与真实爬虫一样占用浏览器并发
+    """
+
+    detail_seconds = 1.0
+
+    def get_details(self, candidates, incremental=None, store=None):
+        records = []
+        for product in candidates:
+            time.sleep(self.detail_seconds)
+            records.append(make_detail(random.Random(zlib.crc32(str(product["id"]).encode("utf-8"))), product))
+        if store is not None:
+            store.append_many(records)
+        return records
@@ -0,0 +1,48 @@
+import threading
+
+class EventBus:
+    """
+    进程内的抓取事件流 (发布/订阅)
+    爬虫、LLM 调用等在关键节点发出事件，CLI 看板等订阅者据此更新状态。
+    没有订阅者时 emit 直接返回，对热路径几乎没有开销。
+
+    常用事件:
+    - crawl_start / crawl_end: platform, max_pages / total
+    - page_done: platform, page, items (本页新增数量), products (本页新增商品)
+    - throttle: platform, seconds (防风控休眠)
+    - blocked: platform, reason (验证码/风控拦截)
+    - llm_start / llm_end: stage, seconds, prompt_tokens, completion_tokens, error
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """
+        订阅事件，callback(event, data)
+        :return: 取消订阅的函数
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+        return unsubscribe
+
+    def emit(self, event, **data):
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        for callback in subscribers:
+            try:
+                callback(event, data)
+            except Exception:
+                # 订阅者的异常不能影响抓取流程
+                pass
+
+EVENTS = EventBus()
+
+def emit(event, **data):
+    EVENTS.emit(event, **data)
@@ -0,0 +1,46 @@
+import threading
+from contextlib import contextmanager
+
+from src.utils.events import emit
+from src.utils import metrics
+
+class HumanInterventionRequired(Exception):
+    """
+    需要人工操作 (扫码登录、滑块验证等) 但当前运行在无人值守模式
+    服务模式下任务会被挂起 (parked)，处理完成后可通过 resume 重新排队
+    """
+
+    def __init__(self, platform, reason, message=""):
+        self.platform = platform
+        self.reason = reason
+        self.message = message
+        super().__init__(f"[{platform}] 需要人工处理: {reason} {message}".strip())
+
+_state = threading.local()
+
+def is_interactive():
+    """当前线程是否允许阻塞等待人工操作 (命令行/Streamlit 默认允许)"""
+    return getattr(_state, "interactive", True)
+
+@contextmanager
+def non_interactive():
+    """在此上下文中 (当前线程) 遇到需要人工处理的环节直接抛出 HumanInterventionRequired"""
+    previous = is_interactive()
+    _state.interactive = False
+    try:
+        yield
+    finally:
+        _state.interactive = previous
+
+def require_human(platform, reason, prompt=None):
+    """
+    爬虫遇到登录/验证码时调用
+    - 交互模式：给出 prompt 时阻塞等待回车，否则直接返回，由调用方自行轮询等待
+    - 无人值守模式：抛出 HumanInterventionRequired，不占用工作线程
+    """
+    metrics.BLOCKED.labels(platform, reason).inc()
+    emit("blocked", platform=platform, reason=reason)
+    if not is_interactive():
+        raise HumanInterventionRequired(platform, reason)
+    if prompt:
+        input(prompt)
@@ -0,0 +1,73 @@
+import os
+import json
+import threading
+
+from src.config_loader import CONFIG
+
+# 优先使用更快的 orjson / msgspec，都未安装时回退到标准库
+try:
+    import orjson
+    BACKEND = "orjson"
+except ImportError:
+    orjson = None
+    try:
+        import msgspec
+        BACKEND = "msgspec"
+    except ImportError:
+        msgspec = None
+        BACKEND = "json"
+
+def _default(obj):
+    """兼容 pydantic 模型等非原生类型"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    return str(obj)
+
+def _use_pretty(pretty):
+    if pretty is None:
+        return CONFIG.get("storage", {}).get("json_pretty", True)
+    return pretty
+
+def dumpb(obj, pretty=None):
+    """序列化为 UTF-8 bytes (中文不转义)"""
+    pretty = _use_pretty(pretty)
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    if BACKEND == "msgspec":
+        data = msgspec.json.encode(obj, enc_hook=_default)
+        return msgspec.json.format(data, indent=2) if pretty else data
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_default).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def dumps(obj, pretty=None):
+    return dumpb(obj, pretty).decode("utf-8")
+
+def loads(data):
+    """反序列化 str 或 bytes"""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+def dump(obj, path, pretty=None):
+    """写入 JSON 文件 (先写临时文件再替换，避免读到半截文件)"""
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumpb(obj, pretty))
+    os.replace(tmp_path, path)
+
+def load(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
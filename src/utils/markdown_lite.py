@@ -0,0 +1,165 @@
+import re
+import html
+
+# 内置的轻量转换器，覆盖 LLM 报告中常见的语法：标题、段落、列表、表格、引用、代码块、粗体/斜体、链接、分隔线。
+# 报告会引用抓取到的标题与评论，所有文本先转义再渲染 (不使用 python-markdown：它会原样输出 HTML)，
+# 输出也不随是否安装了第三方包而变化。
+
+_INLINE_CODE = re.compile(r"`([^`]+)`")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+_BOLD = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+_ITALIC = re.compile(r"(?<![\*\w])\*(?!\s)(.+?)(?<!\s)\*(?!\*)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_TABLE_SEP = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+_HR = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+def _safe_url(url):
+    url = url.strip()
+    if url.lower().startswith(("javascript:", "data:", "vbscript:")):
+        return "#"
+    return url
+
+def render_inline(text):
+    """行内语法：先整体转义，再把 `code` 暂存起来，避免其中的符号被当成粗体/链接"""
+    codes = []
+
+    def stash_code(m):
+        codes.append(f"<code>{m.group(1)}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = html.escape(text, quote=False)
+    text = _INLINE_CODE.sub(stash_code, text)
+    text = _LINK.sub(
+        lambda m: f'<a href="{html.escape(_safe_url(html.unescape(m.group(2))))}" target="_blank">{m.group(1)}</a>',
+        text,
+    )
+    text = _BOLD.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = _ITALIC.sub(r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+def _render_table(lines):
+    header = _split_row(lines[0])
+    out = ["<table>", "<thead><tr>"]
+    out.extend(f"<th>{render_inline(cell)}</th>" for cell in header)
+    out.append("</tr></thead>")
+    out.append("<tbody>")
+    for line in lines[2:]:
+        cells = _split_row(line)
+        out.append("<tr>" + "".join(f"<td>{render_inline(cell)}</td>" for cell in cells) + "</tr>")
+    out.append("</tbody></table>")
+    return "\n".join(out)
+
+def _render_list(lines):
+    """按缩进渲染 (可嵌套的) 有序/无序列表"""
+    out = []
+    stack = []  # [(indent, tag)]
+    for line in lines:
+        m = _LIST_ITEM.match(line)
+        if not m:
+            # 列表项的续行
+            if out:
+                out[-1] = out[-1][:-len("</li>")] + " " + render_inline(line.strip()) + "</li>"
+            continue
+        indent = len(m.group(1).replace("\t", "    "))
+        tag = "ol" if m.group(2)[0].isdigit() else "ul"
+        while stack and indent < stack[-1][0]:
+            out.append(f"</{stack.pop()[1]}>")
+        if stack and indent == stack[-1][0] and tag != stack[-1][1]:
+            # 同一层级从无序列表切换到有序列表 (或反之)
+            out.append(f"</{stack.pop()[1]}>")
+        if not stack or indent > stack[-1][0]:
+            stack.append((indent, tag))
+            out.append(f"<{tag}>")
+        out.append(f"<li>{render_inline(m.group(3))}</li>")
+    while stack:
+        out.append(f"</{stack.pop()[1]}>")
+    return "\n".join(out)
+
+def _render_builtin(text):
+    lines = text.replace("\r\n", "\n").split("\n")
+    blocks = []
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+
+        if not stripped:
+            i += 1
+            continue
+
+        # 代码块
+        if stripped.startswith("```"):
+            i += 1
+            code = []
+            while i < n and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            i += 1
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+            continue
+
+        m = _HEADING.match(stripped)
+        if m:
+            level = len(m.group(1))
+            blocks.append(f"<h{level}>{render_inline(m.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if _HR.match(stripped):
+            blocks.append("<hr>")
+            i += 1
+            continue
+
+        # 表格：表头 + 分隔行
+        if "|" in stripped and i + 1 < n and _TABLE_SEP.match(lines[i + 1]):
+            table = [line, lines[i + 1]]
+            i += 2
+            while i < n and "|" in lines[i] and lines[i].strip():
+                table.append(lines[i])
+                i += 1
+            blocks.append(_render_table(table))
+            continue
+
+        if stripped.startswith(">"):
+            quote = []
+            while i < n and lines[i].strip().startswith(">"):
+                quote.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            blocks.append(f"<blockquote>{_render_builtin(chr(10).join(quote))}</blockquote>")
+            continue
+
+        if _LIST_ITEM.match(line):
+            items = []
+            while i < n and lines[i].strip() and (_LIST_ITEM.match(lines[i]) or lines[i].startswith((" ", "\t"))):
+                items.append(lines[i])
+                i += 1
+            blocks.append(_render_list(items))
+            continue
+
+        # 普通段落：直到空行或其他块级元素
+        para = []
+        while i < n and lines[i].strip():
+            nxt = lines[i].strip()
+            if para and (nxt.startswith(("#", "```", ">")) or _LIST_ITEM.match(lines[i]) or _HR.match(nxt)):
+                break
+            para.append(nxt)
+            i += 1
+        blocks.append(f"<p>{'<br>'.join(render_inline(p) for p in para)}</p>")
+
+    return "\n".join(blocks)
+
+def render_markdown(text):
+    """将 Markdown 渲染为 HTML 片段 (服务端渲染，无需在浏览器中加载 marked.js)"""
+    if not text:
+        return ""
+    return _render_builtin(text)
@@ -0,0 +1,326 @@
+"""
+进程内的运行指标 (Counter / Gauge / Histogram)，面向长时间运行的服务模式
+- 爬虫、llm_analyzer、ShoppingAgent 等直接更新这里定义的指标；热路径上先用 labels() 绑定标签，之后每次记录只是一次加锁的加法
+- 以 Prometheus 文本格式输出 (服务模式 GET /metrics)，也可由 SnapshotWriter 定期写出 JSON 快照
+- install() 订阅抓取事件流 (page_done / throttle)，把各爬虫已有的事件转换为指标
+"""
+import os
+import time
+import math
+import bisect
+import threading
+
+from src.config_loader import CONFIG
+from src.utils import json_codec
+from src.utils.events import EVENTS
+
+DEFAULT_SNAPSHOT_PATH = "data/metrics.json"
+DEFAULT_SNAPSHOT_INTERVAL = 30
+
+# 秒级耗时的默认分桶 (LLM 调用、阶段耗时、防风控休眠)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class _Child:
+    """某一组标签值对应的数值"""
+
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+class _Timer:
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.start)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help="", labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, *values, **kwargs):
+        """返回该组标签的子指标 (可缓存下来反复使用，避免每次查找)"""
+        if kwargs:
+            values = tuple(kwargs.get(name, "") for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        """[(标签 dict, 子指标)]"""
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help="", labelnames=(), function=None):
+        """
+        :param function: 读取时才计算的值 (如资源池占用、队列长度)；返回数值，或 {标签值元组: 数值}
+        """
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        self.labels(**labels).set(value)
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+    def dec(self, amount=1, **labels):
+        self.labels(**labels).dec(amount)
+
+    def set_function(self, function):
+        self.function = function
+
+    def samples(self):
+        if self.function is None:
+            return super().samples()
+        try:
+            value = self.function()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            rows = []
+            for key, v in value.items():
+                child = _Child()
+                child.value = v
+                key = key if isinstance(key, tuple) else (key,)
+                rows.append((dict(zip(self.labelnames, (str(k) for k in key))), child))
+            return rows
+        child = _Child()
+        child.value = value
+        return [({}, child)]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help="", labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+class Registry:
+    def __init__(self, prefix="shopping_agent_"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self.prefix + name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.kind}")
+            return metric
+
+    def counter(self, name, help="", labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name, help="", labelnames=(), function=None):
+        return self._get_or_create(Gauge, name, help, labelnames, function)
+
+    def histogram(self, name, help="", labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def to_prometheus(self):
+        """Prometheus 文本格式 (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, child in metric.samples():
+                if metric.kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + [math.inf], child.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+                    lines.append(f"{metric.name}_count{_format_labels(labels)} {child.count}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(child.value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """JSON 友好的快照: {指标名: {"type", "help", "values": [{"labels", ...}]}}"""
+        result = {}
+        for metric in self.metrics():
+            values = []
+            for labels, child in metric.samples():
+                if metric.kind == "histogram":
+                    values.append({"labels": labels, "count": child.count, "sum": child.sum,
+                                   "buckets": dict(zip([str(b) for b in metric.buckets] + ["+Inf"], child.counts))})
+                else:
+                    values.append({"labels": labels, "value": child.value})
+            result[metric.name] = {"type": metric.kind, "help": metric.help, "values": values}
+        return {"timestamp": time.time(), "metrics": result}
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+REGISTRY = Registry()
+
+# ---- 各模块共用的指标 ----
+PAGES = REGISTRY.counter("pages_total", "抓取的页数", ("platform", "status"))
+ITEMS = REGISTRY.counter("items_total", "抓取到的商品数", ("platform",))
+BLOCKED = REGISTRY.counter("blocked_total", "登录/验证码/风控拦截次数 (reason: login、captcha、baxia 等)", ("platform", "reason"))
+THROTTLE = REGISTRY.histogram("throttle_seconds", "防风控休眠时长", ("platform",), buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30))
+INTERCEPTED = REGISTRY.counter("intercepted_responses_total", "拦截回调处理的响应数", ("platform", "kind"))
+LLM_SECONDS = REGISTRY.histogram("llm_request_seconds", "LLM 调用耗时", ("stage",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM Token 用量", ("stage", "kind"))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM 调用失败次数", ("stage",))
+CACHE = REGISTRY.counter("cache_requests_total", "缓存查询次数 (result: hit / miss)", ("cache", "result"))
+STAGE_SECONDS = REGISTRY.histogram("stage_seconds", "流水线各阶段耗时", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("stage_errors_total", "流水线阶段异常次数", ("stage",))
+BROWSERS_IN_USE = REGISTRY.gauge("browser_pool_in_use", "正在使用的浏览器槽位")
+BROWSERS_MAX = REGISTRY.gauge("browser_pool_max", "浏览器槽位上限")
+LLM_IN_FLIGHT = REGISTRY.gauge("llm_pool_in_flight", "正在进行的 LLM 请求")
+QUEUE_DEPTH = REGISTRY.gauge("job_queue_jobs", "任务队列中各状态的任务数", ("status",))
+
+def cache_result(cache, hit):
+    CACHE.labels(cache, "hit" if hit else "miss").inc()
+
+# ---- 抓取事件 -> 指标 ----
+def _on_event(event, data):
+    platform = data.get("platform") or ""
+    if event == "page_done":
+        PAGES.labels(platform, "error" if data.get("error") else "ok").inc()
+        ITEMS.labels(platform).inc(data.get("items") or 0)
+    elif event == "throttle":
+        THROTTLE.labels(platform).observe(data.get("seconds") or 0)
+
+_installed = None
+_install_lock = threading.Lock()
+
+def install():
+    """订阅抓取事件流 (只在长时间运行的服务/批量模式中开启，命令行单次运行保持事件流无订阅者的快速路径)"""
+    global _installed
+    with _install_lock:
+        if _installed is None:
+            _installed = EVENTS.subscribe(_on_event)
+
+def _config():
+    return CONFIG.get("metrics", {})
+
+class SnapshotWriter:
+    """后台线程定期把指标快照写入 JSON 文件 (先写临时文件再替换，读取方不会读到半个文件)"""
+
+    def __init__(self, path=None, interval=None, registry=REGISTRY):
+        """
+        :param interval: 写入间隔 (秒)，0 表示不写快照
+        """
+        cfg = _config()
+        self.path = path or cfg.get("snapshot_path", DEFAULT_SNAPSHOT_PATH)
+        self.interval = interval if interval is not None else cfg.get("snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL)
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        json_codec.dump(self.registry.snapshot(), tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"⚠️ 写入指标快照失败: {e}")
+
+    def start(self):
+        if self.interval and self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """停止后台线程并写出最后一次快照"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        try:
+            self.write()
+        except Exception as e:
+            print(f"⚠️ 写入指标快照失败: {e}")
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+
+from src.config_loader import CONFIG
+from src.utils import metrics
+
+DEFAULT_MAX_BROWSERS = 2
+DEFAULT_MAX_LLM_CALLS = 4
+
+class LLMPool:
+    """
+    进程内共享的 LLM 客户端 + 并发上限
+    OpenAI 客户端自带连接池且线程安全，所有任务复用同一个实例；
+    semaphore 限制同时进行的请求数，避免触发服务商的速率限制。
+    """
+
+    def __init__(self, client_factory, max_concurrency=DEFAULT_MAX_LLM_CALLS):
+        self._factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_use = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @contextmanager
+    def slot(self):
+        with self._semaphore:
+            with self._lock:
+                self.in_use += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.in_use -= 1
+
+class BrowserPool:
+    """
+    浏览器并发槽位
+    各爬虫仍自行启动浏览器 (登录态、防检测参数各不相同)，这里只限制同时打开的浏览器数量，
+    多个任务并发时不会一次拉起过多 Chromium 进程。
+    """
+
+    def __init__(self, max_browsers=DEFAULT_MAX_BROWSERS):
+        self.max_browsers = max_browsers
+        self._semaphore = threading.BoundedSemaphore(max_browsers)
+        self._lock = threading.Lock()
+        self.in_use = 0
+
+    @contextmanager
+    def slot(self):
+        with self._semaphore:
+            with self._lock:
+                self.in_use += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.in_use -= 1
+
+_llm_pool = None
+_browser_pool = None
+_pools_lock = threading.Lock()
+
+def _default_llm_client():
+    from src.llm_analyzer import create_llm_client
+    return create_llm_client()
+
+def _pool_config():
+    return CONFIG.get("pools", {})
+
+def configure_pools(max_browsers=None, max_llm_calls=None):
+    """在任务开始前覆盖配置文件中的并发上限 (如批量运行的命令行参数)"""
+    global _llm_pool, _browser_pool
+    with _pools_lock:
+        if max_llm_calls:
+            _llm_pool = LLMPool(_default_llm_client, max_llm_calls)
+        if max_browsers:
+            _browser_pool = BrowserPool(max_browsers)
+
+def get_llm_pool():
+    global _llm_pool
+    if _llm_pool is None:
+        with _pools_lock:
+            if _llm_pool is None:
+                _llm_pool = LLMPool(_default_llm_client, _pool_config().get("max_llm_calls", DEFAULT_MAX_LLM_CALLS))
+    return _llm_pool
+
+def get_browser_pool():
+    global _browser_pool
+    if _browser_pool is None:
+        with _pools_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool(_pool_config().get("max_browsers", DEFAULT_MAX_BROWSERS))
+    return _browser_pool
+
+# 读取指标时才计算资源池占用
+metrics.BROWSERS_IN_USE.set_function(lambda: get_browser_pool().in_use)
+metrics.BROWSERS_MAX.set_function(lambda: get_browser_pool().max_browsers)
+metrics.LLM_IN_FLIGHT.set_function(lambda: get_llm_pool().in_use)
@@ -0,0 +1,281 @@
+"""
+按阶段的性能剖析 (排查线上慢运行，无需修改代码)
+- cprofile: 阶段线程内的函数级剖析，默认按线程 CPU 时间计时，I/O 等待不计入，拦截回调/解析/打分的 CPU 开销一目了然
+- sample: 后台线程定时采样所有线程的调用栈，按线程 CPU 时间是否增长区分 "cpu" 与 "wait" 样本 (输出 folded 格式，可用 speedscope/flamegraph 查看)
+- 可同时开启 tracemalloc，记录阶段内的内存增长与峰值
+产物写入 <运行目录>/profile/<阶段>.*，由环境变量 SHOPPING_AGENT_PROFILE (或 config.yaml 的 profiling.stages) 选择阶段
+
+用法:
+    python main.py --profile                          # 剖析全部阶段
+    python main.py --profile search,details --profiler sample
+    python batch.py jobs.jsonl --profile analyze
+    streamlit run app.py -- --profile search
+"""
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from collections import Counter
+
+from src.config_loader import CONFIG
+
+STAGES = ["search", "filter", "details", "analyze"]
+MODES = ["cprofile", "sample"]
+ENV_STAGES = "SHOPPING_AGENT_PROFILE"
+ENV_MODE = "SHOPPING_AGENT_PROFILER"
+ENV_MEMORY = "SHOPPING_AGENT_PROFILE_MEMORY"
+
+def _config():
+    return CONFIG.get("profiling", {})
+
+def profiled_stages():
+    """需要剖析的阶段集合 ("all" 表示全部阶段)，未开启时为空集合"""
+    value = os.getenv(ENV_STAGES)
+    if value is None:
+        value = _config().get("stages") or ""
+    if isinstance(value, (list, tuple)):
+        names = [str(v).strip().lower() for v in value]
+    else:
+        names = [v.strip().lower() for v in str(value).split(",")]
+    names = {n for n in names if n and n not in ("off", "none", "false", "0")}
+    return set(STAGES) if "all" in names else names
+
+def profiler_mode():
+    mode = (os.getenv(ENV_MODE) or _config().get("mode") or "cprofile").lower()
+    return mode if mode in MODES else "cprofile"
+
+def memory_enabled():
+    value = os.getenv(ENV_MEMORY)
+    if value is not None:
+        return value.lower() not in ("0", "false", "off", "no")
+    return _config().get("memory", True)
+
+def enable(stages="all", mode=None, memory=None):
+    """开启剖析 (写入环境变量，之后创建的 Agent 与子进程都会生效)"""
+    os.environ[ENV_STAGES] = ",".join(stages) if isinstance(stages, (list, tuple, set)) else str(stages)
+    if mode:
+        os.environ[ENV_MODE] = mode
+    if memory is not None:
+        os.environ[ENV_MEMORY] = "1" if memory else "0"
+
+def add_arguments(parser):
+    """给入口脚本的 argparse 添加 --profile 相关参数"""
+    parser.add_argument("--profile", nargs="?", const="all", metavar="STAGES",
+                        help=f"剖析指定阶段 (逗号分隔: {','.join(STAGES)}；不带值表示全部)，产物写入 <运行目录>/profile/")
+    parser.add_argument("--profiler", choices=MODES, help="剖析方式 (默认 cprofile)")
+    parser.add_argument("--no-profile-memory", action="store_true", help="不记录 tracemalloc 内存快照")
+
+def apply_arguments(args):
+    if getattr(args, "profile", None):
+        enable(args.profile, mode=args.profiler, memory=False if args.no_profile_memory else None)
+
+def for_workspace(workspace):
+    """按当前设置为一次运行创建 StageProfiler；未开启剖析时返回 None"""
+    stages = profiled_stages()
+    if not stages:
+        return None
+    cfg = _config()
+    return StageProfiler(
+        workspace.path("profile"),
+        stages,
+        mode=profiler_mode(),
+        memory=memory_enabled(),
+        clock=cfg.get("clock", "cpu"),
+        interval=cfg.get("sample_interval", 0.005),
+        top=cfg.get("top", 40),
+    )
+
+# tracemalloc 是进程级的，并发运行的多个阶段共用一次 start/stop
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+
+def _retain_memory(frames):
+    global _memory_users, _memory_started
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _memory_started = True
+        _memory_users += 1
+
+def _release_memory():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        _memory_users -= 1
+        if _memory_users == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+class StageProfiler:
+    def __init__(self, output_dir, stages, mode="cprofile", memory=True, clock="cpu", interval=0.005, top=40):
+        """
+        :param stages: 需要剖析的阶段名集合
+        :param clock: cprofile 计时方式，cpu 为当前线程 CPU 时间 (不含 I/O 等待)，wall 为墙钟时间
+        :param interval: sample 模式的采样间隔 (秒)
+        :param top: 文本报告中列出的条目数
+        """
+        self.output_dir = output_dir
+        self.stages = set(stages)
+        self.mode = mode
+        self.memory = memory
+        self.clock = clock
+        self.interval = interval
+        self.top = top
+        self.artifacts = {}
+
+    @contextmanager
+    def stage(self, name):
+        if name not in self.stages:
+            yield
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        collector = _Sampler(self.interval) if self.mode == "sample" else _CProfile(self.clock)
+        if self.memory:
+            _retain_memory(frames=5)
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        started = collector.start()
+        try:
+            yield
+        finally:
+            if started:
+                collector.stop()
+            # 先取内存快照，避免把写报告本身的分配算进阶段
+            memory_path = None
+            if self.memory:
+                try:
+                    memory_path = self._save_memory(name, before)
+                finally:
+                    _release_memory()
+            paths = collector.save(self._path(name), self.top) if started else []
+            if memory_path:
+                paths.append(memory_path)
+            self.artifacts[name] = paths
+            if paths:
+                print(f"🔬 [剖析] {name} -> {', '.join(paths)}")
+
+    def _path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def _save_memory(self, name, before):
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        # 排除剖析器自身的分配
+        ignore = [tracemalloc.Filter(False, module.__file__) for module in (sys.modules[__name__], tracemalloc, cProfile, pstats)]
+        stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        path = self._path(name) + ".memory.txt"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {name}: 当前 {current / 1024 / 1024:.1f} MB, 阶段内峰值 {peak / 1024 / 1024:.1f} MB\n")
+            f.write(f"# 内存增长最多的 {self.top} 处 (按代码行)\n")
+            for stat in stats[:self.top]:
+                f.write(f"{stat}\n")
+        return path
+
+class _CProfile:
+    """cProfile 只记录启用它的线程 (Agent 阶段所在线程，含其中的 asyncio 任务与 Playwright 回调)"""
+
+    def __init__(self, clock):
+        self.profile = cProfile.Profile(time.thread_time) if clock == "cpu" else cProfile.Profile()
+
+    def start(self):
+        try:
+            self.profile.enable()
+            return True
+        except ValueError as e:
+            # Python 3.12+ 同一时间只能有一个剖析器 (并发任务同时剖析时)
+            print(f"⚠️ 无法启动 cProfile: {e}")
+            return False
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path, top):
+        self.profile.dump_stats(path + ".prof")
+        buffer = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=buffer)
+        stats.sort_stats("tottime").print_stats(top)
+        stats.sort_stats("cumulative").print_stats(top)
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+        return [path + ".prof", path + ".txt"]
+
+class _Sampler:
+    """
+    定时采样所有线程的调用栈
+    采样间隔内线程 CPU 时间增长超过一半视为 "cpu"，否则视为 "wait" (I/O、锁、休眠)；无法读取线程 CPU 时间的平台记为 "wall"
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stage-sampler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                state = self._state(ident)
+                self.stacks[";".join([state, names.get(ident, str(ident))] + frames[::-1])] += 1
+            self.samples += 1
+
+    def _state(self, ident):
+        try:
+            cpu = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return "wall"
+        previous = self._cpu.get(ident)
+        self._cpu[ident] = cpu
+        if previous is None:
+            return "wait"
+        return "cpu" if cpu - previous >= self.interval / 2 else "wait"
+
+    def save(self, path, top):
+        with open(path + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        by_state = Counter()
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            parts = stack.split(";")
+            by_state[parts[0]] += count
+            # 栈顶函数按 函数 (文件) 汇总，不区分行号
+            leaves[(parts[0], parts[-1].rsplit(":", 1)[0] + ")")] += count
+        total = sum(by_state.values()) or 1
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"# {self.samples} 轮采样，间隔 {self.interval * 1000:.0f} ms\n")
+            f.write("# " + ", ".join(f"{state} {count / total:.0%}" for state, count in by_state.most_common()) + "\n\n")
+            for state in ("cpu", "wait", "wall"):
+                rows = [(frame, count) for (s, frame), count in leaves.most_common() if s == state][:top]
+                if not rows:
+                    continue
+                f.write(f"## {state} 样本最多的栈顶函数\n")
+                for frame, count in rows:
+                    f.write(f"{count:>8} {count / total:>6.1%}  {frame}\n")
+                f.write("\n")
+        return [path + ".folded", path + ".txt"]
@@ -0,0 +1,103 @@
+import random
+from collections import Counter
+
+from src.config_loader import CONFIG
+
+# 淘宝未填写评价时的默认文案，没有分析价值
+EMPTY_REVIEW_TEXTS = {"此用户没有填写评价。", "此用户没有填写评价", "系统默认好评"}
+
+DEFAULT_REVIEW_CAP = 50
+
+def project_review(raw):
+    """
+    只保留分析需要的评论字段，丢弃头像、SKU 映射、图片列表、追评树等大对象
+    :return: 精简后的评论 dict，没有有效内容时返回 None
+    """
+    content = raw.get("rateContent") or raw.get("content") or raw.get("feedback") or ""
+    content = content.strip() if isinstance(content, str) else ""
+    if not content or content in EMPTY_REVIEW_TEXTS:
+        return None
+
+    review = {"id": raw.get("id") or raw.get("rateId"), "content": content}
+
+    append = raw.get("appendComment")
+    if isinstance(append, dict) and append.get("content"):
+        review["append"] = append["content"]
+
+    date = raw.get("rateDate") or raw.get("feedbackDate")
+    if date:
+        review["date"] = date
+
+    sku = raw.get("auctionSku") or raw.get("skuInfo")
+    if isinstance(sku, str) and sku:
+        review["sku"] = sku[:60]
+    return review
+
+def _rating_of(raw):
+    for key in ("star", "score", "rateType", "feedbackRate"):
+        value = raw.get(key)
+        if value not in (None, ""):
+            return str(value)
+    return "unknown"
+
+class ReviewReservoir:
+    """
+    评论蓄水池：无论加载了多少页评论，内存中最多保留 capacity 条精简后的评论。
+    使用蓄水池抽样 (Algorithm R)，保证各页评论被保留的概率相同，而不是只保留前几页；
+    同时对全部评论做计数统计 (评分分布、带图/追评数量等)。
+    """
+
+    def __init__(self, capacity=DEFAULT_REVIEW_CAP, seed=None):
+        self.capacity = capacity
+        self._rng = random.Random(seed)
+        self._samples = []
+        self._eligible = 0
+        self._total = 0
+        self._ratings = Counter()
+        self._with_pictures = 0
+        self._with_append = 0
+
+    def add(self, raw):
+        if not isinstance(raw, dict):
+            return
+        self._total += 1
+        self._ratings[_rating_of(raw)] += 1
+        if raw.get("pics"):
+            self._with_pictures += 1
+        if raw.get("appendComment"):
+            self._with_append += 1
+
+        review = project_review(raw)
+        if review is None:
+            return
+        self._eligible += 1
+        if len(self._samples) < self.capacity:
+            self._samples.append(review)
+        else:
+            j = self._rng.randrange(self._eligible)
+            if j < self.capacity:
+                self._samples[j] = review
+
+    def add_many(self, raws):
+        for raw in raws:
+            self.add(raw)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def items(self):
+        return list(self._samples)
+
+    def stats(self):
+        return {
+            "total_seen": self._total,
+            "with_content": self._eligible,
+            "kept": len(self._samples),
+            "with_pictures": self._with_pictures,
+            "with_append": self._with_append,
+            "rating_distribution": dict(self._ratings),
+        }
+
+def new_reservoir():
+    """按 crawler.review_cap 配置创建蓄水池 (各爬虫共用)"""
+    return ReviewReservoir(CONFIG.get("crawler", {}).get("review_cap", DEFAULT_REVIEW_CAP))
@@ -0,0 +1,96 @@
+from collections import deque
+
+class TermMatcher:
+    """
+    多模式字符串匹配 (Aho-Corasick 自动机)
+    一次扫描文本即可找出全部命中的词条，耗时只与文本长度相关，词条数量增加到成百上千也不会变慢。
+    英文不区分大小写。
+
+    用法:
+        matcher = TermMatcher([("微商", "blacklist"), ("尼泊金酯", "disliked")])
+        matcher.scan(["标题...", "评论..."])  # -> {"blacklist": ["微商"]}
+    """
+
+    def __init__(self, terms=None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [()]  # 以该状态结尾的词条
+        self._out = [()]  # 合并了后缀状态输出后的结果 (build 时重新计算)
+        self._built = True
+        self._size = 0
+        for term, label in terms or []:
+            self.add(term, label)
+        self.build()
+
+    def __len__(self):
+        return self._size
+
+    def add(self, term, label):
+        if not isinstance(term, str):
+            return
+        term = term.strip()
+        if not term:
+            return
+        state = 0
+        for ch in term.casefold():
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append(())
+                self._out.append(())
+            state = nxt
+        if (term, label) not in self._own[state]:
+            self._own[state] = self._own[state] + ((term, label),)
+            self._size += 1
+        self._built = False
+
+    def build(self):
+        """计算失配指针，并把后缀状态的输出合并进来 (BFS)；每次都从各状态自身的词条重新计算，可重复调用"""
+        self._out = list(self._own)
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_matches(self, text):
+        """逐个产出 (term, label)，同一词条出现多次会重复产出"""
+        if not self._size or not text:
+            return
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text.casefold():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+    def scan(self, texts):
+        """
+        扫描多段文本 (标题、参数、评论等)
+        :return: {label: [命中的词条, ...]}，无命中时返回空 dict
+        """
+        hits = {}
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            for term, label in self.iter_matches(text):
+                found = hits.setdefault(label, [])
+                if term not in found:
+                    found.append(term)
+        return hits
@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from src.utils import json_codec
+from src.utils.events import EVENTS
+
+class Tracer:
+    """
+    单次运行的耗时追踪 (span)
+    - 由 ShoppingAgent 在各阶段激活 (线程局部)，爬虫/解析/LLM 等代码通过 span()/traced() 记录耗时
+    - 抓取事件 (page_start/page_done、throttle、llm_start/llm_end 等) 自动转换为 span
+    - 导出 Chrome trace 格式 (chrome://tracing 或 https://ui.perfetto.dev 打开) 和文本汇总表
+    未激活 Tracer 的线程中 span() 直接返回，几乎没有开销。
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self.pid = os.getpid()
+        self.started = _now_us()
+        self._events = []
+        self._lock = threading.Lock()
+        self._open = {}  # (platform, "crawl") / (platform, "page", 页码) -> (ts, args)，事件转换时未结束的 span
+
+    def add(self, name, cat, ts, dur, tid=None, **args):
+        event = {"name": name, "cat": cat, "ph": "X", "ts": ts, "dur": max(0, dur),
+                 "pid": self.pid, "tid": tid or threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    def instant(self, name, cat, **args):
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": _now_us(),
+                 "pid": self.pid, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    @contextmanager
+    def activate(self):
+        """在当前线程中激活 (可嵌套，退出时恢复之前的 Tracer)"""
+        previous = getattr(_state, "tracer", None)
+        _state.tracer = self
+        token = _current.set(self)
+        _retain_bridge()
+        try:
+            yield self
+        finally:
+            _release_bridge()
+            _current.reset(token)
+            _state.tracer = previous
+
+    @contextmanager
+    def span(self, name, cat="stage", **args):
+        """激活并记录一个 span (Agent 的阶段入口使用)"""
+        with self.activate():
+            with span(name, cat, **args):
+                yield self
+
+    @property
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def to_chrome_trace(self):
+        return {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run_id": self.run_id},
+        }
+
+    def save(self, path):
+        json_codec.dump(self.to_chrome_trace(), path, pretty=False)
+        return path
+
+    def summary(self):
+        return summarize(self.events)
+
+    def format_summary(self, limit=None):
+        return format_summary(self.summary(), limit=limit)
+
+    # ---- 抓取事件 -> span ----
+    def on_event(self, event, data):
+        platform = data.get("platform") or data.get("stage") or ""
+        if event == "crawl_start":
+            self._open[(platform, "crawl")] = (_now_us(), {"max_pages": data.get("max_pages")})
+        elif event == "crawl_end":
+            self._close((platform, "crawl"), f"crawl {platform}", "scraper", total=data.get("total"))
+        elif event == "page_start":
+            # 直连模式会并发抓取多页，按页码区分未结束的 span
+            self._open[(platform, "page", data.get("page"))] = (_now_us(), {"page": data.get("page")})
+        elif event == "page_done":
+            key = (platform, "page", data.get("page"))
+            if key in self._open:
+                self._close(key, f"page {platform}", "scraper",
+                            items=data.get("items"), error=data.get("error"))
+            else:
+                self.instant(f"page {platform}", "scraper", page=data.get("page"), items=data.get("items"))
+        elif event == "throttle":
+            # throttle 在休眠之前发出，按休眠时长记录
+            seconds = data.get("seconds") or 0
+            self.add(f"throttle {platform}", "throttle", _now_us(), int(seconds * 1e6), seconds=round(seconds, 2))
+        elif event == "blocked":
+            self.instant(f"blocked {platform}", "blocked", reason=data.get("reason"))
+        elif event == "llm_end":
+            seconds = data.get("seconds") or 0
+            end = _now_us()
+            self.add(f"llm {platform}", "llm", end - int(seconds * 1e6), int(seconds * 1e6),
+                     prompt_tokens=data.get("prompt_tokens"), completion_tokens=data.get("completion_tokens"),
+                     error=data.get("error"))
+
+    def _close(self, key, name, cat, **args):
+        opened = self._open.pop(key, None)
+        if opened is None:
+            return
+        ts, open_args = opened
+        merged = {k: v for k, v in {**open_args, **args}.items() if v is not None}
+        self.add(name, cat, ts, _now_us() - ts, **merged)
+
+# contextvar 随 asyncio 任务/asyncio.to_thread 传递；线程局部变量覆盖 Playwright 同步 API 在 greenlet 中执行的回调
+_current = contextvars.ContextVar("tracer", default=None)
+_state = threading.local()
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+def current_tracer():
+    return _current.get() or getattr(_state, "tracer", None)
+
+@contextmanager
+def span(name, cat="", **args):
+    """在当前线程激活的 Tracer 中记录一段耗时；没有激活的 Tracer 时什么也不做"""
+    tracer = current_tracer()
+    if tracer is None:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        tracer.add(name, cat, start, _now_us() - start, **args)
+
+def traced(name=None, cat=""):
+    """装饰器版本的 span (默认以函数名命名)"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_tracer() is None:
+                return func(*args, **kwargs)
+            with span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _bridge(event, data):
+    tracer = current_tracer()
+    if tracer is not None:
+        tracer.on_event(event, data)
+
+# 有 Tracer 激活时才订阅事件流 (保持 EventBus 无订阅者时的快速路径)，事件按发出线程当前激活的 Tracer 分发
+_bridge_lock = threading.Lock()
+_bridge_users = 0
+_unsubscribe = None
+
+def _retain_bridge():
+    global _bridge_users, _unsubscribe
+    with _bridge_lock:
+        _bridge_users += 1
+        if _unsubscribe is None:
+            _unsubscribe = EVENTS.subscribe(_bridge)
+
+def _release_bridge():
+    global _bridge_users, _unsubscribe
+    with _bridge_lock:
+        _bridge_users -= 1
+        if _bridge_users == 0 and _unsubscribe is not None:
+            _unsubscribe()
+            _unsubscribe = None
+
+def summarize(events):
+    """
+    按 (cat, name) 汇总: 次数、总耗时、自身耗时 (扣除同线程内嵌套的子 span)、最大耗时
+    :return: 按总耗时降序的 dict 列表，耗时单位为毫秒
+    """
+    spans = [e for e in events if e.get("ph") == "X"]
+    self_time = [e["dur"] for e in spans]
+    # 同一线程内按开始时间排序，用栈找到每个 span 的直接父节点
+    order = sorted(range(len(spans)), key=lambda i: (spans[i]["tid"], spans[i]["ts"], -spans[i]["dur"]))
+    stack = []
+    for i in order:
+        e = spans[i]
+        while stack and (spans[stack[-1]]["tid"] != e["tid"] or spans[stack[-1]]["ts"] + spans[stack[-1]]["dur"] <= e["ts"]):
+            stack.pop()
+        if stack:
+            self_time[stack[-1]] -= e["dur"]
+        stack.append(i)
+
+    rows = {}
+    for e, own in zip(spans, self_time):
+        row = rows.setdefault((e["cat"], e["name"]), {"cat": e["cat"], "name": e["name"], "count": 0,
+                                                       "total_ms": 0.0, "self_ms": 0.0, "max_ms": 0.0, "tokens": 0})
+        row["count"] += 1
+        row["total_ms"] += e["dur"] / 1000
+        row["self_ms"] += max(0, own) / 1000
+        row["max_ms"] = max(row["max_ms"], e["dur"] / 1000)
+        args = e.get("args") or {}
+        row["tokens"] += (args.get("prompt_tokens") or 0) + (args.get("completion_tokens") or 0)
+
+    wall = 0
+    if spans:
+        wall = (max(e["ts"] + e["dur"] for e in spans) - min(e["ts"] for e in spans)) / 1000
+    result = sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+    for row in result:
+        row["share"] = row["self_ms"] / wall if wall else 0.0
+    return result
+
+def format_summary(rows, limit=None):
+    """文本汇总表 (自身耗时占比可直接看出时间花在浏览器等待、防风控休眠还是 LLM 上)"""
+    rows = rows[:limit] if limit else rows
+    if not rows:
+        return "(无追踪数据)"
+    width = max(len(r["name"]) for r in rows)
+    lines = [f"{'span':<{width}}  {'cat':<9} {'次数':>5} {'总耗时ms':>11} {'自身ms':>11} {'最大ms':>10} {'占比':>6} {'tokens':>8}"]
+    for r in rows:
+        lines.append(
+            f"{r['name']:<{width}}  {r['cat']:<9} {r['count']:>5} {r['total_ms']:>11.1f} {r['self_ms']:>11.1f} "
+            f"{r['max_ms']:>10.1f} {r['share']:>6.1%} {r['tokens'] or '':>8}"
+        )
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # 查看已保存的追踪: python -m src.utils.tracing data/runs/<run_id>/trace.json
+    if len(sys.argv) < 2:
+        print("用法: python -m src.utils.tracing <trace.json>")
+        sys.exit(1)
+    trace = json_codec.load(sys.argv[1])
+    print(format_summary(summarize(trace.get("traceEvents", []))))